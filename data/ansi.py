@@ -0,0 +1,300 @@
+import curses
+import logging
+import os
+import select
+import sys
+import termios
+import time
+import tty
+from constants import COLOR_TABLE
+from framebuffer import FrameBuffer, AnsiEncoder, ANSI_RESET
+from perf import monitor
+
+# Output backend writing ANSI escape sequences straight to the terminal, for links
+# where output bytes are the bottleneck (e.g. SSH). Each frame is diffed against
+# what the terminal already shows and sent with a single write.
+
+ENTER_SCREEN = "\x1b[?1049h\x1b[0m\x1b[2J\x1b[?25l"  # Alternate screen, reset, clear, hide cursor
+LEAVE_SCREEN = "\x1b[0m\x1b[?25h\x1b[?1049l"         # Reset, show cursor, back to the normal screen
+FLAME_SYMBOL = "^"
+ESCAPE_WAIT = 0.03  # Seconds to wait for the rest of an escape sequence
+ESCAPE_KEYS = {
+    b"[A": curses.KEY_UP, b"[B": curses.KEY_DOWN, b"[C": curses.KEY_RIGHT, b"[D": curses.KEY_LEFT,
+    b"OA": curses.KEY_UP, b"OB": curses.KEY_DOWN, b"OC": curses.KEY_RIGHT, b"OD": curses.KEY_LEFT,
+}
+
+
+def _color_pair(number):
+    return (number & 0xff) << 8
+
+
+def enable_ansi_curses():
+    """
+    Replaces the module-level curses calls the game makes with ones that work without
+    initscr(): colour pairs become plain attribute bits that AnsiEncoder understands.
+    """
+    curses.color_pair = _color_pair
+    curses.has_colors = lambda: True
+    curses.start_color = lambda: None
+    curses.init_pair = lambda pair, foreground, background: None
+    curses.curs_set = lambda visibility: 0
+    curses.napms = lambda milliseconds: time.sleep(milliseconds / 1000)
+
+
+class AnsiScreen:
+    def __init__(self, output_fd=None, input_fd=None, height=None, width=None, max_bytes_per_second=None):
+        """
+        Stands in for the curses window. Drawing goes into a back buffer; refresh() and
+        getch() send the cells that differ from the front buffer (what the terminal shows).
+        With a bandwidth cap, frames over budget first drop flame flicker (flames that only
+        changed colour), then animation frames are skipped; the frame shown while waiting
+        for a key is always sent.
+        :param output_fd: File descriptor written to (default: stdout).
+        :param input_fd: File descriptor keys are read from (default: stdin).
+        :param height, width: Screen size (default: the terminal size).
+        :param max_bytes_per_second: Optional output bandwidth cap.
+        """
+        self.output_fd = sys.stdout.fileno() if output_fd is None else output_fd
+        self.input_fd = sys.stdin.fileno() if input_fd is None else input_fd
+        if height is None or width is None:
+            size = os.get_terminal_size(self.output_fd)
+            width, height = size.columns, size.lines
+        self.height = height
+        self.width = width
+        self.back = FrameBuffer(height, width)
+        self.front_chars = [None] * (height * width)  # None: unknown, always redrawn
+        self.front_attrs = [0] * (height * width)
+        self.encoder = AnsiEncoder(width)
+        self.terminal_attr = None  # Attribute the terminal is drawing with, None if unknown
+        self.delay = -1  # getch() timeout in milliseconds, -1 to wait
+        self.max_bytes_per_second = max_bytes_per_second
+        self.budget = max_bytes_per_second or 0
+        self.budget_time = time.perf_counter()
+        self.flame_attrs = {curses.color_pair(COLOR_TABLE["fire_red"]), curses.color_pair(COLOR_TABLE["fire_orange"])}
+        self.pending_input = b""
+        self.frames = 0
+        self.bytes_written = 0
+        self.last_frame_bytes = 0
+        self.frames_skipped = 0
+        self.flicker_dropped = 0
+        self.flicker_pending = 0  # Flicker cells left out of the last encoded frame
+
+    # Drawing: the curses calls used by the game
+    def addstr(self, y, x=None, text=None, attr=0):
+        if text is None:
+            raise curses.error("addstr() without a position is not supported")
+        if not (0 <= y < self.height and 0 <= x < self.width):
+            raise curses.error("addstr() returned ERR")
+        self.back.write(y, x, text, attr)
+
+    def addch(self, y, x, ch, attr=0):
+        self.addstr(y, x, ch if isinstance(ch, str) else chr(ch & 0xff), attr)
+
+    def clear(self):
+        # Unlike curses, clearing does not force the next frame to repaint the whole terminal
+        self.back.clear()
+
+    def erase(self):
+        self.back.clear()
+
+    def getmaxyx(self):
+        return (self.height, self.width)
+
+    def refresh(self):
+        self.flush(droppable=True)
+
+    def noutrefresh(self):
+        pass
+
+    def nodelay(self, flag):
+        self.delay = 0 if flag else -1
+
+    def timeout(self, delay):
+        self.delay = delay
+
+    def keypad(self, flag):
+        pass
+
+    # Output
+    def flush(self, droppable=False):
+        """
+        Sends the changes since the last frame in one write.
+        :param droppable: The frame may be skipped when over the bandwidth cap (animation frames).
+        """
+        if not self.back.dirty:
+            return
+        limited = self.max_bytes_per_second is not None
+        if limited:
+            now = time.perf_counter()
+            self.budget = min(self.budget + (now - self.budget_time) * self.max_bytes_per_second, self.max_bytes_per_second)
+            self.budget_time = now
+        data, updates, reprinted, attr = self.encode_frame(drop_flicker=False)
+        if limited and len(data) > self.budget:
+            data, updates, reprinted, attr = self.encode_frame(drop_flicker=True)
+            if len(data) > self.budget and droppable:
+                self.frames_skipped += 1
+                return
+            self.flicker_dropped += self.flicker_pending
+        self.back.dirty = False
+        if not data:
+            return
+        self.terminal_attr = attr
+        for index, char, attr in updates:
+            self.front_chars[index] = char
+            self.front_attrs[index] = attr
+        for start, end in reprinted:
+            self.front_chars[start:end] = self.back.chars[start:end]
+            self.front_attrs[start:end] = self.back.attrs[start:end]
+        self.write(data)
+        if limited:
+            self.budget -= len(data)  # May go below zero: later frames are degraded until it recovers
+        self.frames += 1
+        self.last_frame_bytes = len(data)
+        monitor.gauge("frame_bytes", len(data))
+
+    def write(self, data):
+        view = memoryview(data)
+        while view:
+            written = os.write(self.output_fd, view)
+            view = view[written:]
+        self.bytes_written += len(data)
+
+    def changed_runs(self, drop_flicker):
+        """
+        :return: (runs, updates, dropped): runs of changed cells as (start, end, attr), the
+                 (index, char, attr) updates to apply to the front buffer once sent, and
+                 the indices of the flicker cells left out of both.
+        """
+        chars, attrs = self.back.chars, self.back.attrs
+        front_chars, front_attrs = self.front_chars, self.front_attrs
+        flame_attrs = self.flame_attrs
+        width = self.width
+        runs = []
+        updates = []
+        dropped = set()
+        for start in range(0, len(chars), width):
+            end = start + width
+            if chars[start:end] == front_chars[start:end] and attrs[start:end] == front_attrs[start:end]:
+                continue
+            run_start = None
+            run_attr = None
+            for index in range(start, end):
+                char, attr = chars[index], attrs[index]
+                changed = char != front_chars[index] or attr != front_attrs[index]
+                if changed and drop_flicker and char == FLAME_SYMBOL == front_chars[index] \
+                        and attr in flame_attrs and front_attrs[index] in flame_attrs:
+                    changed = False
+                    dropped.add(index)
+                if run_start is not None and (not changed or attr != run_attr):
+                    runs.append((run_start, index, run_attr))
+                    run_start = None
+                if changed:
+                    updates.append((index, char, attr))
+                    if run_start is None:
+                        run_start, run_attr = index, attr
+            if run_start is not None:
+                runs.append((run_start, end, run_attr))
+        self.flicker_pending = len(dropped)
+        return runs, updates, dropped
+
+    def encode_runs(self, runs, dropped=()):
+        """
+        :return: (text, attr the terminal ends on, reprinted) drawing the runs in the given
+                 order; reprinted lists the (start, end) unchanged cells the text draws too.
+        Cursor moves use the shortest of an absolute move, a move right, or reprinting
+        the unchanged cells in between when they share the current attribute and none
+        of them is a dropped flicker cell.
+        """
+        width = self.width
+        chars, attrs = self.back.chars, self.back.attrs
+        sgr = self.encoder.sgr
+        parts = []
+        reprinted = []
+        cursor = None
+        current = self.terminal_attr
+        for start, end, attr in runs:
+            if attr != current:
+                parts.append(sgr(attr))
+                current = attr
+            if cursor != start:
+                move = f"\x1b[{start // width + 1};{start % width + 1}H"
+                if cursor is not None and cursor // width == start // width and cursor < start:
+                    gap = start - cursor
+                    right = f"\x1b[{gap}C"
+                    if len(right) < len(move):
+                        move = right
+                    if gap <= len(move) and all(attrs[index] == attr for index in range(cursor, start)) \
+                            and (not dropped or dropped.isdisjoint(range(cursor, start))):
+                        move = "".join(chars[cursor:start])
+                        reprinted.append((cursor, start))
+                parts.append(move)
+            parts.append("".join(chars[start:end]))
+            cursor = end if end % width else None  # The cursor does not move past the last column
+        return "".join(parts), current, reprinted
+
+    def encode_frame(self, drop_flicker):
+        """
+        :return: (bytes, front buffer updates, reprinted spans, attr the terminal ends on)
+                 for the current frame. Runs are sent in screen order or grouped by attribute,
+                 whichever is shorter. The front buffer takes exactly the cells drawn: the
+                 updates and the unchanged cells reprinted, never dropped flicker.
+        """
+        runs, updates, dropped = self.changed_runs(drop_flicker)
+        if not runs:
+            return b"", updates, [], self.terminal_attr
+        text, attr, reprinted = self.encode_runs(runs, dropped)
+        grouped_runs = sorted(runs, key=lambda run: (run[2] != self.terminal_attr, run[2], run[0]))
+        grouped_text, grouped_attr, grouped_reprinted = self.encode_runs(grouped_runs, dropped)
+        if len(grouped_text) < len(text):
+            text, attr, reprinted = grouped_text, grouped_attr, grouped_reprinted
+        return text.encode("utf-8"), updates, reprinted, attr
+
+    # Input
+    def getch(self):
+        self.flush()
+        if not self.pending_input:
+            wait = None if self.delay < 0 else self.delay / 1000
+            ready, _, _ = select.select([self.input_fd], [], [], wait)
+            if not ready:
+                return -1
+            self.pending_input = os.read(self.input_fd, 64)
+            if not self.pending_input:
+                return -1
+        if self.pending_input[:1] == b"\x1b":
+            if len(self.pending_input) < 3 and select.select([self.input_fd], [], [], ESCAPE_WAIT)[0]:
+                self.pending_input += os.read(self.input_fd, 64)
+            key = ESCAPE_KEYS.get(self.pending_input[1:3])
+            if key is not None:
+                self.pending_input = self.pending_input[3:]
+                return key
+        key = self.pending_input[0]
+        self.pending_input = self.pending_input[1:]
+        return key
+
+    def stats(self):
+        mean = self.bytes_written / self.frames if self.frames else 0.0
+        return {"frames": self.frames, "bytes": self.bytes_written, "bytes_per_frame": mean,
+                "last_frame_bytes": self.last_frame_bytes, "frames_skipped": self.frames_skipped,
+                "flicker_dropped": self.flicker_dropped}
+
+
+def run_ansi(function, *args, max_bytes_per_second=None):
+    """
+    Like curses.wrapper(): puts the terminal in cbreak mode on the alternate screen,
+    calls function(screen, *args) with an AnsiScreen and restores the terminal afterwards.
+    """
+    enable_ansi_curses()
+    input_fd = sys.stdin.fileno()
+    saved_mode = termios.tcgetattr(input_fd)
+    tty.setcbreak(input_fd)
+    screen = AnsiScreen(max_bytes_per_second=max_bytes_per_second)
+    screen.write(ENTER_SCREEN.encode())
+    try:
+        return function(screen, *args)
+    finally:
+        screen.write((ANSI_RESET + LEAVE_SCREEN).encode())
+        termios.tcsetattr(input_fd, termios.TCSADRAIN, saved_mode)
+        stats = screen.stats()
+        logging.info(f"ANSI output: {stats['frames']} frame(s), {stats['bytes']} byte(s), "
+                     f"{stats['bytes_per_frame']:.0f} bytes/frame, {stats['frames_skipped']} skipped, "
+                     f"{stats['flicker_dropped']} flicker cell(s) dropped.")
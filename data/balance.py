@@ -0,0 +1,297 @@
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import statistics
+import sys
+import time
+from headless import HeadlessScreen, enable_headless_curses
+
+enable_headless_curses()
+
+from constants import MONSTER_TABLE, ITEM_TABLE, WEAPON_TABLE, positive_int
+from game import GameSession, DIRECTION_KEYS
+from pathfinding import find_path, find_nearest, monster_positions, player_can_enter
+from stats import StatsStore, turn_percentiles
+
+DEFAULT_GAMES = 1000
+DEFAULT_MAX_TURNS = 2000
+FIRE_RANGE = 10          # The bot shoots at monsters lined up within this distance
+GRENADE_CROWD = 3        # Throw a grenade when this many monsters are within 2 cells
+WANDER_TURNS = 10        # Turns spent wandering before searching for a destination again
+
+
+class BotPlayer:
+    def __init__(self):
+        """
+        A simple scripted player for batch simulations. Each turn it:
+        shoots a monster lined up within FIRE_RANGE, throws a grenade into a crowd,
+        takes the staircase up once it has walked onto it, and otherwise walks to the
+        staircase, the nearest item or an exit into an unexplored room.
+        """
+        self.plan = None
+        self.last_position = None
+        self.wander_exit = None
+
+    def choose_key(self, session):
+        """
+        :return: Key code for this turn. Keys needed by prompts are pushed onto the screen queue.
+        """
+        player = session.player
+        room = session.current_room
+        position = (player.x, player.y)
+        # Only a staircase reached by walking counts; the one arrived on leads straight back
+        arrived = self.last_position is not None and (player.floor, *position) != self.last_position
+        arrived = arrived and self.last_position[0] == player.floor
+        self.last_position = (player.floor, *position)
+
+        # Shoot or throw
+        crowd = [m for m in room.monsters if max(abs(m.x - player.x), abs(m.y - player.y)) <= 2]
+        if len(crowd) >= GRENADE_CROWD and any(count > 0 for count in player.grenades.values()):
+            target = crowd[0]
+            direction = (sign(target.x - player.x), sign(target.y - player.y))
+            if direction != (0, 0):
+                session.fire_mode_active = False
+                session.stdscr.push_keys([DIRECTION_KEYS[direction]])
+                return ord('g')
+
+        if player.weapon_ammo > 0:
+            for monster in room.monsters:
+                dx, dy = monster.x - player.x, monster.y - player.y
+                distance = max(abs(dx), abs(dy))
+                if 0 < distance <= FIRE_RANGE and (dx == 0 or dy == 0 or abs(dx) == abs(dy)):
+                    session.fire_mode_active = True
+                    return DIRECTION_KEYS[(sign(dx), sign(dy))]
+        session.fire_mode_active = False
+
+        # Staircase
+        if room.check_for_staircase(player) and arrived:
+            return ord('u')
+
+        occupied = monster_positions(room)
+        if self.plan and self.plan[0] is room:
+            key = self.follow_plan(player, room, occupied)
+            if key is not None:
+                return key
+        wandering = self.wander_exit is not None and self.wander_exit[0] is room
+        if not wandering or session.turn >= self.wander_exit[2]:
+            self.plan = self.make_plan(session, room, position, occupied)
+        if self.plan is None:
+            # Nothing reachable is left: wander off to a random side of the room for a while
+            if not wandering or session.turn >= self.wander_exit[2]:
+                step = session.turn_rng.choice([(-1, 0), (1, 0), (0, -1), (0, 1)])
+                self.wander_exit = (room, step, session.turn + WANDER_TURNS)
+            return DIRECTION_KEYS[self.wander_exit[1]]
+        return self.follow_plan(player, room, occupied) or DIRECTION_KEYS[(1, 0)]
+
+    def make_plan(self, session, room, position, occupied):
+        """
+        Picks the next destination: the staircase, else the nearest item, else the nearest
+        edge cell leading into an unexplored room.
+        :return: (room, path, exit_step) or None if nothing is reachable.
+        """
+        if room.staircase_position and room.staircase_position != position:
+            path = find_path(room, position, room.staircase_position, occupied)
+            if path:
+                return room, path, None
+
+        items = {(item.x, item.y) for item in room.items.get_items()}
+        goal, path = find_nearest(room, position, items, occupied)
+        if path:
+            return room, path, None
+
+        # One search over the edge cells of every unexplored side
+        exit_steps = {}
+        for step, cells in session.unexplored_exits().items():
+            for cell in cells:
+                exit_steps.setdefault(cell, step)
+        goal, path = find_nearest(room, position, set(exit_steps), occupied)
+        if path is None:
+            return None
+        return room, path, exit_steps[goal]
+
+    def follow_plan(self, player, room, occupied):
+        """
+        :return: Key for the next step of the current plan, or None if it is finished or blocked.
+        """
+        _, path, exit_step = self.plan
+        if path and path[0] == (player.x, player.y):
+            path.pop(0)
+        if not path:
+            self.plan = None
+            return DIRECTION_KEYS[exit_step] if exit_step else None
+        next_x, next_y = path[0]
+        if abs(next_x - player.x) > 1 or abs(next_y - player.y) > 1:
+            return None
+        if (next_x, next_y) in occupied or not player_can_enter(room, next_x, next_y):
+            return None
+        return DIRECTION_KEYS[(next_x - player.x, next_y - player.y)]
+
+
+def sign(value):
+    return (value > 0) - (value < 0)
+
+
+def run_game(seed, max_turns=DEFAULT_MAX_TURNS):
+    """
+    Plays one headless game with the bot, without rendering.
+    :param seed: Session seed.
+    :param max_turns: Turn limit.
+    :return: Dict of per-game results.
+    """
+    screen = HeadlessScreen()
+    session = GameSession(screen, seed=seed)
+    bot = BotPlayer()
+    player = session.player
+    floors_reached = 0
+    died = False
+
+    while session.turn < max_turns:
+        session.begin_turn()
+        if not session.update_world(refresh=False):
+            died = True
+            break
+        session.handle_key(bot.choose_key(session))
+        session.end_turn()
+        floors_reached = max(floors_reached, player.floor)
+        if player.health <= 0:
+            died = True
+            break
+
+    return {
+        "seed": seed,
+        "turns": session.turn,
+        "died": died,
+        "floors_reached": floors_reached,
+        "rooms_generated": len(session.room_manager.rooms),
+        "damage_taken": player.damage_taken,
+        "kills": {**player.kill_stats["weapons"], **player.kill_stats["grenades"]},
+        "cause_of_death": player.cause_of_death if died else None,
+        "turn_ms": turn_percentiles(session.turn_times),
+    }
+
+
+def _init_worker():
+    enable_headless_curses()
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.addHandler(logging.NullHandler())
+    root.setLevel(logging.CRITICAL)
+
+
+def _run_game_task(task):
+    seed, max_turns = task
+    return run_game(seed, max_turns)
+
+
+def run_batch(games, base_seed=0, max_turns=DEFAULT_MAX_TURNS, workers=None):
+    """
+    Runs games in a process pool. Seeds are base_seed .. base_seed + games - 1.
+    :return: List of per-game result dicts in seed order.
+    """
+    workers = workers or os.cpu_count() or 1
+    tasks = [(base_seed + index, max_turns) for index in range(games)]
+    if workers == 1:
+        _init_worker()
+        results = [_run_game_task(task) for task in tasks]
+    else:
+        chunksize = max(1, games // (workers * 8))
+        with multiprocessing.Pool(workers, initializer=_init_worker) as pool:
+            results = list(pool.imap_unordered(_run_game_task, tasks, chunksize=chunksize))
+    results.sort(key=lambda result: result["seed"])
+    return results
+
+
+def describe(values):
+    ordered = sorted(values)
+    if not ordered:
+        return {}
+    last = len(ordered) - 1
+    return {
+        "mean": statistics.fmean(ordered),
+        "stdev": statistics.pstdev(ordered),
+        "min": ordered[0],
+        "p10": ordered[int(0.1 * last)],
+        "median": ordered[int(0.5 * last)],
+        "p90": ordered[int(0.9 * last)],
+        "max": ordered[-1],
+    }
+
+
+def summarize(results):
+    """
+    Aggregates per-game results into summary statistics.
+    """
+    kill_sources = sorted({source for result in results for source in result["kills"]})
+    floors = {}
+    for result in results:
+        floors[result["floors_reached"]] = floors.get(result["floors_reached"], 0) + 1
+    return {
+        "games": len(results),
+        "death_rate": sum(result["died"] for result in results) / len(results) if results else 0.0,
+        "survival_turns": describe([result["turns"] for result in results]),
+        "floors_reached": describe([result["floors_reached"] for result in results]),
+        "floors_reached_histogram": dict(sorted(floors.items())),
+        "damage_taken": describe([result["damage_taken"] for result in results]),
+        "kills_per_game": {
+            source: describe([result["kills"].get(source, 0) for result in results]) for source in kill_sources
+        },
+        "kills_total": {
+            source: sum(result["kills"].get(source, 0) for result in results) for source in kill_sources
+        },
+        "tables": {
+            "monsters": sorted(MONSTER_TABLE),
+            "item_drop_rates": {item["name"]: item["drop_rate"] for item in ITEM_TABLE},
+            "weapon_ammo": {name: weapon["ammo"] for name, weapon in WEAPON_TABLE.items()},
+        },
+    }
+
+
+def print_summary(summary, elapsed, workers):
+    games = summary["games"]
+    print(f"{games} game(s) in {elapsed:.1f}s on {workers} worker(s) ({games / elapsed:.1f} games/s)")
+    print(f"Death rate: {summary['death_rate'] * 100:.1f}%")
+    for key in ("survival_turns", "floors_reached", "damage_taken"):
+        stats = summary[key]
+        print(f"{key:<16} mean {stats['mean']:9.1f}  median {stats['median']:7}  p10 {stats['p10']:7}  p90 {stats['p90']:7}  max {stats['max']}")
+    print("Kills per game:")
+    for source, stats in summary["kills_per_game"].items():
+        print(f"  {source:<18} mean {stats['mean']:6.2f}  max {stats['max']:4}  total {summary['kills_total'][source]}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Run many seeded headless games with a scripted bot.")
+    parser.add_argument("-n", "--games", type=positive_int, default=DEFAULT_GAMES, help=f"Number of games (default: {DEFAULT_GAMES}).")
+    parser.add_argument("--seed", type=int, default=0, help="First seed; games use consecutive seeds.")
+    parser.add_argument("--max-turns", type=positive_int, default=DEFAULT_MAX_TURNS, help="Turn limit per game.")
+    parser.add_argument("-j", "--workers", type=positive_int, default=None, help="Worker processes (default: all cores).")
+    parser.add_argument("-o", "--output", help="Write the summary and per-game results as JSON.")
+    parser.add_argument("--stats-db", metavar="PATH", help="Also record every game in this statistics database (source 'balance').")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    workers = args.workers or os.cpu_count() or 1
+    start = time.perf_counter()
+    results = run_batch(args.games, args.seed, args.max_turns, workers)
+    elapsed = time.perf_counter() - start
+    summary = summarize(results)
+    print_summary(summary, elapsed, workers)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output_file:
+            json.dump({"summary": summary, "games": results}, output_file, indent=2)
+        print(f"Wrote results to {args.output}")
+    if args.stats_db:
+        store = StatsStore(args.stats_db)
+        for result in results:
+            store.record({**result, "source": "balance"})
+        store.close()
+        print(f"Recorded {store.written} game(s) in {args.stats_db}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
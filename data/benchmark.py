@@ -0,0 +1,382 @@
+import argparse
+import json
+import logging
+import platform
+import random
+import os
+import statistics
+import subprocess
+import sys
+import time
+from itertools import accumulate
+from logging_setup import setup_logging
+from headless import HeadlessScreen, enable_headless_curses
+
+enable_headless_curses()
+
+from constants import MONSTER_TABLE
+from room import Room, RoomManager
+from templates import build_template
+from player import Player
+from renderer import Renderer
+from monster import MonsterManager, create_monster
+from weapons.rpg import explode_rpg
+from weapons.flamethrower import fire_flamethrower
+from weapons.bullet import render_bullet
+from grenades.molitov import throw_molitov
+from loot import TIERS, roll_room, roll_rooms
+from tables import ITEM_TYPES
+from terrain import PROPERTY_FLAGS
+
+GRID_WIDTH, GRID_HEIGHT = 80, 24
+BENCH_SEED = 1337
+DEFAULT_REGRESSION_THRESHOLD = 0.10  # 10% slower than baseline counts as a regression
+LARGE_ROOM_DRAWS = 10000  # Loot draws for a room far larger than the usual five items
+
+
+def make_room(monster_count=None, seed=BENCH_SEED):
+    """
+    Builds a room with a fixed seed. If monster_count is given, the room's
+    monsters are replaced by that many monsters at random empty positions.
+    """
+    random.seed(seed)
+    room = Room(GRID_WIDTH, GRID_HEIGHT, floor_number=0, x=0, y=0, has_staircase=True)
+    if monster_count is not None:
+        for monster in room.monsters:
+            room.terrain.set(monster.x, monster.y, ".")
+        room.clear_monsters()
+        monster_names = list(MONSTER_TABLE)
+        free_cells = [
+            (x, y)
+            for y in range(1, GRID_HEIGHT - 1)
+            for x in range(1, GRID_WIDTH - 1)
+            if room.grid[y][x] == "." and (x, y) != (GRID_WIDTH // 2, GRID_HEIGHT // 2)
+        ]
+        random.shuffle(free_cells)
+        for x, y in free_cells[:monster_count]:
+            monster = create_monster(room, x, y, random.choice(monster_names))
+            room.terrain.set(x, y, monster.symbol)
+    return room
+
+
+def make_player(room):
+    manager = RoomManager(GRID_WIDTH, GRID_HEIGHT)
+    manager.rooms[(room.floor, room.x, room.y)] = room
+    player = Player(x=GRID_WIDTH // 2, y=GRID_HEIGHT // 2, room_manager=manager)
+    player.health = player.max_health = 10 ** 9
+    return player
+
+
+# Each benchmark is a setup function returning the callable to time.
+# Setup runs before every repeat and is not included in the timings.
+
+def bench_room_construction():
+    random.seed(BENCH_SEED)
+    template = build_template(random, GRID_WIDTH, GRID_HEIGHT)
+    return lambda: Room(GRID_WIDTH, GRID_HEIGHT, floor_number=0, x=0, y=0, has_staircase=True, template=template)
+
+
+def bench_room_template():
+    rng = random.Random(BENCH_SEED)
+    return lambda: build_template(rng, GRID_WIDTH, GRID_HEIGHT)
+
+
+def bench_room_manager_get_room():
+    random.seed(BENCH_SEED)
+    manager = RoomManager(GRID_WIDTH, GRID_HEIGHT)
+    # A game refills the template pool while waiting for keys; time only the stamping
+    manager.template_pool.size = 200
+    manager.template_pool.fill()
+    keys = [(floor, x, y) for floor in range(4) for x in range(5) for y in range(5)]
+    state = {"index": 0}
+
+    def get_new_room():
+        floor, x, y = keys[state["index"] % len(keys)]
+        if state["index"] >= len(keys):
+            manager.rooms.pop((floor, x, y), None)
+        state["index"] += 1
+        return manager.get_room(floor, x, y)
+    return get_new_room
+
+
+def bench_room_manager_cached_get_room():
+    random.seed(BENCH_SEED)
+    manager = RoomManager(GRID_WIDTH, GRID_HEIGHT)
+    manager.get_room(0, 2, 2)
+    return lambda: manager.get_room(0, 2, 2)
+
+
+def bench_render_game_area():
+    room = make_room()
+    player = make_player(room)
+    renderer = Renderer(GRID_WIDTH, GRID_HEIGHT)
+    screen = HeadlessScreen()
+    return lambda: renderer.render_game_area(screen, player, room)
+
+
+def bench_sidebar_render():
+    room = make_room()
+    player = make_player(room)
+    renderer = Renderer(GRID_WIDTH, GRID_HEIGHT)
+    for index in range(10):
+        renderer.display_message(f"Benchmark message {index}.")
+    screen = HeadlessScreen()
+    monster_types = {monster.type for monster in room.monsters}
+    return lambda: renderer.sidebar.render(screen, player, player.kill_stats, monster_types, renderer.messages)
+
+
+def bench_loot_alias_draws():
+    tier = TIERS[-1]
+    return lambda: tier.items.sample(LARGE_ROOM_DRAWS)
+
+
+def bench_loot_choices_draws():
+    # Baseline: precomputed cumulative weights and a binary search per draw
+    cum_weights = list(accumulate(item_type.drop_rate for item_type in ITEM_TYPES))
+    return lambda: random.choices(ITEM_TYPES, cum_weights=cum_weights, k=LARGE_ROOM_DRAWS)
+
+
+def bench_loot_roll_room():
+    tier = TIERS[-1]
+    return lambda: roll_room(tier)
+
+
+def bench_loot_roll_floor():
+    tier = TIERS[-1]
+    return lambda: roll_rooms(tier, 25)  # A 5 x 5 floor
+
+
+def make_handle_monsters_bench(monster_count):
+    def setup():
+        room = make_room(monster_count)
+        player = make_player(room)
+        manager = MonsterManager(room=room, player=player, stdscr=HeadlessScreen())
+        return manager.handle_monsters
+    return setup
+
+
+def with_room_reset(room, attack):
+    """
+    Wraps a weapon call so every call starts from the same monsters and no flames.
+    """
+    entities = room.entities.state()
+
+    def run():
+        room.entities.restore(entities)
+        room.fire.clear()
+        return attack()
+    return run
+
+
+def bench_terrain_masks():
+    # Rebuilds a room's flags from its grid, then every mask from the flags
+    room = make_room(100)
+    terrain = room.terrain
+    flags = list(PROPERTY_FLAGS.values())
+
+    def run():
+        terrain.rebuild()
+        return [terrain.mask(flag) for flag in flags]
+    return run
+
+
+def bench_explode_rpg():
+    room = make_room(100)
+    return with_room_reset(room, lambda: explode_rpg(GRID_WIDTH // 2, GRID_HEIGHT // 2, room))
+
+
+def bench_fire_flamethrower():
+    room = make_room(100)
+    screen = HeadlessScreen()
+    return with_room_reset(room, lambda: fire_flamethrower(screen, GRID_WIDTH // 2, GRID_HEIGHT // 2, (1, 0), room))
+
+
+def bench_throw_molitov():
+    room = make_room(100)
+    screen = HeadlessScreen()
+    return with_room_reset(room, lambda: throw_molitov(screen, GRID_WIDTH // 2, GRID_HEIGHT // 2, (1, 0), room))
+
+
+def bench_render_bullet():
+    room = make_room()
+    screen = HeadlessScreen()
+    return with_room_reset(room, lambda: render_bullet(screen, 1, GRID_HEIGHT // 2, (1, 0), room))
+
+
+def bench_turn_loop():
+    """
+    A full scripted session: 100 turns of movement, fire mode and grenades,
+    rendered against a headless screen.
+    """
+    from game import GameSession
+
+    script_rng = random.Random(BENCH_SEED)
+    keys = [script_rng.choice(b"12346789zg") for _ in range(100)]
+
+    def run_session():
+        screen = HeadlessScreen(keys=keys)
+        session = GameSession(screen, GRID_WIDTH, GRID_HEIGHT, seed=BENCH_SEED)
+        session.player.health = session.player.max_health = 10 ** 9
+        for _ in range(len(keys)):
+            session.begin_turn()
+            session.render()
+            session.update_world()
+            session.handle_key(screen.getch())
+            session.end_turn()
+    return run_session
+
+
+BENCHMARKS = [
+    ("room_construction", bench_room_construction, 200),
+    ("room_template", bench_room_template, 50),
+    ("room_manager_get_room", bench_room_manager_get_room, 200),
+    ("room_manager_cached_get_room", bench_room_manager_cached_get_room, 10000),
+    ("render_game_area", bench_render_game_area, 100),
+    ("sidebar_render", bench_sidebar_render, 1000),
+    ("loot_alias_draws_10000", bench_loot_alias_draws, 100),
+    ("loot_choices_draws_10000", bench_loot_choices_draws, 100),
+    ("loot_roll_room", bench_loot_roll_room, 10000),
+    ("loot_roll_floor", bench_loot_roll_floor, 1000),
+    ("handle_monsters_10", make_handle_monsters_bench(10), 200),
+    ("handle_monsters_100", make_handle_monsters_bench(100), 50),
+    ("handle_monsters_1000", make_handle_monsters_bench(1000), 5),
+    ("terrain_masks", bench_terrain_masks, 1000),
+    ("explode_rpg", bench_explode_rpg, 50),
+    ("fire_flamethrower", bench_fire_flamethrower, 10),
+    ("throw_molitov", bench_throw_molitov, 100),
+    ("render_bullet", bench_render_bullet, 500),
+    ("turn_loop_100", bench_turn_loop, 1),
+]
+
+
+def run_benchmark(setup, number, repeat):
+    """
+    Times `number` calls of the callable returned by setup, `repeat` times.
+    :return: List of seconds per call, one entry per repeat.
+    """
+    per_call = []
+    for _ in range(repeat):
+        func = setup()
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        per_call.append((time.perf_counter() - start) / number)
+    return per_call
+
+
+def run_suite(selected=None, repeat=5, scale=1.0):
+    results = {}
+    for name, setup, number in BENCHMARKS:
+        if selected and not any(pattern in name for pattern in selected):
+            continue
+        samples = run_benchmark(setup, max(1, int(number * scale)), repeat)
+        results[name] = {
+            "min_us": min(samples) * 1e6,
+            "median_us": statistics.median(samples) * 1e6,
+            "max_us": max(samples) * 1e6,
+            "repeat": repeat,
+            "number": max(1, int(number * scale)),
+        }
+        print(f"{name:<32}{results[name]['median_us']:>14.1f} us/call  (min {results[name]['min_us']:.1f})")
+    return results
+
+
+def run_startup(runs=10):
+    """
+    Measures cold start: each run launches a fresh interpreter executing startup.py, which
+    goes through the game's start-up path until the first frame is drawn.
+    Wall time includes interpreter start-up; phase timings come from the probe itself.
+    :return: Dict of result entries keyed "startup_<phase>", in the same format as run_suite.
+    """
+    probe = os.path.join(os.path.dirname(os.path.abspath(__file__)), "startup.py")
+    samples = {}
+    for _ in range(runs):
+        start = time.perf_counter()
+        output = subprocess.run([sys.executable, probe], check=True, capture_output=True, text=True).stdout
+        wall = time.perf_counter() - start
+        for phase, milliseconds in json.loads(output).items():
+            samples.setdefault(phase, []).append(milliseconds / 1000)
+        samples.setdefault("wall", []).append(wall)
+
+    results = {}
+    for phase, values in samples.items():
+        name = f"startup_{phase}"
+        results[name] = {
+            "min_us": min(values) * 1e6,
+            "median_us": statistics.median(values) * 1e6,
+            "max_us": max(values) * 1e6,
+            "repeat": runs,
+            "number": 1,
+        }
+        print(f"{name:<32}{results[name]['median_us'] / 1000:>14.1f} ms      (min {results[name]['min_us'] / 1000:.1f})")
+    return results
+
+
+def compare_with_baseline(results, baseline, threshold=DEFAULT_REGRESSION_THRESHOLD):
+    """
+    Compares median timings with a previous results file.
+    :return: List of (name, baseline_us, current_us, ratio) for regressions.
+    """
+    regressions = []
+    print(f"\n{'benchmark':<32}{'baseline':>12}{'current':>12}{'change':>10}")
+    for name, current in results.items():
+        previous = baseline.get("results", {}).get(name)
+        if not previous:
+            print(f"{name:<32}{'-':>12}{current['median_us']:>12.1f}{'new':>10}")
+            continue
+        ratio = current["median_us"] / previous["median_us"] if previous["median_us"] else 1.0
+        flag = "  REGRESSION" if ratio > 1 + threshold else ""
+        print(f"{name:<32}{previous['median_us']:>12.1f}{current['median_us']:>12.1f}{(ratio - 1) * 100:>9.1f}%{flag}")
+        if flag:
+            regressions.append((name, previous["median_us"], current["median_us"], ratio))
+    return regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Zombierun benchmark suite.")
+    parser.add_argument("-o", "--output", default="benchmark_results.json", help="Where to write the JSON results.")
+    parser.add_argument("-b", "--baseline", help="Previous results file to compare against.")
+    parser.add_argument("-k", "--select", action="append", help="Only run benchmarks whose name contains this text.")
+    parser.add_argument("--repeat", type=int, default=5, help="Repeats per benchmark (default: 5).")
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiply the calls per repeat (e.g. 0.1 for a quick run).")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_REGRESSION_THRESHOLD,
+                        help="Relative slowdown that counts as a regression (default: 0.10).")
+    parser.add_argument("--startup", action="store_true",
+                        help="Also measure time to first frame in fresh interpreters.")
+    parser.add_argument("--startup-runs", type=int, default=10, help="Interpreter launches for --startup (default: 10).")
+    parser.add_argument("--fail-on-regression", action="store_true", help="Exit with status 1 if a regression is found.")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    setup_logging(level=logging.WARNING, filename="benchmark.log")
+    results = run_suite(args.select, args.repeat, args.scale)
+    if args.startup:
+        results.update(run_startup(args.startup_runs))
+
+    output = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "machine": platform.machine(),
+            "platform": platform.platform(),
+        },
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as output_file:
+        json.dump(output, output_file, indent=2, sort_keys=True)
+    print(f"\nWrote {len(results)} result(s) to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as baseline_file:
+            baseline = json.load(baseline_file)
+        regressions = compare_with_baseline(results, baseline, args.threshold)
+        if regressions and args.fail_on_regression:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,114 @@
+# Room-sized bitboards: one Python integer per layer, bit y * width + x for cell (x, y).
+# Shifting and masking a layer updates every cell at once, so whole-room operations
+# cost a handful of big-integer operations instead of a loop over the cells.
+
+_geometries = {}
+_mask_tables = {}  # Symbols -> bytes.translate table marking them
+
+
+class BitGeometry:
+    def __init__(self, width, height):
+        """
+        Masks for one room size. Use geometry() to share them between rooms.
+        """
+        self.width = width
+        self.height = height
+        self.size = width * height
+        self.full = (1 << self.size) - 1
+        self.first_column = int(("0" * (width - 1) + "1") * height, 2)
+        self.last_column = self.first_column << (width - 1)
+        top_row = (1 << width) - 1
+        self.edges = top_row | (top_row << (width * (height - 1))) | self.first_column | self.last_column
+        self.not_first_column = self.full & ~self.first_column
+        self.not_last_column = self.full & ~self.last_column
+
+    def neighbours(self, mask):
+        """
+        :return: Cells next to (left, right, above or below) a cell in mask.
+        """
+        width = self.width
+        return (((mask << 1) & self.not_first_column) | ((mask >> 1) & self.not_last_column)
+                | ((mask << width) & self.full) | (mask >> width))
+
+    def rectangle(self, x0, y0, x1, y1):
+        """
+        :return: Mask of the cells from (x0, y0) to (x1, y1) inclusive, clipped to the room.
+        """
+        x0, y0 = max(x0, 0), max(y0, 0)
+        x1, y1 = min(x1, self.width - 1), min(y1, self.height - 1)
+        if x0 > x1 or y0 > y1:
+            return 0
+        row = ((1 << (x1 - x0 + 1)) - 1) << x0
+        mask = 0
+        for y in range(y0, y1 + 1):
+            mask |= row << (y * self.width)
+        return mask
+
+    def fill(self, seeds, passable):
+        """
+        :return: The passable cells connected to the seed cells, grown one step at a time.
+        """
+        reached = seeds & passable
+        while True:
+            grown = (reached | self.neighbours(reached)) & passable
+            if grown == reached:
+                return reached
+            reached = grown
+
+    def random_mask(self, rng, halvings):
+        """
+        :return: A mask with each cell set with probability 1 / 2 ** halvings.
+        """
+        mask = self.full
+        for _ in range(halvings):
+            mask &= rng.getrandbits(self.size)
+        return mask
+
+
+def geometry(width, height):
+    key = (width, height)
+    shared = _geometries.get(key)
+    if shared is None:
+        shared = _geometries[key] = BitGeometry(width, height)
+    return shared
+
+
+def grid_cells(grid):
+    """
+    :param grid: Rows of single-character symbols, as lists or strings.
+    :return: The cells as bytes, last cell first, ready for symbol_mask(). Symbols
+             outside ASCII become "?".
+    """
+    return "".join(map("".join, grid)).encode("ascii", "replace")[::-1]
+
+
+def symbol_mask(cells, symbols):
+    """
+    :param cells: Bytes from grid_cells().
+    :param symbols: String, tuple or list of the symbols to mark.
+    :return: Mask of the cells holding one of the symbols.
+    """
+    key = tuple(symbols)
+    table = _mask_tables.get(key)
+    if table is None:
+        marked = {ord(symbol) for symbol in symbols}
+        table = _mask_tables[key] = bytes(ord("1") if code in marked else ord("0") for code in range(256))
+    return int(cells.translate(table), 2)
+
+
+def cell_mask(grid, symbols):
+    """
+    :return: Mask of the grid cells holding one of the symbols.
+    """
+    return symbol_mask(grid_cells(grid), symbols)
+
+
+def iter_cells(mask):
+    """
+    Yields the index of every set cell, lowest first.
+    """
+    bits = bin(mask)[:1:-1]  # Binary digits, lowest first
+    index = bits.find("1")
+    while index != -1:
+        yield index
+        index = bits.find("1", index + 1)
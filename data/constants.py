@@ -1,9 +1,6 @@
 import curses
 import logging
-
-# Configure logging for this module
-logging.basicConfig(filename='game.log', level=logging.DEBUG,
-                    format='%(asctime)s:%(levelname)s:%(message)s')
+import time
 
 
 # Define MONSTER_TABLE
@@ -87,6 +84,35 @@ WEAPON_TABLE = {
     },
 }
 
+# Define FLOOR_TIERS
+# What new rooms hold, by depth. A tier applies from its first floor up to the next
+# tier's. Weights are relative: item_weights override an item's drop_rate (items left
+# out keep it), monster_weights leave out monsters that do not appear, and
+# monster_counts weighs the number of monsters in a room.
+FLOOR_TIERS = [
+    {
+        "first_floor": 0,
+        "items_per_room": 5,
+        "item_weights": {},
+        "monster_counts": {0: 17, 1: 36, 2: 31, 3: 13, 4: 3},
+        "monster_weights": {"Standard Zombie": 1, "Fast Zombie": 1, "Strong Zombie": 1, "Crawler": 1, "Mutant": 1},
+    },
+    {
+        "first_floor": 2,
+        "items_per_room": 5,
+        "item_weights": {"Medkit": 0.12, "Frag Grenade": 0.07, "Flamethrower": 0.04, "RPG": 0.02},
+        "monster_counts": {1: 25, 2: 35, 3: 25, 4: 10, 5: 5},
+        "monster_weights": {"Standard Zombie": 2, "Fast Zombie": 3, "Strong Zombie": 2, "Crawler": 2, "Mutant": 1},
+    },
+    {
+        "first_floor": 4,
+        "items_per_room": 6,
+        "item_weights": {"Medkit": 0.15, "Armor Plate": 0.15, "Pistol": 0.02, "Flamethrower": 0.05, "RPG": 0.04},
+        "monster_counts": {2: 20, 3: 30, 4: 25, 5: 15, 6: 10},
+        "monster_weights": {"Standard Zombie": 1, "Fast Zombie": 3, "Strong Zombie": 3, "Crawler": 2, "Mutant": 3},
+    },
+]
+
 # Define COLOR_TABLE
 COLOR_TABLE = {
     "player": 1,
@@ -110,6 +136,31 @@ COLOR_TABLE = {
     "rpg_color": 19,
 }
 
+# Foreground and background of each color pair, shared by initialize_colors
+# and the ANSI output used for spectators and recordings
+PAIR_COLORS = {
+    "player": (curses.COLOR_WHITE, curses.COLOR_BLACK),
+    "monster": (curses.COLOR_GREEN, curses.COLOR_BLACK),
+    "fire_red": (curses.COLOR_RED, curses.COLOR_BLACK),
+    "fire_orange": (curses.COLOR_YELLOW, curses.COLOR_BLACK),
+    "tree": (curses.COLOR_GREEN, curses.COLOR_BLACK),
+    "grass": (curses.COLOR_GREEN, curses.COLOR_BLACK),
+    "border_red": (curses.COLOR_RED, curses.COLOR_BLACK),
+    "border_green": (curses.COLOR_GREEN, curses.COLOR_BLACK),
+    "dirt": (curses.COLOR_YELLOW, curses.COLOR_BLACK),
+    "yellow_item": (curses.COLOR_YELLOW, curses.COLOR_BLACK),
+    "green": (curses.COLOR_GREEN, curses.COLOR_BLACK),
+    "magenta": (curses.COLOR_MAGENTA, curses.COLOR_BLACK),
+    "cyan": (curses.COLOR_CYAN, curses.COLOR_BLACK),
+    "red": (curses.COLOR_RED, curses.COLOR_BLACK),
+    "yellow_message": (curses.COLOR_YELLOW, curses.COLOR_BLACK),
+    "yellow": (curses.COLOR_YELLOW, curses.COLOR_BLACK),
+
+    "pistol_color": (curses.COLOR_YELLOW, curses.COLOR_BLACK),
+    "flamethrower_color": (curses.COLOR_YELLOW, curses.COLOR_BLACK),
+    "rpg_color": (curses.COLOR_RED, curses.COLOR_BLACK),
+}
+
 # Define TERRAIN_SYMBOLS
 TERRAIN_SYMBOLS = {
     "grass": ".",
@@ -118,8 +169,74 @@ TERRAIN_SYMBOLS = {
     "fire_orange": "~",
     "wall": "#",
     "dirt": "~",
+    "scorched": ",",
 }
 
+# Terrain type of each symbol; where two types share a symbol the first one listed wins
+TERRAIN_TYPES = {symbol: terrain_type for terrain_type, symbol in reversed(TERRAIN_SYMBOLS.items())}
+
+# Define TERRAIN_PROPERTIES
+# What each symbol on a room grid does, compiled into per-cell flags by terrain.py.
+# Symbols left out (items, monsters, the player) take DEFAULT_TERRAIN_PROPERTIES: they
+# burn with the ground under them and stop rockets. damage is per turn.
+TERRAIN_PROPERTIES = {
+    TERRAIN_SYMBOLS["grass"]: {"bare_ground": True, "flammable": True},
+    TERRAIN_SYMBOLS["scorched"]: {"bare_ground": True},
+    TERRAIN_SYMBOLS["tree"]: {
+        "blocks_player": True, "blocks_monsters": True, "blocks_bullets": True,
+        "blocks_grenades": True, "blocks_sight": True, "flammable": True,
+    },
+    TERRAIN_SYMBOLS["wall"]: {
+        "blocks_player": True, "blocks_monsters": True, "blocks_bullets": True,
+        "blocks_grenades": True, "blocks_sight": True,
+    },
+    TERRAIN_SYMBOLS["dirt"]: {"blocks_player": True, "blocks_grenades": True},
+    TERRAIN_SYMBOLS["fire_red"]: {"flammable": True, "damage": 5},
+    "S": {"blocks_monsters": True, "blocks_grenades": True},  # Staircase
+}
+DEFAULT_TERRAIN_PROPERTIES = {"flammable": True}
+
+# Animation settings; headless replays and benchmarks switch the delays off
+ANIMATION_SETTINGS = {"enabled": True}
+
+# Seconds spent waiting for the player in prompts and in animation delays. Turn timing
+# leaves this time out (see GameSession.end_turn), so only the game's own work counts.
+BLOCKED_TIME = {"seconds": 0.0}
+
+def set_animations_enabled(enabled):
+    ANIMATION_SETTINGS["enabled"] = enabled
+
+def animation_pause(milliseconds):
+    """
+    Pauses between animation frames, unless animations are disabled.
+    """
+    if ANIMATION_SETTINGS["enabled"]:
+        started = time.perf_counter()
+        curses.napms(milliseconds)
+        BLOCKED_TIME["seconds"] += time.perf_counter() - started
+
+def wait_for_key(stdscr):
+    """
+    Reads a key for a prompt or a modal view; the wait counts as blocked time.
+    """
+    started = time.perf_counter()
+    key = stdscr.getch()
+    BLOCKED_TIME["seconds"] += time.perf_counter() - started
+    return key
+
+def positive_int(text):
+    """
+    argparse type for counts that must be at least 1 (games, turns, workers).
+    """
+    import argparse
+    try:
+        value = int(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"'{text}' is not an integer.")
+    if value < 1:
+        raise argparse.ArgumentTypeError(f"{text} must be at least 1.")
+    return value
+
 def initialize_colors():
     """
     Initialize curses color pairs for rendering, with a fallback for unsupported terminals.
@@ -131,36 +248,24 @@ def initialize_colors():
     curses.start_color()
 
     try:
-        curses.init_pair(COLOR_TABLE["player"], curses.COLOR_WHITE, curses.COLOR_BLACK)
-        curses.init_pair(COLOR_TABLE["monster"], curses.COLOR_GREEN, curses.COLOR_BLACK)
-        curses.init_pair(COLOR_TABLE["fire_red"], curses.COLOR_RED, curses.COLOR_BLACK)
-        curses.init_pair(COLOR_TABLE["fire_orange"], curses.COLOR_YELLOW, curses.COLOR_BLACK)
-        curses.init_pair(COLOR_TABLE["tree"], curses.COLOR_GREEN, curses.COLOR_BLACK)
-        curses.init_pair(COLOR_TABLE["grass"], curses.COLOR_GREEN, curses.COLOR_BLACK)
-        curses.init_pair(COLOR_TABLE["border_red"], curses.COLOR_RED, curses.COLOR_BLACK)
-        curses.init_pair(COLOR_TABLE["border_green"], curses.COLOR_GREEN, curses.COLOR_BLACK)
-        curses.init_pair(COLOR_TABLE["dirt"], curses.COLOR_YELLOW, curses.COLOR_BLACK)
-        curses.init_pair(COLOR_TABLE["yellow_item"], curses.COLOR_YELLOW, curses.COLOR_BLACK)
-        curses.init_pair(COLOR_TABLE["green"], curses.COLOR_GREEN, curses.COLOR_BLACK)
-        curses.init_pair(COLOR_TABLE["magenta"], curses.COLOR_MAGENTA, curses.COLOR_BLACK)
-        curses.init_pair(COLOR_TABLE["cyan"], curses.COLOR_CYAN, curses.COLOR_BLACK)
-        curses.init_pair(COLOR_TABLE["red"], curses.COLOR_RED, curses.COLOR_BLACK)
-        curses.init_pair(COLOR_TABLE["yellow_message"], curses.COLOR_YELLOW, curses.COLOR_BLACK)
-        curses.init_pair(COLOR_TABLE["yellow"], curses.COLOR_YELLOW, curses.COLOR_BLACK)
-
-        curses.init_pair(COLOR_TABLE["pistol_color"], curses.COLOR_YELLOW, curses.COLOR_BLACK)
-        curses.init_pair(COLOR_TABLE["flamethrower_color"], curses.COLOR_YELLOW, curses.COLOR_BLACK)
-        curses.init_pair(COLOR_TABLE["rpg_color"], curses.COLOR_RED, curses.COLOR_BLACK)
+        for color_name, (foreground, background) in PAIR_COLORS.items():
+            curses.init_pair(COLOR_TABLE[color_name], foreground, background)
     except KeyError as e:
         logging.error(f"Color initialization failed. Missing color key: {e}")
         raise KeyError(f"Color '{e.args[0]}' is not defined in COLOR_TABLE.")
 
 
+_color_table_validated = False
+
+
 def validate_color_table():
     """
     Validates that all colors used in MONSTER_TABLE, ITEM_TABLE, and WEAPON_TABLE are defined in COLOR_TABLE.
-    Raises ValueError if any color is missing.
+    Raises ValueError if any color is missing. The tables are static, so the check only runs once per process.
     """
+    global _color_table_validated
+    if _color_table_validated:
+        return
     missing_colors = set()
 
     # Check colors in MONSTER_TABLE
@@ -184,12 +289,9 @@ def validate_color_table():
     if missing_colors:
         logging.error(f"Missing color definitions in COLOR_TABLE for: {', '.join(missing_colors)}")
         raise ValueError(f"Missing color definitions in COLOR_TABLE for: {', '.join(missing_colors)}")
-    else:
-        logging.info("All colors in MONSTER_TABLE, ITEM_TABLE, and WEAPON_TABLE are defined in COLOR_TABLE.")
-
+    _color_table_validated = True
+    logging.info("All colors in MONSTER_TABLE, ITEM_TABLE, and WEAPON_TABLE are defined in COLOR_TABLE.")
 
-# Perform validation upon module import
-validate_color_table()
 
 def get_terrain_color(terrain_type):
     """
@@ -201,6 +303,7 @@ def get_terrain_color(terrain_type):
         "fire_red": "fire_red",
         "fire_orange": "fire_orange",
         "wall": "border_red",
+        "scorched": "dirt",
         # Add more mappings if needed, e.g. staircase
     }
     return terrain_to_color.get(terrain_type, "grass")
@@ -0,0 +1,259 @@
+from array import array
+from operator import itemgetter
+
+# Per-room entity-component store. Entities with the same set of components share an
+# archetype, which keeps each component column packed in its own array, one row per
+# entity. Systems ask for the components they need with query() and loop over those
+# columns only, so a new kind of entity (a new archetype) costs existing systems nothing
+# unless it has the components they ask for.
+
+# Components and the columns they store: a typecode means a packed array, None a plain
+# list. Components without columns are tags telling kinds of entity apart.
+POSITION = "position"
+HEALTH = "health"
+ATTACK = "attack"
+GLYPH = "glyph"
+LIFETIME = "lifetime"
+TYPE = "type"
+MONSTER = "monster"
+ITEM = "item"
+PROJECTILE = "projectile"
+
+COMPONENT_COLUMNS = {
+    POSITION: (("x", "h"), ("y", "h")),
+    HEALTH: (("health", "l"),),
+    ATTACK: (("attack", "h"),),
+    GLYPH: (("symbol", None), ("color", "h"), ("layer", "b")),  # color is a curses pair number
+    LIFETIME: (("lifetime", "h"),),
+    TYPE: (("type_id", "h"),),  # Index into the kind's type table (MONSTER_TYPES, ITEM_TYPES)
+    MONSTER: (),
+    ITEM: (),
+    PROJECTILE: (),
+}
+
+# Glyph layers: where two entities share a cell, the higher layer is drawn
+ITEM_LAYER = 1
+MONSTER_LAYER = 2
+PROJECTILE_LAYER = 3
+
+
+class Archetype:
+    def __init__(self, components):
+        """
+        The entities that have exactly these components, stored column by column.
+        Removing entities keeps the order of the others, so systems see entities in
+        the order they were spawned.
+        """
+        self.components = frozenset(components)
+        self.columns = {}
+        for component in sorted(self.components):
+            for name, typecode in COMPONENT_COLUMNS[component]:
+                self.columns[name] = [] if typecode is None else array(typecode)
+        self.entities = []
+        self.handles = []  # Object view of each row (see EntityHandle), or None
+        self.rows = {}     # Entity -> row
+
+    def __len__(self):
+        return len(self.entities)
+
+    def append(self, entity, values, handle=None):
+        self.rows[entity] = len(self.entities)
+        self.entities.append(entity)
+        self.handles.append(handle)
+        for name, column in self.columns.items():
+            column.append(values[name])
+
+    def remove(self, entities):
+        """
+        Removes the rows of the given entities in one pass over each column. Columns are
+        updated in place, so systems holding on to a column still see the live data.
+        :return: Number of rows removed.
+        """
+        rows = self.rows
+        doomed = sorted({rows.pop(entity) for entity in entities if entity in rows}, reverse=True)
+        if not doomed:
+            return 0
+        columns = [*self.columns.values(), self.entities, self.handles]
+        if len(doomed) * 8 < len(self.entities):
+            # A few rows: deleting them one by one (highest first) is a memmove each
+            for column in columns:
+                for row in doomed:
+                    del column[row]
+        else:
+            gone = set(doomed)
+            keep = [row for row in range(len(self.entities)) if row not in gone]
+            pick = itemgetter(*keep) if len(keep) > 1 else (lambda column: tuple(column[row] for row in keep))
+            for column in columns:
+                kept = pick(column)
+                column[:] = array(column.typecode, kept) if isinstance(column, array) else list(kept)
+        entities = self.entities
+        for row in range(doomed[-1], len(entities)):
+            rows[entities[row]] = row
+        return len(doomed)
+
+    def clear(self):
+        for column in self.columns.values():
+            del column[:]
+        self.entities.clear()
+        self.handles.clear()
+        self.rows.clear()
+
+
+class EntityStore:
+    def __init__(self):
+        """
+        The entities of one room, grouped into archetypes.
+        """
+        self.archetypes = {}  # frozenset of components -> Archetype
+        self.locations = {}   # Entity -> Archetype
+        self.queries = {}     # Components asked for -> matching archetypes
+        self.by_components = {}  # Components as passed to archetype() -> Archetype
+        self.next_entity = 0
+
+    def archetype(self, components):
+        archetype = self.by_components.get(components)
+        if archetype is None:
+            key = frozenset(components)
+            archetype = self.archetypes.get(key)
+            if archetype is None:
+                archetype = self.archetypes[key] = Archetype(key)
+                self.queries.clear()
+            self.by_components[components] = archetype
+        return archetype
+
+    def spawn(self, components, values, handle=None):
+        """
+        Adds an entity.
+        :param components: The entity's components.
+        :param values: Column name -> value for every column of those components.
+        :param handle: Optional EntityHandle bound to the new entity.
+        :return: The entity id.
+        """
+        archetype = self.archetype(components)
+        entity = self.next_entity
+        self.next_entity += 1
+        if handle is not None:
+            handle.archetype = archetype
+            handle.entity = entity
+        archetype.append(entity, values, handle)
+        self.locations[entity] = archetype
+        return entity
+
+    def despawn(self, entities):
+        """
+        Removes entities, grouped so each archetype is compacted once.
+        :return: Number of entities removed.
+        """
+        by_archetype = {}
+        for entity in entities:
+            archetype = self.locations.pop(entity, None)
+            if archetype is not None:
+                by_archetype.setdefault(archetype, []).append(entity)
+        return sum(archetype.remove(group) for archetype, group in by_archetype.items())
+
+    def despawn_all(self, *components):
+        """
+        Removes every entity that has the given components.
+        """
+        for archetype in self.query(*components):
+            for entity in archetype.entities:
+                del self.locations[entity]
+            archetype.clear()
+
+    def query(self, *components):
+        """
+        :return: The archetypes having all of the components, in the order they were created.
+        """
+        matches = self.queries.get(components)
+        if matches is None:
+            wanted = set(components)
+            matches = self.queries[components] = [archetype for archetype in self.archetypes.values()
+                                                  if wanted <= archetype.components]
+        return matches
+
+    def handles(self, *components):
+        """
+        :return: List of the handles of the entities having the components, in row order.
+        """
+        return [handle for archetype in self.query(*components) for handle in archetype.handles]
+
+    def count(self, *components):
+        return sum(len(archetype) for archetype in self.query(*components))
+
+    def state(self):
+        """
+        :return: A copy of every archetype's rows, for restore(). Handles are kept, not copied.
+        """
+        archetypes = {archetype: (list(archetype.entities), list(archetype.handles),
+                                  {name: column[:] for name, column in archetype.columns.items()})
+                      for archetype in self.archetypes.values()}
+        return archetypes, dict(self.locations), self.next_entity
+
+    def restore(self, state):
+        """
+        Puts the rows back as they were when state() was taken; handles of entities that
+        existed then work again.
+        """
+        archetypes, locations, self.next_entity = state
+        for archetype in self.archetypes.values():
+            saved = archetypes.get(archetype)
+            if saved is None:
+                archetype.clear()
+                continue
+            entities, handles, columns = saved
+            archetype.entities[:] = entities
+            archetype.handles[:] = handles
+            for name, column in columns.items():
+                archetype.columns[name][:] = column
+            archetype.rows = {entity: row for row, entity in enumerate(entities)}
+        self.locations = dict(locations)
+
+    def get(self, entity, column):
+        archetype = self.locations[entity]
+        return archetype.columns[column][archetype.rows[entity]]
+
+    def set(self, entity, column, value):
+        archetype = self.locations[entity]
+        archetype.columns[column][archetype.rows[entity]] = value
+
+    def __len__(self):
+        return len(self.locations)
+
+
+def entity_rows(store, components, columns):
+    """
+    :return: Tuple with a tuple of the given column values for each entity having the
+             components, in row order.
+    """
+    rows = []
+    for archetype in store.query(*components):
+        rows.extend(zip(*(archetype.columns[column] for column in columns)))
+    return tuple(rows)
+
+
+def column_property(column):
+    """
+    :return: A property reading and writing the handle's entity's value in column.
+    """
+    def get(handle):
+        archetype = handle.archetype
+        return archetype.columns[column][archetype.rows[handle.entity]]
+
+    def set(handle, value):
+        archetype = handle.archetype
+        archetype.columns[column][archetype.rows[handle.entity]] = value
+
+    return property(get, set)
+
+
+class EntityHandle:
+    """
+    Object view of one entity for code that works on a single entity at a time (weapons,
+    the player, logging). Systems that run over many entities use the columns instead.
+    Handles are bound by EntityStore.spawn() and stay the same object for the entity's life.
+    """
+    __slots__ = ("archetype", "entity")
+
+    @property
+    def alive(self):
+        return self.entity in self.archetype.rows
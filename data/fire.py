@@ -0,0 +1,168 @@
+import logging
+import random
+from bitgrid import geometry, grid_cells, iter_cells, symbol_mask
+from constants import TERRAIN_SYMBOLS
+from terrain import FLAMMABLE
+
+FLAME_SYMBOL = TERRAIN_SYMBOLS["fire_red"]  # Flames deal this symbol's TERRAIN_DAMAGE per turn
+DURATION_PLANES = 3         # Bits per cell for the turns a flame has left
+MAX_DURATION = (1 << DURATION_PLANES) - 1
+
+# Spread chances per turn for a cell next to at least one flame, as 1 / 2 ** halvings
+GRASS_SPREAD_HALVINGS = 5   # 1 in 32: grass fires creep but die out on their own
+TREE_SPREAD_HALVINGS = 2    # 1 in 4: tree clusters go up
+GRASS_BURN_TURNS = 2        # Turns a cell set alight by spreading fire burns for
+TREE_BURN_TURNS = 6
+
+
+class FireField:
+    def __init__(self, width, height):
+        """
+        The flames in one room as a cellular automaton over bitboards. The turns each
+        flame has left are stored bit-sliced: planes[i] holds bit i of every cell's
+        counter, so a turn updates all cells with a few integer operations.
+        Cells that burn out on fuel are scorched and cannot burn again.
+        """
+        self.width = width
+        self.height = height
+        self.cells = geometry(width, height)
+        self.planes = [0] * DURATION_PLANES
+        self.scorched = 0
+        self.lit = 0  # Cells with a flame, kept in step with the planes
+
+    def burning(self):
+        """
+        :return: Mask of the cells with a flame, worked out from the planes.
+        """
+        mask = 0
+        for plane in self.planes:
+            mask |= plane
+        return mask
+
+    def remaining_at(self, index):
+        return sum(((plane >> index) & 1) << bit for bit, plane in enumerate(self.planes))
+
+    def ignite(self, x, y, duration):
+        """
+        Lights (x, y) for duration turns, or keeps the longer of two flames on the same cell.
+        """
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            return
+        index = y * self.width + x
+        bit = 1 << index
+        planes = self.planes
+        if self.lit & bit:
+            duration = max(duration, self.remaining_at(index))
+            for plane_number in range(DURATION_PLANES):
+                planes[plane_number] &= ~bit
+        duration = min(duration, MAX_DURATION)
+        for plane_number in range(DURATION_PLANES):
+            if (duration >> plane_number) & 1:
+                planes[plane_number] |= bit
+        self.lit |= bit
+
+    def ignite_area(self, x0, y0, x1, y1, duration):
+        """
+        Lights every cell from (x0, y0) to (x1, y1) at once; longer flames already there are kept.
+        """
+        area = self.cells.rectangle(x0, y0, x1, y1)
+        duration = min(duration, MAX_DURATION)
+        for index in iter_cells(area & self.lit):
+            if self.remaining_at(index) > duration:
+                area &= ~(1 << index)
+        planes = self.planes
+        for plane_number in range(DURATION_PLANES):
+            if (duration >> plane_number) & 1:
+                planes[plane_number] |= area
+            else:
+                planes[plane_number] &= ~area
+        self.lit |= area
+
+    def tick(self, terrain, rng=random):
+        """
+        Advances the fire one turn: every flame loses a turn, flames next to fuel may
+        spread to it, and fuel that burned out is scorched on the grid.
+        :param terrain: The room's TerrainMap; scorched cells showing grass or a tree are redrawn.
+        :return: Number of flames that went out.
+        """
+        burning = self.lit
+        if not burning:
+            return 0
+        cells = self.cells
+        fuel = terrain.mask(FLAMMABLE) & ~self.scorched
+
+        # Count every flame down by one: subtract with borrow across the planes
+        planes = self.planes
+        borrow = burning
+        for plane_number, plane in enumerate(planes):
+            planes[plane_number] = plane ^ borrow
+            borrow &= ~plane
+        still_burning = self.burning()
+        burned_out = burning & ~still_burning
+
+        # Spread from this turn's flames to unlit fuel next to them
+        exposed = cells.neighbours(burning) & fuel & ~burning
+        if exposed:
+            trees = symbol_mask(grid_cells(terrain.grid), TERRAIN_SYMBOLS["tree"]) & fuel
+            lit_trees = exposed & trees & cells.random_mask(rng, TREE_SPREAD_HALVINGS)
+            lit_grass = exposed & ~trees & cells.random_mask(rng, GRASS_SPREAD_HALVINGS)
+            for duration, lit in ((TREE_BURN_TURNS, lit_trees), (GRASS_BURN_TURNS, lit_grass)):
+                for plane_number in range(DURATION_PLANES):
+                    if (duration >> plane_number) & 1:
+                        planes[plane_number] |= lit
+        self.lit = self.burning()
+
+        scorched = burned_out & fuel
+        if scorched:
+            self.scorched |= scorched
+            width = self.width
+            grass, tree, ash = TERRAIN_SYMBOLS["grass"], TERRAIN_SYMBOLS["tree"], TERRAIN_SYMBOLS["scorched"]
+            grid = terrain.grid
+            for index in iter_cells(scorched):
+                x, y = index % width, index // width
+                if grid[y][x] in (grass, tree):
+                    terrain.set(x, y, ash)
+        if burned_out and logging.root.isEnabledFor(logging.DEBUG):
+            logging.debug(f"{burned_out.bit_count()} flame(s) went out, {still_burning.bit_count()} burning.")
+        return burned_out.bit_count()
+
+    def is_burning(self, x, y):
+        return bool((self.lit >> (y * self.width + x)) & 1)
+
+    def is_scorched(self, x, y):
+        return bool((self.scorched >> (y * self.width + x)) & 1)
+
+    def count(self):
+        return self.lit.bit_count()
+
+    def positions(self):
+        """
+        :return: Set of (x, y) cells that are burning.
+        """
+        width = self.width
+        return {(index % width, index // width) for index in iter_cells(self.lit)}
+
+    def flames(self):
+        """
+        :return: List of {'position': (x, y), 'remaining_turns': n} dicts, lowest cell first.
+        """
+        width = self.width
+        return [
+            {"position": (index % width, index // width), "remaining_turns": self.remaining_at(index)}
+            for index in iter_cells(self.lit)
+        ]
+
+    def clear(self):
+        self.planes = [0] * DURATION_PLANES
+        self.lit = 0
+
+    def state(self):
+        """
+        :return: An immutable copy of the fire (the planes and the scorched cells).
+        """
+        return tuple(self.planes) + (self.scorched,)
+
+    def restore(self, state):
+        self.planes = list(state[:DURATION_PLANES])
+        self.scorched = state[DURATION_PLANES]
+        self.lit = self.burning()
@@ -0,0 +1,214 @@
+import curses
+import logging
+from constants import COLOR_TABLE, PAIR_COLORS
+from headless import DEFAULT_SCREEN_HEIGHT, DEFAULT_SCREEN_WIDTH
+
+BLANK = " "
+
+# Color pair number -> (foreground, background) for ANSI output
+PAIR_NUMBERS = {COLOR_TABLE[name]: colors for name, colors in PAIR_COLORS.items()}
+
+ANSI_RESET = "\x1b[0m"
+ANSI_CLEAR = "\x1b[0m\x1b[2J\x1b[H\x1b[?25l"  # Reset attributes, clear, home, hide cursor
+ANSI_RESTORE = "\x1b[0m\x1b[?25h\r\n"       # Written by clients when they exit
+
+
+class FrameBuffer:
+    def __init__(self, height=DEFAULT_SCREEN_HEIGHT, width=DEFAULT_SCREEN_WIDTH):
+        """
+        A copy of what is on the screen: one character and one curses attribute per cell,
+        stored row-major in two flat lists.
+        """
+        self.height = height
+        self.width = width
+        self.chars = [BLANK] * (height * width)
+        self.attrs = [0] * (height * width)
+        self.frame = 0   # Number of frames published so far
+        self.dirty = False
+
+    def clear(self):
+        self.chars[:] = [BLANK] * (self.height * self.width)
+        self.attrs[:] = [0] * (self.height * self.width)
+        self.dirty = True
+
+    def write(self, y, x, text, attr):
+        """
+        Stores text at (y, x). Like curses, text running past the end of a row wraps onto the next.
+        """
+        if not (0 <= y < self.height and 0 <= x < self.width):
+            return
+        index = y * self.width + x
+        end = min(index + len(text), len(self.chars))
+        if index >= end:
+            return
+        count = end - index
+        if count == 1:
+            self.chars[index] = text[0]
+            self.attrs[index] = attr
+        else:
+            self.chars[index:end] = text[:count]
+            self.attrs[index:end] = [attr] * count
+        self.dirty = True
+
+    def rows(self):
+        width = self.width
+        return ["".join(self.chars[start:start + width]) for start in range(0, len(self.chars), width)]
+
+
+class MirrorScreen:
+    """
+    Wraps the curses window and keeps a FrameBuffer in step with everything drawn on it.
+    A frame ends at refresh() or getch() (which refreshes the screen in curses) if anything
+    was drawn; listeners are then called with the buffer. Weapon animations refresh after
+    each step, so their frames are included.
+    """
+
+    def __init__(self, stdscr, framebuffer=None):
+        self._stdscr = stdscr
+        height, width = stdscr.getmaxyx()
+        self.framebuffer = framebuffer or FrameBuffer(height, width)
+        self.listeners = []
+        # The buffer's lists are only ever updated in place, so they can be bound once
+        self._chars = self.framebuffer.chars
+        self._attrs = self.framebuffer.attrs
+        self._height = self.framebuffer.height
+        self._width = self.framebuffer.width
+
+    def add_listener(self, listener):
+        """
+        :param listener: Callable taking the FrameBuffer, called on the game thread after each frame.
+        """
+        self.listeners.append(listener)
+
+    def remove_listener(self, listener):
+        if listener in self.listeners:
+            self.listeners.remove(listener)
+
+    # Cells are mirrored before the call: curses draws the bottom-right cell but still reports an error
+    def addstr(self, y, x=None, text=None, attr=0):
+        if text is None:
+            # addstr(str[, attr]) writes at the cursor, which is not tracked
+            return self._stdscr.addstr(y) if x is None else self._stdscr.addstr(y, x)
+        if len(text) == 1 and 0 <= y < self._height and 0 <= x < self._width:
+            # Most writes are single cells from render_game_area
+            index = y * self._width + x
+            self._chars[index] = text
+            self._attrs[index] = attr
+            self.framebuffer.dirty = True
+        else:
+            self.framebuffer.write(y, x, text, attr)
+        return self._stdscr.addstr(y, x, text, attr)
+
+    def addch(self, y, x=None, ch=None, attr=0):
+        if ch is None:
+            return self._stdscr.addch(y) if x is None else self._stdscr.addch(y, x)
+        self.framebuffer.write(y, x, ch if isinstance(ch, str) else chr(ch & 0xff), attr)
+        return self._stdscr.addch(y, x, ch, attr)
+
+    def clear(self):
+        self.framebuffer.clear()
+        return self._stdscr.clear()
+
+    def erase(self):
+        self.framebuffer.clear()
+        return self._stdscr.erase()
+
+    def refresh(self):
+        result = self._stdscr.refresh()
+        self.end_frame()
+        return result
+
+    def getch(self):
+        self.end_frame()
+        return self._stdscr.getch()
+
+    def end_frame(self):
+        framebuffer = self.framebuffer
+        if not framebuffer.dirty:
+            return
+        framebuffer.dirty = False
+        framebuffer.frame += 1
+        for listener in self.listeners[:]:
+            try:
+                listener(framebuffer)
+            except Exception:
+                logging.exception("Frame listener failed; removing it.")
+                self.listeners.remove(listener)
+
+    def __getattr__(self, name):
+        return getattr(self._stdscr, name)
+
+
+class AnsiEncoder:
+    def __init__(self, width):
+        """
+        Turns frame buffer contents into ANSI terminal output: full redraws (keyframes)
+        and deltas against a previous copy of the buffer.
+        """
+        self.width = width
+        self.sgr_cache = {}
+
+    def sgr(self, attr):
+        """
+        :return: The escape sequence selecting the colors and attributes of a curses attr.
+        """
+        sequence = self.sgr_cache.get(attr)
+        if sequence is None:
+            codes = ["0"]
+            if attr & curses.A_BOLD:
+                codes.append("1")
+            if attr & curses.A_REVERSE:
+                codes.append("7")
+            colors = PAIR_NUMBERS.get((attr >> 8) & 0xff)
+            if colors:
+                codes.append(str(30 + colors[0]))
+                codes.append(str(40 + colors[1]))
+            sequence = f"\x1b[{';'.join(codes)}m"
+            self.sgr_cache[attr] = sequence
+        return sequence
+
+    def keyframe(self, chars, attrs):
+        """
+        :return: ANSI text clearing the terminal and drawing every cell.
+        """
+        width = self.width
+        parts = [ANSI_CLEAR]
+        current_attr = None
+        for start in range(0, len(chars), width):
+            parts.append(f"\x1b[{start // width + 1};1H")
+            for index in range(start, start + width):
+                attr = attrs[index]
+                if attr != current_attr:
+                    parts.append(self.sgr(attr))
+                    current_attr = attr
+                parts.append(chars[index])
+        parts.append(ANSI_RESET)
+        return "".join(parts)
+
+    def delta(self, previous_chars, previous_attrs, chars, attrs):
+        """
+        :return: ANSI text updating only the cells that differ from the previous copy
+                 ("" if nothing changed).
+        """
+        width = self.width
+        parts = []
+        current_attr = None
+        cursor = -1  # Index the terminal cursor is at, -1 if unknown
+        for start in range(0, len(chars), width):
+            end = start + width
+            if chars[start:end] == previous_chars[start:end] and attrs[start:end] == previous_attrs[start:end]:
+                continue
+            for index in range(start, end):
+                char, attr = chars[index], attrs[index]
+                if char == previous_chars[index] and attr == previous_attrs[index]:
+                    continue
+                if index != cursor:
+                    parts.append(f"\x1b[{index // width + 1};{index % width + 1}H")
+                if attr != current_attr:
+                    parts.append(self.sgr(attr))
+                    current_attr = attr
+                parts.append(char)
+                cursor = index + 1 if (index + 1) % width else -1
+        if parts:
+            parts.append(ANSI_RESET)
+        return "".join(parts)
@@ -1,18 +1,47 @@
 import curses
 import logging
-from constants import COLOR_TABLE, WEAPON_TABLE, ITEM_TABLE, TERRAIN_SYMBOLS, initialize_colors
+import random
+import time
+from array import array
+from logging_setup import setup_logging, dump_recent_logs
+from constants import COLOR_TABLE, WEAPON_TABLE, ITEM_TABLE, TERRAIN_SYMBOLS, BLOCKED_TIME, initialize_colors, validate_color_table, wait_for_key, positive_int
 from room import RoomManager
 from player import Player
 from renderer import Renderer
+from messages import show_message_history
 from monster import MonsterManager  # Handles monster behaviors
+from entities import MONSTER
 from look import look_mode, render_look_info  # Handles look mode
-
-# Configure logging
-logging.basicConfig(
-    filename='game.log',
-    level=logging.INFO,
-    format='%(asctime)s:%(levelname)s:%(message)s'
-)
+from journal import JournalWriter, JournalScreen, MAX_SEED, session_seed, state_digest
+from perf import monitor, span, CountingScreen, render_perf_hud
+from realtime import run_realtime, positive_rate, DEFAULT_TICK_RATE, DEFAULT_FRAME_RATE
+from pathfinding import PathCache, find_nearest, monster_positions, player_can_enter
+from rewind import RewindBuffer, DEFAULT_REWIND_TURNS
+
+# Shifted number keys run in a direction (shift-1 is '!', shift-8 is '*', ...)
+RUN_KEYS = {
+    ord('&'): (-1, -1),
+    ord('*'): (0, -1),
+    ord('('): (1, -1),
+    ord('$'): (-1, 0),
+    ord('^'): (1, 0),
+    ord('!'): (-1, 1),
+    ord('@'): (0, 1),
+    ord('#'): (1, 1),
+}
+DIRECTION_KEYS = {
+    (-1, -1): ord('7'),
+    (0, -1): ord('8'),
+    (1, -1): ord('9'),
+    (-1, 0): ord('4'),
+    (1, 0): ord('6'),
+    (-1, 1): ord('1'),
+    (0, 1): ord('2'),
+    (1, 1): ord('3'),
+}
+RUN_ALERT_RADIUS = 8  # Running stops when a monster is this close (Chebyshev distance)
+TRAVEL_MAX_STEPS = 300  # Upper bound on turns taken by one travel or explore command
+SLOW_TURN_SECONDS = 0.1  # Turns taking longer are logged as warnings (see logreport.py)
 
 def exit_game():
     """
@@ -40,7 +69,7 @@ def get_fire_direction(stdscr):
         logging.warning("Failed to render direction prompt.")
 
     stdscr.refresh()
-    key = stdscr.getch()
+    key = wait_for_key(stdscr)
     direction = direction_mapping.get(key)
     if direction:
         logging.info(f"Direction selected: {direction}")
@@ -48,6 +77,28 @@ def get_fire_direction(stdscr):
         logging.warning("Invalid direction selected.")
     return direction
 
+def get_repeat_count(stdscr):
+    """
+    Reads a repeat count typed as digits and finished with Enter.
+    :return: The count, or None if cancelled or empty.
+    """
+    digits = ""
+    while True:
+        try:
+            stdscr.addstr(0, 0, f"Repeat count: {digits}_ (Enter to confirm, any other key cancels)")
+        except curses.error:
+            logging.warning("Failed to render repeat count prompt.")
+        stdscr.refresh()
+        key = wait_for_key(stdscr)
+        if ord('0') <= key <= ord('9') and len(digits) < 3:
+            digits += chr(key)
+        elif key in (curses.KEY_BACKSPACE, 127, 8):
+            digits = digits[:-1]
+        elif key in (curses.KEY_ENTER, 10, 13):
+            return int(digits) if digits and int(digits) > 0 else None
+        else:
+            return None
+
 def handle_user_input(key, player, room_manager, current_room, stdscr, grid_width, fire_mode_active):
     message, kills = None, 0
 
@@ -67,7 +118,8 @@ def handle_user_input(key, player, room_manager, current_room, stdscr, grid_widt
         direction = (dx, dy)
         if fire_mode_active:
             # Fire weapon in the given direction
-            result = player.fire_weapon(direction, current_room, stdscr)
+            with span("weapons"):
+                result = player.fire_weapon(direction, current_room, stdscr)
             message, kills = result
             logging.info(f"Fired weapon towards {direction}")
         else:
@@ -100,7 +152,8 @@ def handle_user_input(key, player, room_manager, current_room, stdscr, grid_widt
         if grenade_type:
             direction = get_fire_direction(stdscr)
             if direction:
-                result = player.use_grenade(grenade_type, current_room, direction, stdscr)
+                with span("weapons"):
+                    result = player.use_grenade(grenade_type, current_room, direction, stdscr)
                 if len(result) == 3:
                     message, kills, new_room = result
                     current_room = new_room
@@ -130,99 +183,691 @@ def handle_user_input(key, player, room_manager, current_room, stdscr, grid_widt
 
     return (message, kills, current_room)
 
-def setup_window(stdscr):
-    try:
-        initialize_colors()
-    except Exception as e:
-        logging.error(f"Color initialization failed: {e}")
-        print(str(e))
-        return
-
-    curses.curs_set(0)
-
-    grid_width, grid_height = 80, 24
-    room_manager = RoomManager(grid_width, grid_height)
-    current_room = room_manager.get_room(0, 0, 0)
-    player = Player(x=grid_width // 2, y=grid_height // 2, room_manager=room_manager)
-    renderer = Renderer(grid_width, grid_height)
-    monster_manager = MonsterManager(room=current_room, player=player, stdscr=stdscr)
-
-    look_mode_active = False
-    fire_mode_active = False
+class GameSession:
+    def __init__(self, stdscr, grid_width=80, grid_height=24, seed=None, journal=None):
+        """
+        Holds the state of one play session and advances it a turn at a time.
+        Used by setup_window for interactive play and by replay.py for headless replays.
+        :param stdscr: curses window (or a HeadlessScreen).
+        :param grid_width: Room width.
+        :param grid_height: Room height.
+        :param seed: Session seed; a random one is chosen if omitted.
+        :param journal: Optional JournalWriter recording turns, keys and checkpoints.
+        """
+        self.seed = seed if seed is not None else random.getrandbits(32)
+        self.turn_rng = random.Random(self.seed)  # Produces the per-turn seeds
+        random.seed(self.seed)
+
+        self.journal = journal
+        if journal:
+            stdscr = JournalScreen(stdscr, journal)
+        self.base_stdscr = stdscr
+        self.stdscr = stdscr
+        self.grid_width = grid_width
+        self.grid_height = grid_height
+        self.turn = 0
+
+        self.room_manager = RoomManager(grid_width, grid_height)
+        self.current_room = self.room_manager.get_room(0, 0, 0)
+        self.player = Player(x=grid_width // 2, y=grid_height // 2, room_manager=self.room_manager)
+        self.renderer = Renderer(grid_width, grid_height)
+        self.monster_manager = MonsterManager(room=self.current_room, player=self.player, stdscr=stdscr)
+
+        self.look_mode_active = False
+        self.fire_mode_active = False
+        self.perf_hud_active = False
+        self.path_cache = PathCache()
+        self.rewind = None  # RewindBuffer in debug sessions
+        self.horde = None  # HordeSpawner in horde mode
+        self.stats_path = None  # Statistics database shown by 'H'
+        self.floors_reached = 0
+        self.turn_times = array("d")  # Seconds of work per turn, waiting for keys excluded
+        self.turn_started = None
+        self.turn_blocked = 0.0  # BLOCKED_TIME when the turn began
+        self.turn_updates = 0    # World updates this turn; a run or travel makes one per step
+        self.repeated_message = None  # Message collapsed into the newest message line
+        self.message_repeats = 0      # Times it repeated, logged once another message replaces it
+
+    def enable_rewind(self, turns):
+        """
+        Keeps the last `turns` turns of state so 'b' can step back (debug sessions only).
+        """
+        self.rewind = RewindBuffer(turns)
+        self.rewind.capture(self)
+        logging.info(f"Rewind enabled for the last {turns} turn(s).")
+
+    def show_stats(self):
+        # The view always waits for a key, with or without a database, so journals replay the same keys
+        from stats import show_summary  # sqlite3 is only loaded when needed
+        show_summary(self.stdscr, self.stats_path, self.stats_source)
+
+    @property
+    def stats_source(self):
+        """
+        Source this session's runs are recorded and summarised under.
+        """
+        return "horde" if self.horde else "game"
+
+    def rewind_turn(self):
+        if self.journal:
+            self.renderer.display_message("Rewind is off while a journal is being recorded.")
+            return
+        turn = self.rewind.rewind(self)
+        if turn is None:
+            self.renderer.display_message("Nothing left to rewind.")
+            return
+        stats = self.rewind.stats()
+        self.renderer.display_message(
+            f"Rewound to turn {turn} ({stats['kept']} kept, {stats['capture_us']:.0f}us, {stats['bytes_per_turn'] / 1024:.1f}KB/turn)."
+        )
 
-    while True:
+    def toggle_perf_hud(self):
+        """
+        Shows or hides the performance HUD. While it is shown, timing spans are
+        recorded and screen writes are counted.
+        """
+        self.perf_hud_active = not self.perf_hud_active
+        monitor.enable(self.perf_hud_active)
+        self.stdscr = CountingScreen(self.base_stdscr) if self.perf_hud_active else self.base_stdscr
+        self.monster_manager.stdscr = self.stdscr
+        logging.info(f"Performance HUD {'shown' if self.perf_hud_active else 'hidden'}.")
+
+    def begin_turn(self, turn_seed=None):
+        """
+        Reseeds the game's random generator for the next turn so a session can be
+        reproduced from its journal.
+        :param turn_seed: Seed to use (replays pass the recorded one).
+        """
+        self.turn += 1
+        monitor.begin_frame()
+        if turn_seed is None:
+            turn_seed = self.turn_rng.getrandbits(32)
+        random.seed(turn_seed)
+        self.turn_started = time.perf_counter()
+        self.turn_blocked = BLOCKED_TIME["seconds"]
+        self.turn_updates = 0
+        if self.journal:
+            self.journal.record_turn(self.turn, turn_seed)
+            if self.journal.wants_checkpoint(self.turn):
+                self.journal.record_checkpoint(self.turn, state_digest(self))
+
+    def render(self):
+        stdscr = self.stdscr
         stdscr.clear()
 
         # Render game area
-        renderer.render_game_area(stdscr, player, current_room)
-        unique_monster_types = {monster.type for monster in current_room.monsters}
+        with span("render"):
+            self.renderer.render_game_area(stdscr, self.player, self.current_room)
+        unique_monster_types = {monster.type for monster in self.current_room.monsters}
 
         # Render sidebar with messages
-        renderer.sidebar.render(
-            stdscr,
-            player,
-            player.kill_stats,
-            unique_monster_types,
-            renderer.messages  # Pass messages to the sidebar
-        )
+        with span("sidebar"):
+            self.renderer.sidebar.render(
+                stdscr,
+                self.player,
+                self.player.kill_stats,
+                unique_monster_types,
+                self.renderer.messages  # Pass messages to the sidebar
+            )
+
+        if self.perf_hud_active:
+            render_perf_hud(stdscr)
 
+    def update_world(self, refresh=True):
+        """
+        Advances flames and monsters.
+        :param refresh: Push the frame drawn by render() to the terminal first.
+        :return: False if the player died this turn.
+        """
+        self.turn_updates += 1
         # Update lingering flames
-        current_room.update_lingering_flames()
-        stdscr.refresh()
+        with span("flames"):
+            self.current_room.update_lingering_flames()
+        if refresh:
+            self.stdscr.refresh()
 
         # Handle monsters
-        monster_manager.handle_monsters()
-        if player.health <= 0:
-            renderer.display_game_over(stdscr)
-            curses.napms(3000)
-            return
-
-        # Get user input
-        key = stdscr.getch()
+        with span("monsters"):
+            self.monster_manager.handle_monsters()
+        if self.horde:
+            with span("horde"):
+                self.horde.update(self.current_room, self.player)
+        return self.player.health > 0
+
+    def read_key(self):
+        """
+        Waits for the turn's key press; the wait does not count towards the turn time.
+        """
+        return wait_for_key(self.stdscr)
+
+    def end_turn(self):
+        if self.turn_started is not None:
+            # Waits for keys in prompts and animation delays are left out (see wait_for_key)
+            blocked = BLOCKED_TIME["seconds"] - self.turn_blocked
+            elapsed = time.perf_counter() - self.turn_started - blocked
+            self.turn_times.append(elapsed)
+            self.turn_started = None
+            updates = max(1, self.turn_updates)
+            if elapsed > SLOW_TURN_SECONDS * updates:
+                over = f" over {updates} world updates" if updates > 1 else ""
+                logging.warning(f"Slow turn {self.turn}: {elapsed * 1000:.1f} ms{over}.")
+            else:
+                logging.debug(f"Turn {self.turn} took {elapsed * 1000:.2f} ms.")
+        if self.player.floor > self.floors_reached:
+            self.floors_reached = self.player.floor
+        if self.rewind:
+            with span("rewind"):
+                self.rewind.capture(self)
+        if monitor.enabled:
+            monitor.gauge("monsters", self.current_room.entities.count(MONSTER))
+            monitor.gauge("flames", self.current_room.fire.count())
+            monitor.end_frame()
+
+    def handle_key(self, key):
+        """
+        Applies one key press.
+        :return: False if the player quit.
+        """
+        stdscr = self.stdscr
+        renderer = self.renderer
 
         if key == ord('q'):
             logging.info("Player quit.")
-            return
+            return False
 
         # Enter look mode
-        if key == ord('l') and not look_mode_active:
+        if key == ord('l') and not self.look_mode_active:
             logging.info("Look mode activated.")
-            look_mode_active = True
-            look_mode(stdscr, current_room, renderer, player)
-            look_mode_active = False
+            self.look_mode_active = True
+            target = look_mode(stdscr, self.current_room, renderer, self.player)
+            self.look_mode_active = False
             logging.info("Look mode deactivated.")
-            continue
+            if target:
+                self.travel_to(target)
+            return True
+
+        # Travel to the staircase, or explore automatically
+        if key == ord('t'):
+            if self.current_room.staircase_position:
+                self.travel_to(self.current_room.staircase_position)
+            else:
+                renderer.display_message("There is no staircase in this room.")
+            return True
+        if key == ord('x'):
+            self.auto_explore()
+            return True
+
+        # Step back a turn (debug sessions)
+        if key == ord('b') and self.rewind is not None:
+            self.rewind_turn()
+            return True
+
+        # Statistics of earlier runs
+        if key == ord('H'):
+            self.show_stats()
+            return True
+
+        # Message history
+        if key == ord('m'):
+            show_message_history(stdscr, renderer.messages)
+            return True
+
+        # Toggle the performance HUD
+        if key == ord('p'):
+            self.toggle_perf_hud()
+            return True
+
+        # Run in a direction, or repeat a move a given number of times
+        if key in RUN_KEYS and not self.fire_mode_active:
+            self.run(*RUN_KEYS[key])
+            return True
+        if key == ord('r') and not self.fire_mode_active:
+            count = get_repeat_count(stdscr)
+            direction = get_fire_direction(stdscr) if count else None
+            if direction:
+                self.run(*direction, max_steps=count)
+            else:
+                renderer.display_message("Repeat cancelled.")
+            return True
 
         # Toggle fire mode
         if key == ord('z'):
-            fire_mode_active = not fire_mode_active
-            message = "Fire mode activated!" if fire_mode_active else "Fire mode deactivated!"
+            self.fire_mode_active = not self.fire_mode_active
+            message = "Fire mode activated!" if self.fire_mode_active else "Fire mode deactivated!"
             renderer.display_message(message)
-            logging.info(f"Fire mode {'activated' if fire_mode_active else 'deactivated'}.")
-            continue
+            logging.info(f"Fire mode {'activated' if self.fire_mode_active else 'deactivated'}.")
+            return True
 
         # Handle other inputs
-        if not look_mode_active and key != ord('l'):
+        if not self.look_mode_active and key != ord('l'):
+            message, kills, possibly_new_room = handle_user_input(
+                key, self.player, self.room_manager, self.current_room, stdscr, self.grid_width, self.fire_mode_active
+            )
+            self.apply_action_result(message, kills, possibly_new_room)
+        return True
+
+    def apply_action_result(self, message, kills, possibly_new_room, show_message=True):
+        if possibly_new_room != self.current_room:
+            self.current_room = possibly_new_room
+            self.monster_manager.update_room(self.current_room)
+            self.renderer.display_message(f"Entered new room at ({self.current_room.x}, {self.current_room.y}).")
+            logging.info(f"Room transitioned to ({self.current_room.x}, {self.current_room.y}).")
+
+        if message and show_message:
+            if self.renderer.display_message(message):
+                self.log_message_repeats()
+                logging.info(f"Message displayed: {message}")
+            else:
+                logging.debug(f"Message repeated: {message}")
+                if message != self.repeated_message:
+                    self.log_message_repeats()
+                    self.repeated_message = message
+                self.message_repeats += 1
+
+        if kills > 0:
+            # fire_weapon and use_grenade have already credited the kills in kill_stats
+            logging.info(f"Kills updated: {kills} kill(s).")
+
+    def log_message_repeats(self):
+        """
+        Logs at INFO how often the collapsed message repeated, so logs above DEBUG level
+        still count every repeat (logreport.py reads this line).
+        """
+        if self.message_repeats:
+            logging.info(f"Message repeated {self.message_repeats} times: {self.repeated_message}")
+        self.repeated_message = None
+        self.message_repeats = 0
+
+    def run_should_stop(self, dx, dy, start_health):
+        """
+        Checks the conditions that interrupt a run after a step.
+        :return: Reason string, or None to keep running.
+        """
+        player = self.player
+        room = self.current_room
+        if player.health < start_health:
+            return "You are hurt!"
+        if not (0 <= player.x + dx < room.grid_width and 0 <= player.y + dy < room.grid_height):
+            return "You reach the edge of the room."
+        for monster in room.monsters:
+            if max(abs(monster.x - player.x), abs(monster.y - player.y)) <= RUN_ALERT_RADIUS:
+                return f"You see a {monster.name}."
+        for item in room.items.get_items():
+            if abs(item.x - player.x) <= 1 and abs(item.y - player.y) <= 1:
+                return f"You see a {item.name}."
+        return None
+
+    def run(self, dx, dy, max_steps=None):
+        """
+        Keeps moving in one direction until something interesting happens: a monster
+        comes close, an item is next to the player, the way is blocked or the room
+        edge is reached. Intermediate turns (monsters and flames included) are
+        simulated without drawing; only the final state is rendered.
+        :param dx, dy: Direction of travel.
+        :param max_steps: Optional step limit (the repeat count).
+        :return: Number of steps taken.
+        """
+        key = DIRECTION_KEYS[(dx, dy)]
+        limit = max_steps or max(self.grid_width, self.grid_height)
+        start_health = self.player.health
+        steps = 0
+        last_message = None
+        reason = None
+
+        while steps < limit:
+            if steps > 0:
+                # The turn between two steps, minus the drawing
+                if not self.update_world(refresh=False):
+                    break
+                reason = self.run_should_stop(dx, dy, start_health)
+                if reason:
+                    break
+
+            old_position = (self.player.x, self.player.y, self.current_room)
             message, kills, possibly_new_room = handle_user_input(
-                key, player, room_manager, current_room, stdscr, grid_width, fire_mode_active
+                key, self.player, self.room_manager, self.current_room, self.stdscr, self.grid_width, False
             )
+            self.apply_action_result(message, kills, possibly_new_room, show_message=False)
+            last_message = message
+            steps += 1
+
+            if (self.player.x, self.player.y, self.current_room) == old_position:
+                reason = "Your way is blocked."
+                break
+            if possibly_new_room is not old_position[2] or "Picked up" in (message or ""):
+                break
+            reason = self.run_should_stop(dx, dy, start_health)
+            if reason:
+                break
+
+        if last_message:
+            self.renderer.display_message(last_message)
+        self.renderer.display_message(f"Ran {steps} step(s). {reason}" if reason else f"Ran {steps} step(s).")
+        logging.info(f"Run towards ({dx}, {dy}) stopped after {steps} step(s): {reason}")
+        return steps
+
+
+    def hostile_nearby(self):
+        player = self.player
+        for monster in self.current_room.monsters:
+            if max(abs(monster.x - player.x), abs(monster.y - player.y)) <= RUN_ALERT_RADIUS:
+                return monster
+        return None
+
+    def follow_plan(self, plan, max_steps=TRAVEL_MAX_STEPS):
+        """
+        Walks the player one step per turn along the paths produced by plan(),
+        with flames and monsters acting between steps (without drawing).
+        Stops when a hostile comes close, the player is hurt, or the plan is done.
+        :param plan: Callable returning (path, exit_step, reason). path is the list of
+                     cells still to walk; exit_step is a (dx, dy) step off the room
+                     edge once the path is done; path None means stop with reason.
+        :return: Number of steps taken.
+        """
+        start_health = self.player.health
+        monster = self.hostile_nearby()
+        if monster:
+            self.renderer.display_message(f"Not with a {monster.name} nearby!")
+            return 0
+
+        steps = 0
+        reason = None
+        while steps < max_steps:
+            if steps > 0:
+                if not self.update_world(refresh=False):
+                    break
+                if self.player.health < start_health:
+                    reason = "You are hurt!"
+                    break
+                monster = self.hostile_nearby()
+                if monster:
+                    reason = f"You see a {monster.name}."
+                    break
+
+            path, exit_step, reason = plan()
+            if path is None:
+                break
+            if path:
+                dx, dy = path[0][0] - self.player.x, path[0][1] - self.player.y
+            elif exit_step:
+                dx, dy = exit_step
+            else:
+                reason = reason or "You have arrived."
+                break
 
-            if possibly_new_room != current_room:
-                current_room = possibly_new_room
-                monster_manager.update_room(current_room)
-                renderer.display_message(f"Entered new room at ({current_room.x}, {current_room.y}).")
-                logging.info(f"Room transitioned to ({current_room.x}, {current_room.y}).")
+            old_position = (self.player.x, self.player.y, self.current_room)
+            message, kills, possibly_new_room = handle_user_input(
+                DIRECTION_KEYS[(dx, dy)], self.player, self.room_manager, self.current_room,
+                self.stdscr, self.grid_width, False
+            )
+            self.apply_action_result(message, kills, possibly_new_room,
+                                     show_message="Picked up" in (message or ""))
+            steps += 1
+            if (self.player.x, self.player.y, self.current_room) == old_position:
+                self.path_cache.invalidate(self.current_room)
+                reason = "Your way is blocked."
+                break
+        else:
+            reason = "You stop to catch your breath."
+
+        self.renderer.display_message(f"Travelled {steps} step(s). {reason or ''}".strip())
+        logging.info(f"Travel stopped after {steps} step(s): {reason}")
+        return steps
+
+    def travel_to(self, target):
+        """
+        Travels to a cell of the current room along a cached shortest path.
+        """
+        room = self.current_room
+
+        def plan():
+            if self.current_room is not room:
+                return None, None, "You left the room."
+            start = (self.player.x, self.player.y)
+            if start == target:
+                return [], None, "You have arrived."
+            path = self.path_cache.get_path(room, start, target)
+            if path is None:
+                return None, None, "There is no way there."
+            return path, None, None
+
+        if not player_can_enter(room, *target):
+            self.renderer.display_message("You can't stand there.")
+            return 0
+        return self.follow_plan(plan)
+
+    def unexplored_exits(self):
+        """
+        Edge cells of the current room leading to rooms not generated yet,
+        grouped by the step that leaves the room.
+        :return: Dict of (dx, dy) -> set of edge cells.
+        """
+        room = self.current_room
+        manager = self.room_manager
+        width, height = room.grid_width, room.grid_height
+        sides = {
+            (-1, 0): [(0, y) for y in range(height)],
+            (1, 0): [(width - 1, y) for y in range(height)],
+            (0, -1): [(x, 0) for x in range(width)],
+            (0, 1): [(x, height - 1) for x in range(width)],
+        }
+        exits = {}
+        for (dx, dy), cells in sides.items():
+            room_x, room_y = room.x + dx, room.y + dy
+            if not (0 <= room_x < manager.floor_width and 0 <= room_y < manager.floor_height):
+                continue
+            if (room.floor, room_x, room_y) in manager.rooms:
+                continue
+            passable = {cell for cell in cells if player_can_enter(room, *cell)}
+            if passable:
+                exits[(dx, dy)] = passable
+        return exits
+
+    def auto_explore(self):
+        """
+        Picks up the nearest reachable items, then heads for the nearest exit into
+        a room that has not been visited yet.
+        """
+        state = {"room": None, "goal": None, "exit_step": None}
+
+        def plan():
+            room = self.current_room
+            start = (self.player.x, self.player.y)
+            occupied = monster_positions(room)
+
+            # Keep following the current goal while its cached path stays valid
+            goal = state["goal"]
+            if goal and state["room"] is room:
+                if start == goal:
+                    state["goal"] = None
+                    if state["exit_step"]:
+                        return [], state["exit_step"], None
+                else:
+                    path = self.path_cache.remaining(room, start, goal, occupied)
+                    if path:
+                        return path, None, None
+
+            items = {(item.x, item.y) for item in room.items.get_items()}
+            goal, path = find_nearest(room, start, items, occupied)
+            exit_step = None
+            if goal is None:
+                for step, cells in self.unexplored_exits().items():
+                    candidate, candidate_path = find_nearest(room, start, cells, occupied)
+                    if candidate is not None and (path is None or len(candidate_path) < len(path)):
+                        goal, path, exit_step = candidate, candidate_path, step
+            if goal is None:
+                return None, None, "Nothing left to explore nearby."
+
+            self.path_cache.store(room, goal, path)
+            if not path:
+                state["goal"] = None
+                return [], exit_step, None
+            state.update(room=room, goal=goal, exit_step=exit_step)
+            return path, None, None
+
+        return self.follow_plan(plan)
+
+def save_run_stats(session):
+    """
+    Queues the finished run for the statistics database. The write happens on the
+    store's background thread; close the returned store before exiting.
+    """
+    from stats import StatsStore, run_record  # sqlite3 is only loaded once a run ends
+    store = StatsStore(session.stats_path)
+    store.record(run_record(session, session.stats_source))
+    return store
+
+def setup_window(stdscr, seed=None, journal_path=None, realtime=False,
+                 tick_rate=DEFAULT_TICK_RATE, frame_rate=DEFAULT_FRAME_RATE, spectate=None, record_path=None,
+                 rewind_turns=None, stats_path=None, horde=False):
+    try:
+        initialize_colors()
+    except Exception as e:
+        logging.error(f"Color initialization failed: {e}")
+        print(str(e))
+        return
 
-            if message:
-                renderer.display_message(message)
-                logging.info(f"Message displayed: {message}")
+    curses.curs_set(0)
 
-            if kills > 0:
-                player.update_kill_stats(kills)
-                logging.info(f"Kills updated: {kills} kill(s).")
+    grid_width, grid_height = 80, 24
+    journal = None
+    if journal_path:
+        if seed is None:
+            seed = random.getrandbits(32)
+        journal = JournalWriter(journal_path, seed, grid_width, grid_height)
+
+    spectator_server = None
+    recorder = None
+    if spectate or record_path:
+        from framebuffer import MirrorScreen
+        stdscr = MirrorScreen(stdscr)
+    if spectate:
+        from spectate import SpectatorServer
+        spectator_server = SpectatorServer(spectate).start()
+        stdscr.add_listener(spectator_server.on_frame)
+    if record_path:
+        from recording import SessionRecorder
+        height, width = stdscr.getmaxyx()
+        recorder = SessionRecorder(record_path, width, height)
+        stdscr.add_listener(recorder.on_frame)
+
+    session = GameSession(stdscr, grid_width, grid_height, seed=seed, journal=journal)
+    if rewind_turns is not None:
+        session.enable_rewind(rewind_turns)
+    if horde:
+        from horde import HordeSpawner
+        session.horde = HordeSpawner()
+    session.stats_path = stats_path
+    stats_store = None
+    try:
+        if realtime:
+            run_realtime(session, tick_rate, frame_rate)
+            return
+
+        while True:
+            session.begin_turn()
+            session.render()
+            if not session.update_world():
+                if stats_path:
+                    stats_store = save_run_stats(session)  # Written while the game over screen shows
+                session.renderer.display_game_over(session.stdscr)
+                curses.napms(3000)
+                return
+
+            # Get user input
+            key = session.read_key()
+            with span("input"):
+                keep_playing = session.handle_key(key)
+            session.end_turn()
+            if not keep_playing:
+                return
+    finally:
+        session.log_message_repeats()
+        if journal:
+            journal.close()
+        if spectator_server:
+            spectator_server.stop()
+        if recorder:
+            recorder.close()
+        if stats_path and stats_store is None:
+            stats_store = save_run_stats(session)
+        if stats_store:
+            stats_store.close()
+
+def parse_args(argv=None):
+    import argparse  # Only needed when launched from the command line
+    parser = argparse.ArgumentParser(description="Zombierun")
+    parser.add_argument("--log-level", default="INFO",
+                        choices=["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"],
+                        help="Minimum level written to game.log (default: INFO).")
+    parser.add_argument("--log-file", default="game.log", help="Path of the rotating log file.")
+    parser.add_argument("--seed", type=session_seed, default=None,
+                        help=f"Session seed, 0 to {MAX_SEED} (random if omitted).")
+    parser.add_argument("--journal", metavar="PATH", default=None,
+                        help="Record a binary session journal for replay.py.")
+    parser.add_argument("--realtime", action="store_true",
+                        help="Monsters and flames advance on a clock instead of per key press.")
+    parser.add_argument("--tick-rate", type=positive_rate, default=DEFAULT_TICK_RATE,
+                        help=f"Simulation ticks per second in real-time mode (default: {DEFAULT_TICK_RATE}).")
+    parser.add_argument("--fps", type=positive_rate, default=DEFAULT_FRAME_RATE,
+                        help=f"Frame rate cap in real-time mode (default: {DEFAULT_FRAME_RATE}).")
+    parser.add_argument("--spectate", metavar="ADDRESS", default=None,
+                        help="Stream frames to spectators on a port, host:port or Unix socket path (watch with spectate.py).")
+    parser.add_argument("--record", metavar="PATH", default=None,
+                        help="Record the screen to a compressed session file (export with recording.py).")
+    parser.add_argument("--stats-db", metavar="PATH", default="stats.db",
+                        help="SQLite database collecting run statistics (default: stats.db; view with H or stats.py).")
+    parser.add_argument("--no-stats", action="store_true", help="Do not record this run's statistics.")
+    parser.add_argument("--debug", action="store_true",
+                        help="Debug session: keep recent turns in memory and step back with 'b'.")
+    parser.add_argument("--rewind-turns", type=positive_int, default=DEFAULT_REWIND_TURNS,
+                        help=f"Turns kept for rewinding with --debug (default: {DEFAULT_REWIND_TURNS}).")
+    parser.add_argument("--horde", action="store_true",
+                        help="Horde mode: ever larger waves of monsters pour into the current room.")
+    parser.add_argument("--ansi", action="store_true",
+                        help="Draw with ANSI sequences written directly to the terminal instead of curses (fewer bytes over slow links).")
+    parser.add_argument("--max-bandwidth", metavar="BYTES_PER_SEC", type=int, default=None,
+                        help="With --ansi, cap screen output; flame flicker and animation frames are dropped first.")
+    parser.add_argument("--profile", metavar="PREFIX", default=None,
+                        help="Profile the session; writes PREFIX.pstats and PREFIX.collapsed (flame graph input) on exit.")
+    parser.add_argument("--profile-mode", choices=["cprofile", "sample"], default="cprofile",
+                        help="cprofile: exact call counts and times; sample: low-overhead stack sampling (default: cprofile).")
+    parser.add_argument("--sample-interval", metavar="MS", type=float, default=5.0,
+                        help="Milliseconds between stack samples when profiling (default: 5).")
+    args = parser.parse_args(argv)
+    if args.horde and args.journal:
+        parser.error("--horde cannot be combined with --journal (replays do not spawn waves).")
+    if args.max_bandwidth is not None and not args.ansi:
+        parser.error("--max-bandwidth requires --ansi.")
+    if args.sample_interval <= 0:
+        parser.error("--sample-interval must be positive.")
+    return args
 
 def main():
-    curses.wrapper(setup_window)
+    args = parse_args()
+    setup_logging(level=getattr(logging, args.log_level), filename=args.log_file)
+    validate_color_table()
+    window_args = (args.seed, args.journal, args.realtime, args.tick_rate, args.fps, args.spectate,
+                   args.record, args.rewind_turns if args.debug else None,
+                   None if args.no_stats else args.stats_db, args.horde)
+    if args.ansi:
+        from functools import partial
+        from ansi import run_ansi
+        run = partial(run_ansi, max_bytes_per_second=args.max_bandwidth)
+    else:
+        run = curses.wrapper
+    try:
+        if args.profile:
+            from profiler import profile_call
+            profile_call(args.profile, run, setup_window, *window_args,
+                         mode=args.profile_mode, interval=args.sample_interval / 1000)
+        else:
+            run(setup_window, *window_args)
+    except Exception:
+        logging.exception("Unhandled exception in the game loop.")
+        if dump_recent_logs("crash.log"):
+            print("The game crashed. Recent log records were written to crash.log.")
+        raise
     exit_game()
 
 if __name__ == "__main__":
@@ -1,8 +1,7 @@
-import time
 import curses
 import random
 import logging
-from constants import COLOR_TABLE
+from constants import COLOR_TABLE, animation_pause
 
 def throw_frag_grenade(stdscr, player_x, player_y, direction, room):
     """
@@ -51,7 +50,7 @@ def throw_frag_grenade(stdscr, player_x, player_y, direction, room):
                 except curses.error:
                     pass
         stdscr.refresh()
-        curses.napms(100)  # Small delay between phases
+        animation_pause(100)  # Small delay between phases
 
     # Restore original chars (not strictly necessary if we overwrite them anyway)
     for (ex, ey) in explosion_coords:
@@ -65,24 +64,28 @@ def throw_frag_grenade(stdscr, player_x, player_y, direction, room):
     stdscr.refresh()
 
     # Apply damage and set fire ('^') or leave flames
+    monster_positions = room.monster_positions()
+    killed = set()
     for (ex, ey) in explosion_coords:
         if 0 <= ex < room.grid_width and 0 <= ey < room.grid_height:
             # Damage monsters
-            for monster in room.monsters[:]:
-                if monster.x == ex and monster.y == ey:
-                    room.monsters.remove(monster)
-                    kills += 1
-                    logging.info(f"Frag grenade killed {monster.name} at ({ex}, {ey}).")
+            monster = monster_positions.get((ex, ey))
+            if monster:
+                killed.add(monster)
+                kills += 1
+                logging.info(f"Frag grenade killed {monster.name} at ({ex}, {ey}).")
 
             # Replace terrain with a fire symbol
             # Instead of permanently setting '^', let's just restore grass '.' and then add flames.
             # The flames will be shown in the renderer as '^' anyway if implemented there.
-            room.grid[ey][ex] = "."  # Revert to grass
+            room.terrain.set(ex, ey, ".")  # Revert to grass
             # Random chance to leave a lingering flame (50% chance)
             if random.random() < 0.5:
                 # Duration can be adjusted as needed
                 flame_duration = random.randint(3, 7)
                 room.add_lingering_flame(ex, ey, duration=flame_duration)
 
+    if killed:
+        room.remove_monsters(killed)
     logging.info(f"Frag grenade explosion at ({grenade_x}, {grenade_y}) with {kills} monster(s) killed.")
     return kills
@@ -1,6 +1,6 @@
-import time
 import curses
 import random
+from constants import animation_pause
 
 def throw_molitov(stdscr, player_x, player_y, direction, room):
     """
@@ -11,6 +11,7 @@ def throw_molitov(stdscr, player_x, player_y, direction, room):
     dx, dy = direction
     grenade_path = []
     kills = 0  # Initialize kills counter
+    monster_positions = room.monster_positions()
 
     # Calculate Molotov landing point, stopping if it hits a wall or a monster
     for step in range(6):  # Max Molotov range is 6 spaces
@@ -19,7 +20,7 @@ def throw_molitov(stdscr, player_x, player_y, direction, room):
         if 0 <= x < room.grid_width and 0 <= y < room.grid_height:
             grenade_path.append((x, y))
             # Stop if a monster is in the path
-            if next((m for m in room.monsters if (m.x, m.y) == (x, y)), None):
+            if (x, y) in monster_positions:
                 break
         else:
             break  # Stop if Molotov goes out of bounds
@@ -29,7 +30,7 @@ def throw_molitov(stdscr, player_x, player_y, direction, room):
         # Render Molotov symbol
         stdscr.addstr(y, x, "o", curses.color_pair(4))  # Molotov symbol in orange
         stdscr.refresh()
-        time.sleep(0.1)  # Delay for trajectory animation
+        animation_pause(100)  # Delay for trajectory animation
 
         # Restore previous position with the terrain
         if i > 0:
@@ -55,16 +56,18 @@ def throw_molitov(stdscr, player_x, player_y, direction, room):
                         stdscr.refresh()
 
                         # Damage monsters within the fire radius
-                        monster_hit = next((m for m in room.monsters if (m.x, m.y) == (x, y)), None)
+                        monster_hit = monster_positions.get((x, y))
                         if monster_hit:
                             monster_hit.take_damage(2)  # Apply Molotov damage
-                            if monster_hit.health <= 0:  # Remove dead monsters
-                                room.monsters.remove(monster_hit)
+                            if monster_hit.health <= 0:  # Dead monsters are removed below
+                                del monster_positions[(x, y)]
                                 kills += 1
 
                         # Add lingering flames
                         room.add_lingering_flame(x, y)
 
-        time.sleep(0.5)  # Pause for fire effect
+        animation_pause(500)  # Pause for fire effect
+        if kills:
+            room.remove_monsters([m for m in room.monsters if m.health <= 0])
 
     return kills  # Return the count of monsters killed
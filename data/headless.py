@@ -0,0 +1,86 @@
+import curses
+import collections
+from constants import set_animations_enabled
+from templates import set_background_refill
+
+# Screen size used by the game: 80x24 game area plus the 60 column sidebar
+DEFAULT_SCREEN_HEIGHT = 24
+DEFAULT_SCREEN_WIDTH = 80 + 2 + 60
+
+
+class HeadlessScreen:
+    """
+    Stands in for the curses window when the game runs without a terminal
+    (replays, benchmarks, batch simulations). Output is discarded after a bounds
+    check; input comes from a queue of key codes.
+    """
+
+    def __init__(self, height=DEFAULT_SCREEN_HEIGHT, width=DEFAULT_SCREEN_WIDTH, keys=None, default_key=ord('q')):
+        """
+        :param height: Number of screen rows.
+        :param width: Number of screen columns.
+        :param keys: Optional iterable of key codes returned by getch().
+        :param default_key: Key returned once the queue is empty.
+        """
+        self.height = height
+        self.width = width
+        self.keys = collections.deque(keys or [])
+        self.default_key = default_key
+        self.writes = 0
+
+    def push_keys(self, keys):
+        self.keys.extend(keys)
+
+    def addstr(self, y, x, text, attr=0):
+        if not (0 <= y < self.height and 0 <= x < self.width):
+            raise curses.error("addstr() returned ERR")
+        self.writes += 1
+
+    def addch(self, y, x, ch, attr=0):
+        self.addstr(y, x, ch, attr)
+
+    def getch(self):
+        if self.keys:
+            return self.keys.popleft()
+        return self.default_key
+
+    def getmaxyx(self):
+        return (self.height, self.width)
+
+    def clear(self):
+        pass
+
+    def erase(self):
+        pass
+
+    def refresh(self):
+        pass
+
+    def noutrefresh(self):
+        pass
+
+    def nodelay(self, flag):
+        pass
+
+    def timeout(self, delay):
+        pass
+
+    def keypad(self, flag):
+        pass
+
+
+def _color_pair(number):
+    return (number & 0xff) << 8
+
+
+def enable_headless_curses():
+    """
+    Makes the module-level curses helpers used by the game safe to call without
+    initscr(), and turns animation delays off so simulations run at full speed.
+    Room templates are generated as they are needed instead of by refill threads.
+    """
+    curses.color_pair = _color_pair
+    curses.napms = lambda milliseconds: 0
+    curses.curs_set = lambda visibility: 0
+    set_animations_enabled(False)
+    set_background_refill(False)
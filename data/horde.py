@@ -0,0 +1,221 @@
+import argparse
+import json
+import logging
+import random
+import sys
+import time
+from entities import MONSTER
+from tables import MONSTER_TYPES
+
+# Horde mode: waves of monsters keep pouring into the current room.
+# Interactive games use the defaults below (python3 game.py --horde). The scaling
+# run (python3 horde.py) plays a headless arena up to TARGET_MONSTERS and reports
+# turn-time percentiles for each band of monster counts.
+
+DEFAULT_WAVE_SIZE = 20       # Monsters in the first wave
+DEFAULT_WAVE_GROWTH = 10     # Extra monsters in each later wave
+DEFAULT_WAVE_INTERVAL = 5    # World ticks (turns, or steps of a run) between waves
+DEFAULT_MAX_MONSTERS = 5000  # Waves stop growing the room past this many monsters
+SPAWN_DISTANCE = 5           # Monsters never appear closer than this to the player
+
+# Published target: a headless turn (render, flames, monsters, a weapon blast every few
+# turns and the next wave) at 5,000 monsters runs at 10 turns per second or better at
+# the median. Checked by python3 horde.py, which exits with status 1 if it is missed.
+TARGET_MONSTERS = 5000
+TARGET_TURNS_PER_SECOND = 10
+
+ARENA_WIDTH, ARENA_HEIGHT = 160, 60  # Room size for the scaling run: room for 5,000 monsters
+BAND_SIZE = 500                      # Monster counts are grouped in bands of this size
+WEAPON_INTERVAL = 5                  # Turns between weapon blasts in the scaling run
+HOLD_TURNS = 30                      # Turns played at the target count
+
+
+class HordeSpawner:
+    def __init__(self, wave_size=DEFAULT_WAVE_SIZE, wave_growth=DEFAULT_WAVE_GROWTH,
+                 wave_interval=DEFAULT_WAVE_INTERVAL, max_monsters=DEFAULT_MAX_MONSTERS):
+        """
+        Spawns a wave of random monster types every few world ticks, each wave larger than the last.
+        :param wave_size: Monsters in the first wave.
+        :param wave_growth: Monsters added to each later wave.
+        :param wave_interval: World ticks between waves.
+        :param max_monsters: Monster count waves stop at.
+        """
+        self.wave_size = wave_size
+        self.wave_growth = wave_growth
+        self.wave_interval = wave_interval
+        self.max_monsters = max_monsters
+        self.waves = 0
+        self.spawned = 0
+        # World updates seen; a run or travel updates the world once per step within a
+        # single turn, so waves are counted in these ticks rather than in turns
+        self.ticks = 0
+
+    def update(self, room, player):
+        """
+        Advances one world tick and spawns the next wave if one is due.
+        :return: Number of monsters spawned.
+        """
+        self.ticks += 1
+        if self.ticks % self.wave_interval:
+            return 0
+        count = min(self.wave_size + self.waves * self.wave_growth, self.max_monsters - room.entities.count(MONSTER))
+        if count <= 0:
+            return 0
+        self.waves += 1
+        return self.spawn_wave(room, player, count)
+
+    def spawn_wave(self, room, player, count):
+        """
+        Puts up to count monsters on random free ground at least SPAWN_DISTANCE from the player.
+        """
+        from bitgrid import geometry, iter_cells
+        from terrain import BARE_GROUND
+        width = room.grid_width
+        free = room.terrain.mask(BARE_GROUND)
+        near = SPAWN_DISTANCE - 1
+        free &= ~geometry(width, room.grid_height).rectangle(player.x - near, player.y - near, player.x + near, player.y + near)
+        # The grid does not always show what stands on a cell, so check the entities too
+        taken = {y * width + x for x, y in room.monster_positions()}
+        taken.update(item.y * width + item.x for item in room.items.get_items())
+        free_cells = [index for index in iter_cells(free) if index not in taken]
+        cells = random.sample(free_cells, min(count, len(free_cells)))
+        monster_types = random.choices(MONSTER_TYPES, k=len(cells))
+        for monster_type, index in zip(monster_types, cells):
+            x, y = index % width, index // width
+            monster = room.spawn_monster(monster_type.id, x, y)
+            room.terrain.set(x, y, monster.symbol)
+        self.spawned += len(cells)
+        logging.info(f"Horde wave {self.waves}: {len(cells)} monster(s) spawned, {room.entities.count(MONSTER)} in room ({room.x}, {room.y}).")
+        return len(cells)
+
+
+def band_percentiles(samples, band_size=BAND_SIZE):
+    """
+    :param samples: (monster count, turn seconds) pairs.
+    :return: List of {"monsters", "turns", "p50", "p95", "p99", "turns_per_second"} per band of
+             monster counts, the band named by its lower bound; times in milliseconds.
+    """
+    from stats import turn_percentiles
+    bands = {}
+    for monsters, seconds in samples:
+        bands.setdefault(monsters // band_size * band_size, []).append(seconds)
+    rows = []
+    for band in sorted(bands):
+        percentiles = turn_percentiles(bands[band])
+        rows.append({"monsters": band, "turns": len(bands[band]), **percentiles,
+                     "turns_per_second": 1000 / percentiles["p50"] if percentiles["p50"] else 0.0})
+    return rows
+
+
+def run_horde(target=TARGET_MONSTERS, width=ARENA_WIDTH, height=ARENA_HEIGHT, wave_size=250,
+              hold_turns=HOLD_TURNS, weapon_interval=WEAPON_INTERVAL, seed=1, max_turns=1000):
+    """
+    Plays a headless horde game in an arena until the room has held target monsters for
+    hold_turns turns. The player cannot die; every weapon_interval turns an RPG blast and
+    a Molotov hit the horde, so weapon and flame costs are part of the turn.
+    :return: Dict with the per-turn samples, per-band percentiles and phase totals.
+    """
+    from headless import HeadlessScreen, DEFAULT_SCREEN_WIDTH, DEFAULT_SCREEN_HEIGHT
+    from game import GameSession
+    from perf import monitor
+    from weapons.rpg import explode_rpg
+    from grenades.molitov import throw_molitov
+
+    screen = HeadlessScreen(height=max(height, DEFAULT_SCREEN_HEIGHT), width=width + DEFAULT_SCREEN_WIDTH - 80)
+    session = GameSession(screen, width, height, seed=seed)
+    session.player.health = session.player.max_health = 10 ** 9
+    session.horde = HordeSpawner(wave_size=wave_size, wave_growth=0, wave_interval=1, max_monsters=target)
+    monitor.enable(True)
+
+    samples = []
+    phases = {}
+    held = 0
+    kills = 0
+    while session.turn < max_turns and held < hold_turns:
+        room = session.current_room
+        monsters = room.entities.count(MONSTER)
+        started = time.perf_counter()
+        session.begin_turn()
+        session.render()
+        session.update_world(refresh=False)
+        if session.turn % weapon_interval == 0 and room.entities.count(MONSTER):
+            with monitor.span("weapons"):
+                target_monster = random.choice(room.monsters)
+                kills += explode_rpg(target_monster.x, target_monster.y, room)
+                if room.monsters:
+                    target_monster = random.choice(room.monsters)
+                    kills += throw_molitov(session.stdscr, target_monster.x - 1, target_monster.y, (1, 0), room)
+        session.end_turn()
+        samples.append((monsters, time.perf_counter() - started))
+        for phase, seconds in monitor.last_frame.items():
+            phases[phase] = phases.get(phase, 0.0) + seconds
+        if monsters >= target * 0.95:
+            held += 1
+    monitor.enable(False)
+
+    bands = band_percentiles(samples)
+    at_target = [seconds for monsters, seconds in samples if monsters >= target * 0.95]
+    result = {
+        "target_monsters": target,
+        "target_turns_per_second": TARGET_TURNS_PER_SECOND,
+        "arena": [width, height],
+        "turns": session.turn,
+        "spawned": session.horde.spawned,
+        "weapon_kills": kills,
+        "bands": bands,
+        "phase_seconds": phases,
+        "samples": samples,
+    }
+    if at_target:
+        from stats import turn_percentiles
+        result["at_target"] = turn_percentiles(at_target)
+        result["at_target"]["turns_per_second"] = 1000 / result["at_target"]["p50"]
+    return result
+
+
+def print_report(result):
+    print(f"Arena {result['arena'][0]}x{result['arena'][1]}, {result['turns']} turn(s), "
+          f"{result['spawned']} monster(s) spawned, {result['weapon_kills']} killed by weapons")
+    print(f"{'monsters':>10} {'turns':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'turns/s':>8}")
+    for row in result["bands"]:
+        print(f"{row['monsters']:>10} {row['turns']:>6} {row['p50']:>9.1f} {row['p95']:>9.1f} {row['p99']:>9.1f} {row['turns_per_second']:>8.1f}")
+    total = sum(result["phase_seconds"].values()) or 1.0
+    print("Time by phase: " + ", ".join(
+        f"{phase} {seconds / total:.0%}" for phase, seconds in sorted(result["phase_seconds"].items(), key=lambda item: -item[1])))
+    at_target = result.get("at_target")
+    if not at_target:
+        print(f"The arena never reached {result['target_monsters']} monsters.")
+        return False
+    met = at_target["turns_per_second"] >= result["target_turns_per_second"]
+    print(f"At {result['target_monsters']} monsters: p50 {at_target['p50']:.1f} ms ({at_target['turns_per_second']:.1f} turns/s), "
+          f"target {result['target_turns_per_second']} turns/s: {'met' if met else 'MISSED'}")
+    return met
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Horde scaling run: turn times as the monster count climbs.")
+    parser.add_argument("--monsters", type=int, default=TARGET_MONSTERS, help=f"Monster count to reach (default: {TARGET_MONSTERS}).")
+    parser.add_argument("--width", type=int, default=ARENA_WIDTH, help=f"Arena width (default: {ARENA_WIDTH}).")
+    parser.add_argument("--height", type=int, default=ARENA_HEIGHT, help=f"Arena height (default: {ARENA_HEIGHT}).")
+    parser.add_argument("--wave-size", type=int, default=250, help="Monsters spawned per turn while climbing (default: 250).")
+    parser.add_argument("--hold-turns", type=int, default=HOLD_TURNS, help=f"Turns played at the target count (default: {HOLD_TURNS}).")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("-o", "--output", help="Write the results (with every turn's sample) as JSON.")
+    args = parser.parse_args(argv)
+
+    from logging_setup import setup_logging
+    from headless import enable_headless_curses
+    setup_logging(level=logging.WARNING, filename="horde.log")
+    enable_headless_curses()
+
+    result = run_horde(args.monsters, args.width, args.height, args.wave_size, args.hold_turns, seed=args.seed)
+    met = print_report(result)
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(result, output, indent=2)
+        print(f"Wrote results to {args.output}")
+    return 0 if met else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
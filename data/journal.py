@@ -0,0 +1,197 @@
+import logging
+import struct
+import zlib
+
+# Binary session journal.
+# Header: magic, format version, session seed, room width and height.
+# Records: a one byte tag followed by a fixed size payload.
+JOURNAL_MAGIC = b"ZRJ1"
+JOURNAL_VERSION = 4
+HEADER = struct.Struct("<4sHIHH")
+
+TAG_TURN = b"T"        # turn number, turn seed
+TAG_KEY = b"K"         # key code returned by getch()
+TAG_CHECKPOINT = b"C"  # turn number, state digest
+TAG_END = b"E"         # last turn number
+
+TURN_RECORD = struct.Struct("<II")
+KEY_RECORD = struct.Struct("<i")
+CHECKPOINT_RECORD = struct.Struct("<II")
+END_RECORD = struct.Struct("<I")
+
+MAX_SEED = 2 ** 32 - 1  # The header stores the session seed as an unsigned 32-bit integer
+
+RECORD_SIZES = {
+    TAG_TURN: TURN_RECORD,
+    TAG_KEY: KEY_RECORD,
+    TAG_CHECKPOINT: CHECKPOINT_RECORD,
+    TAG_END: END_RECORD,
+}
+
+DEFAULT_CHECKPOINT_INTERVAL = 25  # Turns between state digests
+
+
+class JournalError(Exception):
+    pass
+
+
+def state_digest(session):
+    """
+    Computes a CRC32 over the parts of the game state a replay must reproduce:
+    the player, the current room's grid, monsters, items and lingering flames.
+    :param session: A GameSession.
+    :return: 32-bit digest.
+    """
+    player = session.player
+    room = session.current_room
+    state = (
+        (player.x, player.y, player.floor, player.health, player.armor,
+         player.weapon, player.weapon_ammo, sorted(player.grenades.items())),
+        (room.floor, room.x, room.y),
+        ["".join(row) for row in room.grid],
+        sorted((m.name, m.x, m.y, m.health) for m in room.monsters),
+        sorted((item.name, item.x, item.y) for item in room.items.get_items()),
+        room.fire.state(),
+    )
+    return zlib.crc32(repr(state).encode("utf-8"))
+
+
+def session_seed(text):
+    """
+    argparse type for --seed: an integer the journal header can hold (0 to MAX_SEED).
+    """
+    import argparse
+    try:
+        seed = int(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"'{text}' is not an integer.")
+    if not 0 <= seed <= MAX_SEED:
+        raise argparse.ArgumentTypeError(f"{text} is out of range (0 to {MAX_SEED}).")
+    return seed
+
+
+class JournalWriter:
+    def __init__(self, path, seed, grid_width, grid_height, checkpoint_interval=DEFAULT_CHECKPOINT_INTERVAL):
+        """
+        Writes a compact binary record of one session.
+        :param path: Output file path.
+        :param seed: Session seed used to build the initial state.
+        :param grid_width: Room width.
+        :param grid_height: Room height.
+        :param checkpoint_interval: Turns between state digests.
+        """
+        if not 0 <= seed <= MAX_SEED:
+            raise ValueError(f"Session seed {seed} is out of range for a journal (0 to {MAX_SEED}).")
+        self.path = path
+        self.checkpoint_interval = checkpoint_interval
+        self.last_turn = 0
+        self.file = open(path, "wb")
+        self.file.write(HEADER.pack(JOURNAL_MAGIC, JOURNAL_VERSION, seed, grid_width, grid_height))
+        logging.info(f"Recording session journal to '{path}' (seed {seed}).")
+
+    def record_turn(self, turn, turn_seed):
+        self.last_turn = turn
+        self.file.write(TAG_TURN + TURN_RECORD.pack(turn, turn_seed))
+
+    def record_key(self, key):
+        self.file.write(TAG_KEY + KEY_RECORD.pack(key))
+
+    def record_checkpoint(self, turn, digest):
+        self.file.write(TAG_CHECKPOINT + CHECKPOINT_RECORD.pack(turn, digest))
+
+    def wants_checkpoint(self, turn):
+        return self.checkpoint_interval > 0 and turn % self.checkpoint_interval == 0
+
+    def close(self):
+        if self.file.closed:
+            return
+        self.file.write(TAG_END + END_RECORD.pack(self.last_turn))
+        self.file.close()
+        logging.info(f"Session journal '{self.path}' closed after {self.last_turn} turn(s).")
+
+
+class JournalTurn:
+    def __init__(self, turn, seed):
+        self.turn = turn
+        self.seed = seed
+        self.keys = []
+        self.checkpoint = None
+
+
+class Journal:
+    def __init__(self, seed, grid_width, grid_height, turns, complete):
+        """
+        A parsed session journal.
+        :param seed: Session seed.
+        :param grid_width: Room width.
+        :param grid_height: Room height.
+        :param turns: List of JournalTurn in order.
+        :param complete: False if the file ended without an end record (e.g. a crash).
+        """
+        self.seed = seed
+        self.grid_width = grid_width
+        self.grid_height = grid_height
+        self.turns = turns
+        self.complete = complete
+
+
+def read_journal(path):
+    """
+    Parses a journal file written by JournalWriter.
+    :param path: Journal file path.
+    :return: Journal
+    """
+    with open(path, "rb") as journal_file:
+        data = journal_file.read()
+
+    if len(data) < HEADER.size:
+        raise JournalError(f"'{path}' is too short to be a session journal.")
+    magic, version, seed, grid_width, grid_height = HEADER.unpack_from(data, 0)
+    if magic != JOURNAL_MAGIC or version != JOURNAL_VERSION:
+        raise JournalError(f"'{path}' is not a version {JOURNAL_VERSION} session journal.")
+
+    turns = []
+    complete = False
+    offset = HEADER.size
+    while offset < len(data):
+        tag = data[offset:offset + 1]
+        record = RECORD_SIZES.get(tag)
+        if record is None:
+            raise JournalError(f"Unknown record tag {tag!r} at offset {offset} in '{path}'.")
+        if offset + 1 + record.size > len(data):
+            break  # Truncated final record
+        values = record.unpack_from(data, offset + 1)
+        offset += 1 + record.size
+
+        if tag == TAG_TURN:
+            turns.append(JournalTurn(*values))
+        elif not turns:
+            raise JournalError(f"Record {tag!r} before the first turn in '{path}'.")
+        elif tag == TAG_KEY:
+            turns[-1].keys.append(values[0])
+        elif tag == TAG_CHECKPOINT:
+            turns[-1].checkpoint = values[1]
+        else:
+            complete = True
+
+    return Journal(seed, grid_width, grid_height, turns, complete)
+
+
+class JournalScreen:
+    """
+    Wraps the curses window so every key read anywhere in the game
+    (main loop, look mode, direction prompts) is written to the journal.
+    """
+
+    def __init__(self, stdscr, journal):
+        self._stdscr = stdscr
+        self._journal = journal
+
+    def getch(self):
+        key = self._stdscr.getch()
+        if key != -1:  # Input timeouts in real-time mode are not recorded
+            self._journal.record_key(key)
+        return key
+
+    def __getattr__(self, name):
+        return getattr(self._stdscr, name)
@@ -0,0 +1,114 @@
+import atexit
+import collections
+import logging
+import logging.handlers
+import queue
+
+LOG_FORMAT = '%(asctime)s:%(levelname)s:%(message)s'
+DEFAULT_LOG_FILE = 'game.log'
+DEFAULT_MAX_BYTES = 1024 * 1024  # Rotate game.log once it reaches 1 MB
+DEFAULT_BACKUP_COUNT = 3
+DEFAULT_RING_SIZE = 500  # Records kept in memory for crash dumps
+
+_listener = None
+_ring_buffer = None
+
+
+class RingBufferHandler(logging.Handler):
+    """
+    Keeps the most recent log records in a bounded in-memory buffer.
+    Records are only formatted when dumped, so appending stays cheap.
+    """
+
+    def __init__(self, capacity=DEFAULT_RING_SIZE):
+        super().__init__()
+        self.records = collections.deque(maxlen=capacity)
+        self.setFormatter(logging.Formatter(LOG_FORMAT))
+
+    def emit(self, record):
+        self.records.append(record)
+
+    def get_lines(self):
+        return [self.format(record) for record in list(self.records)]
+
+    def dump(self, path):
+        """
+        Writes the buffered records to a file.
+        :param path: Destination file path.
+        """
+        with open(path, "w", encoding="utf-8") as dump_file:
+            for line in self.get_lines():
+                dump_file.write(line + "\n")
+
+
+def setup_logging(level=logging.INFO, filename=DEFAULT_LOG_FILE, max_bytes=DEFAULT_MAX_BYTES,
+                  backup_count=DEFAULT_BACKUP_COUNT, ring_size=DEFAULT_RING_SIZE):
+    """
+    Configures the root logger once for the whole game.
+    Records go through a QueueHandler to a background listener thread that writes
+    a size-rotated log file, so the game loop never blocks on disk I/O.
+    :param level: Minimum level for the root logger.
+    :param filename: Log file path.
+    :param max_bytes: Size at which the log file is rotated.
+    :param backup_count: Number of rotated files to keep.
+    :param ring_size: Number of recent records kept in memory for crash dumps.
+    :return: The RingBufferHandler holding recent records.
+    """
+    global _listener, _ring_buffer
+
+    shutdown_logging()
+
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+        handler.close()
+    root.setLevel(level)
+
+    file_handler = logging.handlers.RotatingFileHandler(
+        filename, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8"
+    )
+    file_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+
+    log_queue = queue.SimpleQueue()
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+
+    _ring_buffer = RingBufferHandler(ring_size)
+    root.addHandler(_ring_buffer)
+
+    _listener = logging.handlers.QueueListener(log_queue, file_handler, respect_handler_level=True)
+    _listener.start()
+    return _ring_buffer
+
+
+def shutdown_logging():
+    """
+    Stops the background writer, flushing any queued records to disk.
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+def dump_recent_logs(path="crash.log"):
+    """
+    Writes the in-memory ring buffer to a file, e.g. after an unhandled exception.
+    :param path: Destination file path.
+    :return: True if a dump was written.
+    """
+    if _ring_buffer is None:
+        return False
+    try:
+        _ring_buffer.dump(path)
+    except OSError:
+        return False
+    return True
+
+
+def get_recent_logs():
+    return _ring_buffer.get_lines() if _ring_buffer is not None else []
+
+
+atexit.register(shutdown_logging)
@@ -0,0 +1,335 @@
+import argparse
+import collections
+import datetime
+import heapq
+import json
+import re
+import sys
+
+# One-pass summary of game logs: python3 logreport.py game.log [game.log.1 ...].
+# Files are read in fixed-size chunks, so memory stays flat whatever their size. Most
+# aggregates are substring counts over a whole chunk, which run in C; only lines that
+# carry numbers are found one by one and parsed.
+
+CHUNK_SIZE = 4 * 1024 * 1024
+IDLE_GAP = 5.0   # Seconds between two turns above which the player counts as away
+TOP_SLOW_TURNS = 10
+TIMESTAMP_LENGTH = 23  # "2024-12-07 17:20:46,191", see LOG_FORMAT in logging_setup.py
+
+# Aggregate -> text found once in each line of that kind, and where it is logged. Every
+# count is a pass over the chunk, so only what the report shows is counted.
+COUNTED = {
+    "monster_moves": b" moved from (",                       # monster.py (debug)
+    "rooms_created": b":Created new room at (",              # room.py (debug)
+    "room_transitions": b":Room transitioned to (",          # game.py
+    "shots_fired": b":Player fired ",                        # player.py
+}
+UNRECOGNIZED_MESSAGE = b"Unrecognized action.\n"  # game.py, whether shown or repeated
+REPEATED_MESSAGE = b":INFO:Message repeated "      # game.py: "Message repeated N times: TEXT"
+# Lines logged once per handled action. They stand in for turns in chunks without turn
+# lines (logs written before turns were logged, or at a level above DEBUG).
+ACTION_LINES = (b":Movement input: ", b":Player fired ", UNRECOGNIZED_MESSAGE)  # game.py, player.py
+
+# Lines carrying numbers. Turn lines are common enough for a regular expression to beat
+# a loop in Python; the rarer ones are found with bytes.find, which scans several times
+# faster. The timestamp is the TIMESTAMP_LENGTH bytes before the level.
+TURN = re.compile(rb":DEBUG:Turn \d+ took ([\d.]+) ms")  # game.py, one per turn at DEBUG level
+SLOW_TURN = b":WARNING:Slow turn "                          # game.py: "Slow turn N: X ms."
+KILLS = b":INFO:Kills updated: "                            # game.py: "Kills updated: N kill(s)."
+UNRECOGNIZED_KEY = b":DEBUG:Unrecognized key pressed: "     # game.py: "... pressed: CODE"
+SLAIN = b" has been slain.\n"                               # monster.py: "NAME has been slain."
+
+
+def marked_lines(chunk, marker):
+    """
+    :return: Generator of (line start, rest of the line after marker) for the lines of
+             chunk (which ends with a newline) containing marker.
+    """
+    find = chunk.find
+    position = find(marker)
+    while position >= 0:
+        end = find(b"\n", position)
+        yield position - TIMESTAMP_LENGTH, chunk[position + len(marker):end]
+        position = find(marker, end)
+
+
+def read_chunks(path, chunk_size=CHUNK_SIZE):
+    """
+    :param path: Log file, or "-" for standard input.
+    :return: Generator of chunks of whole lines, each ending with a newline.
+    """
+    stream = sys.stdin.buffer if path == "-" else open(path, "rb")
+    try:
+        carry = b""
+        while True:
+            data = stream.read(chunk_size)
+            if not data:
+                break
+            cut = data.rfind(b"\n") + 1
+            if not cut:
+                carry += data
+                continue
+            yield carry + data[:cut] if carry else data[:cut]
+            carry = data[cut:]
+        if carry:
+            yield carry + b"\n"
+    finally:
+        if stream is not sys.stdin.buffer:
+            stream.close()
+
+
+class LogReport:
+    def __init__(self, top_slow_turns=TOP_SLOW_TURNS, idle_gap=IDLE_GAP):
+        """
+        Aggregates over any number of log chunks; everything kept is either a counter or
+        bounded (the slowest turns, one entry per key code or monster type).
+        :param top_slow_turns: Number of slowest turns listed.
+        :param idle_gap: Gap between turns, in seconds, not counted as playing time.
+        """
+        self.top_slow_turns = top_slow_turns
+        self.idle_gap = idle_gap
+        self.counts = dict.fromkeys(COUNTED, 0)
+        self.bytes = 0
+        self.estimated_turns = 0
+        self.unrecognized_messages = 0
+        self.turns = 0
+        self.turn_ms = 0.0
+        self.active_seconds = 0.0
+        self.turn_stamp = None     # Timestamp text of the last turn line
+        self.second_start = None   # Time of the first turn line in the last turn's second
+        self.slow_turns = []  # Heap of (ms, turn, timestamp), the slowest kept
+        self.slow_turn_count = 0
+        self.kills = 0
+        self.slain = collections.Counter()
+        self.unrecognized_keys = collections.Counter()
+        self.first_timestamp = None
+        self.last_timestamp = None
+        self.wall_seconds = 0.0  # Time spanned by the files, each measured on its own
+
+    @staticmethod
+    def second_value(second):
+        """
+        :param second: Timestamp text up to the second ("2024-12-07 17:20:46").
+        :return: The timestamp in whole seconds (only differences are meaningful), or None.
+        """
+        try:
+            day = datetime.date.fromisoformat(second[:10].decode()).toordinal()
+            return day * 86400 + int(second[11:13]) * 3600 + int(second[14:16]) * 60 + int(second[17:19])
+        except ValueError:
+            return None
+
+    def seconds(self, line):
+        """
+        :return: The line's timestamp in seconds, with milliseconds, or None.
+        """
+        value = self.second_value(line[:19])
+        try:
+            return None if value is None else value + int(line[20:23]) / 1000
+        except ValueError:
+            return None
+
+    def add_file(self, path, chunk_size=CHUNK_SIZE):
+        """
+        Adds one log file. Files should be added oldest first (game.log.3 before game.log.2, ...).
+        """
+        file_start = None
+        file_end = None
+        for chunk in read_chunks(path, chunk_size):
+            self.add_chunk(chunk)
+            if file_start is None:
+                file_start = self.seconds(chunk)
+                if file_start is not None and self.first_timestamp is None:
+                    self.first_timestamp = chunk[:TIMESTAMP_LENGTH].decode(errors="replace")
+            last_line = chunk[chunk.rfind(b"\n", 0, len(chunk) - 1) + 1:]
+            end = self.seconds(last_line)
+            if end is not None:
+                file_end = end
+                self.last_timestamp = last_line[:TIMESTAMP_LENGTH].decode(errors="replace")
+        self.add_turn_time(None)  # No playing time is counted across files
+        if file_start is not None and file_end is not None:
+            self.wall_seconds += max(0.0, file_end - file_start)
+
+    def add_chunk(self, chunk):
+        self.bytes += len(chunk)
+        counts = self.counts
+        for name, text in COUNTED.items():
+            counts[name] += chunk.count(text)
+
+        # Timestamps are only converted when a turn line starts a new second: the time
+        # between turns in the same second adds up to the last one minus the first.
+        turns = 0
+        turn_ms = 0.0
+        stamp = self.turn_stamp
+        second = stamp and stamp[:19]
+        for match in TURN.finditer(chunk):
+            start = match.start() - TIMESTAMP_LENGTH
+            if chunk[start:start + 19] != second:
+                self.turn_stamp = stamp
+                self.add_turn_time(chunk[start:start + TIMESTAMP_LENGTH])
+                second = chunk[start:start + 19]
+            stamp = chunk[start:start + TIMESTAMP_LENGTH]
+            turn_ms += float(match.group(1))
+            turns += 1
+        self.turn_stamp = stamp
+
+        # Slow turns are counted but not timed: the turn lines around them cover their time
+        for start, rest in marked_lines(chunk, SLOW_TURN):
+            turn, _, milliseconds = rest.partition(b": ")
+            try:
+                turn, milliseconds = int(turn), float(milliseconds.split(b" ", 1)[0])
+            except ValueError:
+                continue
+            turns += 1
+            turn_ms += milliseconds
+            self.add_slow_turn(turn, milliseconds, chunk[start:start + TIMESTAMP_LENGTH])
+        self.turns += turns
+        self.turn_ms += turn_ms
+
+        # Repeats of a collapsed message are summed in one INFO line, which ends with the
+        # message and so is counted once by the counts of UNRECOGNIZED_MESSAGE below
+        unrecognized_repeats = 0
+        for _, rest in marked_lines(chunk, REPEATED_MESSAGE):
+            count, _, message = rest.partition(b" times: ")
+            if message + b"\n" == UNRECOGNIZED_MESSAGE:
+                try:
+                    unrecognized_repeats += int(count) - 1
+                except ValueError:
+                    continue
+
+        if not turns:
+            self.estimated_turns += sum(chunk.count(text) for text in ACTION_LINES) + unrecognized_repeats
+
+        for _, rest in marked_lines(chunk, KILLS):
+            try:
+                self.kills += int(rest.split(b" ", 1)[0])
+            except ValueError:
+                continue
+
+        keys = [rest for _, rest in marked_lines(chunk, UNRECOGNIZED_KEY)]
+        if keys:
+            self.unrecognized_keys.update(keys)
+        else:  # Key codes are only logged at DEBUG level
+            self.unrecognized_messages += chunk.count(UNRECOGNIZED_MESSAGE) + unrecognized_repeats
+
+        find = chunk.find
+        position = find(SLAIN)
+        while position >= 0:
+            name = chunk[chunk.rfind(b":", 0, position) + 1:position]
+            self.slain[name.decode(errors="replace")] += 1
+            position = find(SLAIN, position + len(SLAIN))
+
+    def add_turn_time(self, stamp):
+        """
+        Adds the playing time of the second the last turn line fell in, and the gap to the
+        next turn line unless the player was idle.
+        :param stamp: Timestamp text of the first turn line in a new second, or None to
+                      stop at the last turn line (end of a file).
+        """
+        now = None if stamp is None else self.seconds(stamp)
+        last = None if self.turn_stamp is None else self.seconds(self.turn_stamp)
+        if last is not None:
+            if self.second_start is not None:
+                self.active_seconds += last - self.second_start
+            if now is not None and 0 <= now - last <= self.idle_gap:
+                self.active_seconds += now - last
+        self.second_start = now
+        if stamp is None:
+            self.turn_stamp = None
+
+    def add_slow_turn(self, turn, milliseconds, stamp):
+        self.slow_turn_count += 1
+        entry = (milliseconds, turn, stamp.decode(errors="replace"))
+        if len(self.slow_turns) < self.top_slow_turns:
+            heapq.heappush(self.slow_turns, entry)
+        elif entry > self.slow_turns[0]:
+            heapq.heapreplace(self.slow_turns, entry)
+
+    def summary(self):
+        """
+        :return: Dict of the aggregates. Without any turn lines, turns are estimated from
+                 the action lines and turns per second from the time the files span.
+        """
+        counts = self.counts
+        estimated = self.turns == 0
+        turns = self.estimated_turns if estimated else self.turns
+        seconds = self.wall_seconds if estimated else self.active_seconds
+        return {
+            "bytes": self.bytes,
+            "first_timestamp": self.first_timestamp,
+            "last_timestamp": self.last_timestamp,
+            "turns": turns,
+            "turns_estimated": estimated,
+            "turns_per_second": turns / seconds if seconds else None,
+            "mean_turn_ms": None if estimated else self.turn_ms / self.turns,
+            "monster_moves": counts["monster_moves"],
+            "monster_moves_per_turn": counts["monster_moves"] / turns if turns else None,
+            "rooms_created": counts["rooms_created"],
+            "room_transitions": counts["room_transitions"],
+            "shots_fired": counts["shots_fired"],
+            "kills": self.kills,
+            "slain": dict(self.slain.most_common()),
+            "unrecognized_keys": sum(self.unrecognized_keys.values()) + self.unrecognized_messages,
+            "unrecognized_key_codes": {code.decode(): count for code, count in self.unrecognized_keys.most_common()},
+            "slow_turns": self.slow_turn_count,
+            "slowest_turns": [{"turn": turn, "ms": turn_ms, "at": at}
+                              for turn_ms, turn, at in sorted(self.slow_turns, reverse=True)],
+        }
+
+
+def format_summary(summary):
+    """
+    :return: List of report lines.
+    """
+    def number(value, digits=2):
+        return "n/a" if value is None else f"{value:.{digits}f}"
+
+    estimated = " (estimated from action lines)" if summary["turns_estimated"] else ""
+    lines = [
+        f"Read {summary['bytes'] / 1e6:.1f} MB, "
+        f"{summary['first_timestamp'] or '?'} to {summary['last_timestamp'] or '?'}",
+        f"Turns: {summary['turns']}{estimated}, {number(summary['turns_per_second'])} turns/s, "
+        f"mean turn {number(summary['mean_turn_ms'])} ms",
+        f"Monster moves: {summary['monster_moves']} ({number(summary['monster_moves_per_turn'])} per turn)",
+        f"Rooms: {summary['rooms_created']} created, {summary['room_transitions']} entered",
+        f"Kills: {summary['kills']}, shots fired {summary['shots_fired']}",
+    ]
+    if summary["slain"]:
+        lines.append("Slain: " + ", ".join(f"{name} {count}" for name, count in summary["slain"].items()))
+    keys = ", ".join(f"{code} x{count}" for code, count in list(summary["unrecognized_key_codes"].items())[:10])
+    lines.append(f"Unrecognized keys: {summary['unrecognized_keys']}" + (f" ({keys})" if keys else ""))
+    lines.append(f"Slow turns: {summary['slow_turns']}")
+    for entry in summary["slowest_turns"]:
+        lines.append(f"  turn {entry['turn']}: {entry['ms']:.1f} ms at {entry['at']}")
+    return lines
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Summarise Zombierun game logs in one streaming pass.")
+    parser.add_argument("logs", nargs="*", default=["game.log"],
+                        help="Log files in the order they were written, '-' for standard input (default: game.log).")
+    parser.add_argument("--top", type=int, default=TOP_SLOW_TURNS, help=f"Slowest turns listed (default: {TOP_SLOW_TURNS}).")
+    parser.add_argument("--idle-gap", type=float, default=IDLE_GAP,
+                        help=f"Seconds between turns not counted as playing time (default: {IDLE_GAP:g}).")
+    parser.add_argument("--chunk-mb", type=int, default=CHUNK_SIZE // (1024 * 1024),
+                        help="Megabytes read at a time; memory use is about twice this.")
+    parser.add_argument("--json", action="store_true", help="Print the aggregates as JSON.")
+    args = parser.parse_args(argv)
+
+    report = LogReport(top_slow_turns=args.top, idle_gap=args.idle_gap)
+    for path in args.logs:
+        try:
+            report.add_file(path, max(1, args.chunk_mb) * 1024 * 1024)
+        except OSError as e:
+            print(f"Could not read '{path}': {e}", file=sys.stderr)
+            return 1
+    summary = report.summary()
+    if args.json:
+        print(json.dumps(summary, indent=2))
+    else:
+        for line in format_summary(summary):
+            print(line)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
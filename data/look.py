@@ -1,12 +1,17 @@
 import curses
 import logging
-from constants import COLOR_TABLE, TERRAIN_SYMBOLS
+from constants import COLOR_TABLE, TERRAIN_TYPES, wait_for_key
+from entities import ITEM, MONSTER, TYPE, POSITION
+from tables import ITEM_TYPES, ITEM_KIND, MONSTER_TYPES
 from renderer import get_terrain_color
 
+LOOK_INFO_WIDTH = 40  # Info lines are padded to this width so each one covers the last
+
 def look_mode(stdscr, room, renderer, player):
     """
     Allows the player to move a yellow 'X' around the room to inspect.
-    Press 'l' to deactivate look mode.
+    Press 'l' to deactivate look mode, or 't' to travel to the highlighted cell.
+    :return: (x, y) travel target, or None.
     """
     look_x, look_y = player.x, player.y
     look_color = curses.color_pair(COLOR_TABLE.get("border_green", 8))
@@ -22,108 +27,113 @@ def look_mode(stdscr, room, renderer, player):
         ord('3'): (1, 1),
     }
 
-    while True:
-        stdscr.clear()
+    # Nothing moves while looking: draw the world once, then each step only redraws the
+    # cell the cursor leaves, the cursor and the info panel
+    stdscr.clear()
+    renderer.render_game_area(stdscr, player, room)
+    lookups = renderer.cell_lookups(room)
+    cell_index = build_cell_index(room)
+    info_lines = 0
 
+    while True:
         look_x = max(0, min(look_x, room.grid_width - 1))
         look_y = max(0, min(look_y, room.grid_height - 1))
 
-        renderer.render_game_area(stdscr, player, room)
-
         # Highlight look position
         try:
             stdscr.addstr(look_y, look_x, "X", look_color)
         except curses.error:
             logging.warning(f"Failed to render look indicator at ({look_x}, {look_y}).")
 
-        render_look_info(stdscr, room, look_x, look_y, renderer)
+        info_lines = render_look_info(stdscr, room, look_x, look_y, renderer, cell_index, info_lines)
 
         stdscr.refresh()
 
-        key = stdscr.getch()
+        key = wait_for_key(stdscr)
         if key == ord('l'):
             logging.info("Look mode deactivated.")
-            break
+            return None
+
+        if key == ord('t'):
+            logging.info(f"Travel target chosen in look mode: ({look_x}, {look_y})")
+            return (look_x, look_y)
 
         if key in DIRECTIONS:
+            renderer.restore_cell(stdscr, look_x, look_y, player, room, lookups)
             dx, dy = DIRECTIONS[key]
             look_x += dx
             look_y += dy
             logging.info(f"Look mode moved to: dx={dx}, dy={dy}")
 
-def render_look_info(stdscr, room, look_x, look_y, renderer):
+def build_cell_index(room):
+    """
+    Builds the info panel lines for every occupied cell: items first, then monsters.
+    Reads the type and position columns of the room's item and monster archetypes.
+    :return: Dict from (x, y) to a list of (text, curses attribute).
+    """
+    cell_index = {}
+    for archetype in room.entities.query(ITEM, TYPE, POSITION):
+        columns = archetype.columns
+        for type_id, x, y in zip(columns["type_id"], columns["x"], columns["y"]):
+            # Check the item kind to distinguish between regular items, weapons, and grenades
+            item_type = ITEM_TYPES[type_id]
+            if ITEM_KIND[type_id] == "weapon":
+                display_text = f"Weapon: {item_type.name}"
+                color_key = 9  # or some color key for weapons
+            elif ITEM_KIND[type_id] == "grenade":
+                display_text = f"Grenade: {item_type.name}"
+                color_key = 11  # or some color key for grenades
+            else:
+                display_text = f"Item: {item_type.name}"
+                color_key = 10  # default item color key
+            cell_index.setdefault((x, y), []).append(
+                (display_text, curses.color_pair(COLOR_TABLE.get(item_type.color, color_key)))
+            )
+
+    monster_color = curses.color_pair(COLOR_TABLE.get("monster", 2))
+    for archetype in room.entities.query(MONSTER, TYPE, POSITION):
+        columns = archetype.columns
+        for type_id, x, y in zip(columns["type_id"], columns["x"], columns["y"]):
+            cell_index.setdefault((x, y), []).append((f"Monster: {MONSTER_TYPES[type_id].name}", monster_color))
+    return cell_index
+
+def render_look_info(stdscr, room, look_x, look_y, renderer, cell_index=None, previous_lines=0):
     """
     Displays detailed info about terrain, items, or monsters at look_x, look_y.
+    Lines are padded so they cover the previous cell's info without clearing the screen.
+    :param cell_index: Lookup from build_cell_index(); built here if not given.
+    :param previous_lines: Number of lines the previous call drew; any left over are blanked.
+    :return: Number of lines drawn.
     """
-    info_y = 0
+    if cell_index is None:
+        cell_index = build_cell_index(room)
     sidebar_x = room.grid_width + 2
 
-    # Position
-    try:
-        stdscr.addstr(info_y, sidebar_x, f"Position: ({look_x}, {look_y})", curses.color_pair(COLOR_TABLE.get("border_red", 7)))
-    except curses.error:
-        logging.warning(f"Failed to render position info at ({look_x}, {look_y}).")
-    info_y += 1
+    lines = [(f"Position: ({look_x}, {look_y})", curses.color_pair(COLOR_TABLE.get("border_red", 7)))]
 
     # Terrain details
-    terrain_symbol = room.grid[look_y][look_x]
-    terrain_type = next((t for t, sym in TERRAIN_SYMBOLS.items() if sym == terrain_symbol), None)
-
+    terrain_type = TERRAIN_TYPES.get(room.grid[look_y][look_x])
     if terrain_type:
         terrain_color = get_terrain_color(terrain_type)
-        try:
-            stdscr.addstr(info_y, sidebar_x, f"Terrain: {terrain_type}", curses.color_pair(COLOR_TABLE.get(terrain_color, 6)))
-        except curses.error:
-            logging.warning(f"Failed to render terrain info at ({look_x}, {look_y}).")
-        info_y += 1
+        lines.append((f"Terrain: {terrain_type}", curses.color_pair(COLOR_TABLE.get(terrain_color, 6))))
     else:
+        lines.append(("Terrain: Unknown", curses.color_pair(COLOR_TABLE.get("yellow_message", 15))))
+
+    # Items and monsters at the look position
+    contents = cell_index.get((look_x, look_y))
+    if contents:
+        lines.extend(contents)
+    else:
+        lines.append(("Nothing here...", curses.color_pair(COLOR_TABLE.get("yellow_message", 15))))
+
+    for info_y, (text, color) in enumerate(lines):
         try:
-            stdscr.addstr(info_y, sidebar_x, "Terrain: Unknown", curses.color_pair(COLOR_TABLE.get("yellow_message", 15)))
+            stdscr.addstr(info_y, sidebar_x, text.ljust(LOOK_INFO_WIDTH), color)
         except curses.error:
-            logging.warning(f"Failed to render unknown terrain info at ({look_x}, {look_y}).")
-        info_y += 1
-
-    # Check for items at look position
-    item_found = False
-    weapon_found = False
-    grenade_found = False
-
-    for item in room.items.get_items():
-        if (item.x, item.y) == (look_x, look_y):
-            # Check item_type to distinguish between regular items, weapons, and grenades
-            if item.item_type == "weapon":
-                weapon_found = True
-                display_text = f"Weapon: {item.name}"
-                color_key = 9  # or some color key for weapons
-            elif item.item_type == "grenade":
-                grenade_found = True
-                display_text = f"Grenade: {item.name}"
-                color_key = 11  # or some color key for grenades
-            else:
-                item_found = True
-                display_text = f"Item: {item.name}"
-                color_key = 10  # default item color key
-
-            try:
-                stdscr.addstr(info_y, sidebar_x, display_text, curses.color_pair(COLOR_TABLE.get(item.color, color_key)))
-            except curses.error:
-                logging.warning(f"Failed to render {item.item_type} info: {item.name} at ({look_x}, {look_y}).")
-            info_y += 1
-
-    # Check for monsters
-    monster_found = False
-    for monster in room.monsters:
-        if (monster.x, monster.y) == (look_x, look_y):
-            try:
-                stdscr.addstr(info_y, sidebar_x, f"Monster: {monster.name}", curses.color_pair(COLOR_TABLE.get("monster", 2)))
-            except curses.error:
-                logging.warning(f"Failed to render monster info: {monster.name} at ({look_x}, {look_y}).")
-            info_y += 1
-            monster_found = True
-
-    # If nothing found
-    if not (item_found or weapon_found or grenade_found or monster_found):
+            logging.warning(f"Failed to render look info '{text}' at ({look_x}, {look_y}).")
+    for info_y in range(len(lines), previous_lines):
         try:
-            stdscr.addstr(info_y, sidebar_x, "Nothing here...", curses.color_pair(COLOR_TABLE.get("yellow_message", 15)))
+            stdscr.addstr(info_y, sidebar_x, " " * LOOK_INFO_WIDTH)
         except curses.error:
-            logging.warning(f"Failed to render 'Nothing here...' at ({look_x}, {look_y}).")
+            logging.warning(f"Failed to clear look info line {info_y}.")
+    return len(lines)
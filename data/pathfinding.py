@@ -0,0 +1,168 @@
+import collections
+import heapq
+import logging
+from terrain import BLOCKS_PLAYER
+
+NEIGHBOUR_OFFSETS = [(-1, -1), (0, -1), (1, -1), (-1, 0), (1, 0), (-1, 1), (0, 1), (1, 1)]
+
+
+def player_can_enter(room, x, y):
+    return 0 <= x < room.grid_width and 0 <= y < room.grid_height and not room.terrain.flags[y * room.grid_width + x] & BLOCKS_PLAYER
+
+
+def monster_positions(room):
+    return set(room.monster_positions())
+
+
+def find_path(room, start, goal, occupied=None):
+    """
+    A* search over the room's passable cells with 8-way moves.
+    Cells occupied by monsters are avoided unless they are the goal.
+    :param room: Room to search.
+    :param start: (x, y) start position.
+    :param goal: (x, y) destination.
+    :param occupied: Optional set of blocked positions (defaults to monster positions).
+    :return: List of positions after start up to and including goal, or None.
+    """
+    if start == goal:
+        return []
+    if occupied is None:
+        occupied = monster_positions(room)
+    goal_x, goal_y = goal
+
+    open_heap = [(0, 0, start)]
+    came_from = {start: None}
+    cost = {start: 0}
+    while open_heap:
+        _, steps, current = heapq.heappop(open_heap)
+        if current == goal:
+            break
+        if steps > cost[current]:
+            continue
+        cx, cy = current
+        for dx, dy in NEIGHBOUR_OFFSETS:
+            nx, ny = cx + dx, cy + dy
+            neighbour = (nx, ny)
+            if not player_can_enter(room, nx, ny):
+                continue
+            if neighbour in occupied and neighbour != goal:
+                continue
+            new_cost = steps + 1
+            if new_cost < cost.get(neighbour, new_cost + 1):
+                cost[neighbour] = new_cost
+                came_from[neighbour] = current
+                heuristic = max(abs(goal_x - nx), abs(goal_y - ny))
+                heapq.heappush(open_heap, (new_cost + heuristic, new_cost, neighbour))
+    else:
+        return None
+
+    if goal not in came_from:
+        return None
+    path = []
+    node = goal
+    while node != start:
+        path.append(node)
+        node = came_from[node]
+    path.reverse()
+    return path
+
+
+def find_nearest(room, start, goals, occupied=None):
+    """
+    Breadth-first search for the closest of several goals.
+    :param goals: Set of (x, y) positions.
+    :return: (goal, path) or (None, None) if none is reachable.
+    """
+    if not goals:
+        return None, None
+    if start in goals:
+        return start, []
+    if occupied is None:
+        occupied = monster_positions(room)
+
+    came_from = {start: None}
+    queue = collections.deque([start])
+    while queue:
+        current = queue.popleft()
+        cx, cy = current
+        for dx, dy in NEIGHBOUR_OFFSETS:
+            neighbour = (cx + dx, cy + dy)
+            if neighbour in came_from or not player_can_enter(room, *neighbour):
+                continue
+            if neighbour in goals:
+                came_from[neighbour] = current
+                path = []
+                node = neighbour
+                while node != start:
+                    path.append(node)
+                    node = came_from[node]
+                path.reverse()
+                return neighbour, path
+            if neighbour in occupied:
+                continue
+            came_from[neighbour] = current
+            queue.append(neighbour)
+    return None, None
+
+
+class PathCache:
+    def __init__(self):
+        """
+        Remembers computed paths per (room, goal) and hands them out again for as
+        long as the cells ahead stay passable and unoccupied.
+        """
+        self.paths = {}
+        self.hits = 0
+        self.misses = 0
+
+    def is_valid(self, room, path, occupied):
+        goal = path[-1] if path else None
+        for position in path:
+            if not player_can_enter(room, *position):
+                return False
+            if position in occupied and position != goal:
+                return False
+        return True
+
+    def remaining(self, room, start, goal, occupied):
+        """
+        :return: The cached path from start to goal if it is still usable, else None.
+        """
+        path = self.paths.get((id(room), goal))
+        if path is None:
+            return None
+        if start in path:
+            path = path[path.index(start) + 1:]
+        elif not path or max(abs(path[0][0] - start[0]), abs(path[0][1] - start[1])) > 1:
+            return None
+        if not self.is_valid(room, path, occupied):
+            return None
+        self.paths[(id(room), goal)] = path
+        self.hits += 1
+        return path
+
+    def get_path(self, room, start, goal, occupied=None):
+        """
+        Returns a path from start to goal, reusing the cached one when possible.
+        """
+        if occupied is None:
+            occupied = monster_positions(room)
+        path = self.remaining(room, start, goal, occupied)
+        if path is not None:
+            return path
+        self.misses += 1
+        path = find_path(room, start, goal, occupied)
+        if path is not None:
+            self.paths[(id(room), goal)] = path
+        return path
+
+    def store(self, room, goal, path):
+        self.paths[(id(room), goal)] = path
+
+    def invalidate(self, room=None):
+        if room is None:
+            self.paths.clear()
+            return
+        for key in [key for key in self.paths if key[0] == id(room)]:
+            del self.paths[key]
+        logging.debug("Path cache invalidated for the current room.")
@@ -0,0 +1,218 @@
+import collections
+import curses
+import logging
+import time
+from constants import COLOR_TABLE
+
+# Phases of the main loop shown on the HUD, in display order
+HUD_PHASES = ["render", "sidebar", "flames", "monsters", "input", "weapons"]
+HISTORY_LENGTH = 240  # Turns kept for the rolling percentiles
+
+
+class _PhaseSpan:
+    """
+    Span used while only phases are tracked (see PerfMonitor.track_phases): keeps the
+    phase stack up to date without timing anything.
+    """
+    __slots__ = ("phases", "name")
+
+    def __init__(self, phases, name):
+        self.phases = phases
+        self.name = name
+
+    def __enter__(self):
+        self.phases.append(self.name)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.phases.pop()
+        return False
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("monitor", "name", "start", "top_level")
+
+    def __init__(self, monitor, name):
+        self.monitor = monitor
+        self.name = name
+
+    def __enter__(self):
+        monitor = self.monitor
+        self.top_level = monitor.depth == 0
+        monitor.depth += 1
+        monitor.phases.append(self.name)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed = time.perf_counter() - self.start
+        monitor = self.monitor
+        monitor.depth -= 1
+        monitor.phases.pop()
+        frame = monitor.frame
+        frame[self.name] = frame.get(self.name, 0.0) + elapsed
+        if self.top_level:
+            monitor.frame_total += elapsed
+        return False
+
+
+class PerfMonitor:
+    def __init__(self, history_length=HISTORY_LENGTH):
+        """
+        Collects per-turn timings from named spans.
+        When disabled, span() hands back a shared no-op context manager, so
+        instrumented code only pays for one attribute check and a call.
+        :param history_length: Number of turns kept for rolling statistics.
+        """
+        self.enabled = False
+        self.track_phases = False  # Keep the phase stack even while disabled (for the sampling profiler)
+        self.phases = []           # Names of the open spans, innermost last
+        self.depth = 0
+        self.frame = {}
+        self.frame_total = 0.0
+        self.counters = {}
+        self.gauges = {}
+        self.last_frame = {}
+        self.last_counters = {}
+        self.history = collections.deque(maxlen=history_length)
+        self.phase_history = {phase: collections.deque(maxlen=history_length) for phase in HUD_PHASES}
+
+    def enable(self, enabled=True):
+        self.enabled = enabled
+        self.reset()
+
+    def reset(self):
+        self.depth = 0
+        self.frame = {}
+        self.frame_total = 0.0
+        self.counters = {}
+        self.history.clear()
+        for samples in self.phase_history.values():
+            samples.clear()
+
+    def span(self, name):
+        """
+        Opens a named timing span: `with monitor.span("render"): ...`.
+        Time in nested spans counts towards both the inner and the outer name,
+        but only top-level spans add to the turn total.
+        """
+        if not self.enabled:
+            return _PhaseSpan(self.phases, name) if self.track_phases else _NULL_SPAN
+        return _Span(self, name)
+
+    def count(self, name, amount=1):
+        if self.enabled:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def gauge(self, name, value):
+        if self.enabled:
+            self.gauges[name] = value
+
+    def begin_frame(self):
+        """
+        Starts a turn. Spans closed since the last end_frame() (e.g. keys handled between
+        real-time ticks) are kept and count towards this turn.
+        """
+        self.depth = 0
+
+    def end_frame(self):
+        if not self.enabled:
+            return
+        self.history.append(self.frame_total)
+        for phase, samples in self.phase_history.items():
+            samples.append(self.frame.get(phase, 0.0))
+        self.last_frame = self.frame
+        self.last_counters = self.counters
+        self.frame = {}
+        self.frame_total = 0.0
+        self.counters = {}
+
+    def percentiles(self, samples=None, quantiles=(0.5, 0.95, 0.99)):
+        """
+        :param samples: Sequence of durations; defaults to the turn totals.
+        :return: List of values at the requested quantiles (0.0 when empty).
+        """
+        values = sorted(self.history if samples is None else samples)
+        if not values:
+            return [0.0 for _ in quantiles]
+        last = len(values) - 1
+        return [values[min(last, int(q * len(values)))] for q in quantiles]
+
+
+# Shared monitor used by the game; modules instrument through span()/count()
+monitor = PerfMonitor()
+
+
+def span(name):
+    return monitor.span(name)
+
+
+def count(name, amount=1):
+    monitor.count(name, amount)
+
+
+class CountingScreen:
+    """
+    Wraps the curses window while the HUD is on to count writes per frame.
+    """
+
+    def __init__(self, stdscr, perf_monitor=monitor):
+        self._stdscr = stdscr
+        self._monitor = perf_monitor
+
+    def addstr(self, *args):
+        self._monitor.count("writes")
+        return self._stdscr.addstr(*args)
+
+    def addch(self, *args):
+        self._monitor.count("writes")
+        return self._stdscr.addch(*args)
+
+    def __getattr__(self, name):
+        return getattr(self._stdscr, name)
+
+
+def render_perf_hud(stdscr, perf_monitor=monitor, x=1, y=1):
+    """
+    Draws the timing overlay on top of the game area.
+    """
+    width = 44
+    color = curses.color_pair(COLOR_TABLE.get("yellow_message", 15))
+    p50, p95, p99 = perf_monitor.percentiles()
+    last_total = perf_monitor.history[-1] if perf_monitor.history else 0.0
+
+    lines = [
+        "PERF (ms)        last    p50    p95    p99",
+        f"turn        {last_total * 1000:7.2f}{p50 * 1000:7.2f}{p95 * 1000:7.2f}{p99 * 1000:7.2f}",
+    ]
+    for phase in HUD_PHASES:
+        samples = perf_monitor.phase_history[phase]
+        last = samples[-1] if samples else 0.0
+        phase_p50, phase_p95, phase_p99 = perf_monitor.percentiles(samples)
+        lines.append(f"{phase:<12}{last * 1000:7.2f}{phase_p50 * 1000:7.2f}{phase_p95 * 1000:7.2f}{phase_p99 * 1000:7.2f}")
+    lines.append(
+        f"monsters {perf_monitor.gauges.get('monsters', 0):<5} "
+        f"flames {perf_monitor.gauges.get('flames', 0):<5} "
+        f"writes {perf_monitor.last_counters.get('writes', 0)}"
+    )
+    if "frame_bytes" in perf_monitor.gauges:  # Only set by the ANSI backend
+        lines.append(f"frame bytes {perf_monitor.gauges['frame_bytes']}")
+
+    for offset, line in enumerate(lines):
+        try:
+            stdscr.addstr(y + offset, x, line[:width].ljust(width), color | curses.A_REVERSE)
+        except curses.error:
+            logging.warning("Failed to render performance HUD line.")
@@ -1,11 +1,8 @@
 import logging
 import curses
-from constants import COLOR_TABLE, WEAPON_TABLE, ITEM_TABLE, TERRAIN_SYMBOLS
-from weapons.flamethrower import fire_flamethrower
-from grenades.frag import throw_frag_grenade
-from weapons.rpg import fire_rpg
-from grenades.molitov import throw_molitov
-from weapons.bullet import render_bullet  # For the Bullet weapon
+from constants import COLOR_TABLE, WEAPON_TABLE, ITEM_TABLE, TERRAIN_SYMBOLS, animation_pause
+from terrain import BLOCKS_PLAYER, BLOCKS_GRENADES, DAMAGING
+# Weapon and grenade modules are imported where they are first used, keeping them off the startup path
 
 class Player:
     def __init__(self, x, y, room_manager):
@@ -23,6 +20,8 @@ class Player:
         self.max_health = 100
         self.armor = 50
         self.max_armor = 100
+        self.damage_taken = 0  # Total incoming damage before armor, for run statistics
+        self.cause_of_death = None  # Name of whatever dealt the killing blow
         self.weapon = "Pistol"
         self.weapon_ammo = WEAPON_TABLE.get(self.weapon, {}).get("ammo", WEAPON_TABLE.get("Pistol", {}).get("ammo", 0))
 
@@ -56,7 +55,7 @@ class Player:
 
         if 0 <= new_x < room.grid_width and 0 <= new_y < room.grid_height:
             # Check if a monster is in the target position
-            monster_in_position = next((m for m in room.monsters if m.x == new_x and m.y == new_y), None)
+            monster_in_position = room.monster_at(new_x, new_y)
 
             if monster_in_position:
                 # Swap positions with the monster
@@ -66,15 +65,14 @@ class Player:
                 return f"Swapped positions with {monster_in_position.name}.", 0
 
             # Check terrain and other rules for movement
-            terrain_symbol = room.grid[new_y][new_x]
-            if terrain_symbol not in ["#", "T", "S", "~"]:  # Impassable terrain
-                room.grid[self.y][self.x] = TERRAIN_SYMBOLS.get("grass", ".")
+            if not room.terrain.flags[new_y * room.grid_width + new_x] & BLOCKS_PLAYER:
+                room.restore_terrain(self.x, self.y)
                 self.x, self.y = new_x, new_y
-                room.grid[self.y][self.x] = "@"
+                room.terrain.set(self.x, self.y, "@")
                 logging.info(f"Player moved to ({self.x}, {self.y}) in room ({room.x}, {room.y}).")
                 return f"Moved to ({self.x}, {self.y}).", 0
 
-            logging.debug(f"Blocked by terrain '{terrain_symbol}' at ({new_x}, {new_y}).")
+            logging.debug(f"Blocked by terrain '{room.grid[new_y][new_x]}' at ({new_x}, {new_y}).")
             return "Movement blocked by terrain.", 0
         else:
             # Trigger room transition
@@ -112,7 +110,7 @@ class Player:
             logging.debug("Attempted to go below floor 0.")
             return ("You are already on the lowest floor.", 0, room)
 
-        staircase_coords = self.room_manager.floor_staircases.get(new_floor)
+        staircase_coords = self.room_manager.assign_staircase(new_floor)
         if not staircase_coords:
             logging.error(f"No staircase for floor {new_floor}.")
             return (f"No staircase found for floor {new_floor}.", 0, room)
@@ -126,19 +124,15 @@ class Player:
             return ("Staircase position not found in the new room.", 0, room)
 
         # Clear old pos
-        room.grid[self.y][self.x] = TERRAIN_SYMBOLS.get("grass", ".")
+        room.restore_terrain(self.x, self.y)
         self.floor = new_floor
         self.x, self.y = staircase_pos
-        new_room.grid[self.y][self.x] = "@"
+        new_room.terrain.set(self.x, self.y, "@")
         logging.info(f"Player moved {direction} to floor {self.floor}. Coords: ({self.x}, {self.y}) in room ({new_room.x}, {new_room.y}).")
         return (f"Moved {direction} to floor {self.floor}.", 0, new_room)
 
     def find_staircase_position(self, room):
-        for y in range(room.grid_height):
-            for x in range(room.grid_width):
-                if room.grid[y][x] == "S":
-                    return (x, y)
-        return None
+        return room.staircase_position
 
     def fire_weapon(self, direction, room, stdscr):
         """
@@ -159,13 +153,17 @@ class Player:
         message = ""
 
         if weapon_name == "Pistol":
+            from weapons.bullet import render_bullet
             kills = render_bullet(stdscr, self.x, self.y, direction, room)
+            self.kill_stats["weapons"]["Pistol"] += kills
             message = f"Fired {weapon_name}! Ammo: {self.weapon_ammo}"
         elif weapon_name == "Flamethrower":
-            kills = fire_flamethrower(self.x, self.y, direction, room)
+            from weapons.flamethrower import fire_flamethrower
+            kills = fire_flamethrower(stdscr, self.x, self.y, direction, room)
             self.kill_stats["weapons"]["Flamethrower"] += kills
             message = f"Fired Flamethrower! Kills: {kills}"
         elif weapon_name == "RPG":
+            from weapons.rpg import fire_rpg
             kills = fire_rpg(self.x, self.y, direction, room)
             self.kill_stats["weapons"]["RPG"] += kills
             message = f"Fired RPG! Kills: {kills}"
@@ -192,7 +190,11 @@ class Player:
             logging.debug(f"Invalid weapon index: {index}")
             return ("Invalid weapon selection.", False)
 
-    def take_damage(self, damage):
+    def take_damage(self, damage, source=None):
+        """
+        :param source: Name of the attacker, kept as the cause of death if this hit is fatal.
+        """
+        self.damage_taken += damage
         effective_damage = max(damage - self.armor, 0)
         self.armor = max(self.armor - damage, 0)
         self.health = max(self.health - effective_damage, 0)
@@ -207,9 +209,15 @@ class Player:
         if is_dead:
             message += " You have been defeated!"
             logging.info("Player has been defeated.")
+            if self.cause_of_death is None:
+                self.cause_of_death = source
         return (message, is_dead)
 
     def update_kill_stats(self, kills):
+        """
+        Credits kills to the equipped weapon. Weapons and grenades already record
+        their own kills in fire_weapon/use_grenade; this is for other kill sources.
+        """
         if self.weapon in self.kill_stats["weapons"]:
             self.kill_stats["weapons"][self.weapon] += kills
         if kills > 0:
@@ -254,9 +262,6 @@ class Player:
         # Starting position for animation is player position
         gx, gy = self.x, self.y
 
-        # Define impassable terrain
-        impassable_terrain = ["#", "T", "S", "~"]
-
         # Animate the grenade traveling up to 6 steps
         steps = 6
         final_x, final_y = self.x, self.y  # Where it ends up
@@ -282,7 +287,7 @@ class Player:
                 logging.debug(f"Failed to render grenade at ({gx}, {gy}).")
 
             stdscr.refresh()
-            curses.napms(100)  # Small delay for animation
+            animation_pause(100)  # Small delay for animation
 
             # Restore the original cell content
             try:
@@ -292,13 +297,9 @@ class Player:
 
             # Now check if this cell has a monster or is impassable terrain
             # Check for monster presence
-            hit_monster = False
-            for monster in room.monsters:
-                if monster.x == gx and monster.y == gy:
-                    hit_monster = True
-                    break
+            hit_monster = room.monster_at(gx, gy) is not None
 
-            if hit_monster or original_char in impassable_terrain:
+            if hit_monster or room.terrain.flags[gy * room.grid_width + gx] & BLOCKS_GRENADES:
                 # Grenade hits something and stops here
                 final_x, final_y = gx, gy
                 break
@@ -309,10 +310,12 @@ class Player:
         # After animation/hit detection, the grenade lands at (final_x, final_y)
         # Trigger the actual grenade effect
         if grenade_type == "Frag Grenade":
+            from grenades.frag import throw_frag_grenade
             kills = throw_frag_grenade(stdscr, final_x, final_y, direction, room)
             self.kill_stats["grenades"]["Frag Grenade"] += kills
             message = f"Thrown Frag Grenade! Kills: {kills}"
         elif grenade_type == "Molitov Cocktail":
+            from grenades.molitov import throw_molitov
             kills = throw_molitov(stdscr, final_x, final_y, direction, room)
             self.kill_stats["grenades"]["Molitov Cocktail"] += kills
             message = f"Thrown Molitov Cocktail! Kills: {kills}"
@@ -330,8 +333,7 @@ class Player:
         :param room: The current Room object.
         :return: (message, kills) or possibly (message, kills, new_room) if item triggers room change.
         """
-        cell_char = room.grid[self.y][self.x]
-        if cell_char in ["^", "~"]:
+        if room.terrain.flags[self.y * room.grid_width + self.x] & DAMAGING:
             return ("No item here.", 0)
 
         items_here = [item for item in room.items.get_items() if (item.x, item.y) == (self.x, self.y)]
@@ -0,0 +1,168 @@
+import collections
+import logging
+import marshal
+import os
+import sys
+import threading
+import time
+from perf import monitor
+
+# Profiling for whole sessions: python3 game.py --profile PREFIX (or replay.py --profile).
+# "cprofile" mode runs cProfile and the stack sampler together; "sample" mode runs only
+# the sampler, which costs little enough for ordinary play. Either way PREFIX.pstats
+# (for pstats, snakeviz, ...) and PREFIX.collapsed (for flamegraph.pl, speedscope, ...)
+# are written on exit.
+#
+# Every sample is tagged with the innermost perf span open at the time (render, monsters,
+# flames, weapons, generation, ...), which becomes the root frame of its collapsed stack
+# and lets a flame graph be split by game phase.
+
+PROFILE_MODES = ("cprofile", "sample")
+DEFAULT_SAMPLE_INTERVAL = 0.005  # Seconds between samples
+UNTAGGED_PHASE = "other"         # Samples taken outside every span (e.g. waiting for a key)
+
+
+def frame_key(code):
+    """
+    :return: The (file, line, function) key pstats uses for a code object.
+    """
+    return (code.co_filename, code.co_firstlineno, code.co_name)
+
+
+def frame_label(code):
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}"
+
+
+class StackSampler:
+    def __init__(self, thread_id=None, interval=DEFAULT_SAMPLE_INTERVAL):
+        """
+        Samples one thread's Python stack from a background thread at a fixed interval.
+        :param thread_id: Thread to sample (default: the calling thread).
+        :param interval: Seconds between samples.
+        """
+        self.thread_id = threading.get_ident() if thread_id is None else thread_id
+        self.interval = interval
+        self.stacks = collections.Counter()  # (phase, code objects root first) -> samples
+        self.samples = 0
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    def start(self):
+        monitor.track_phases = True
+        self.thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join()
+        monitor.track_phases = False
+
+    def _run(self):
+        phases = monitor.phases
+        current_frames = sys._current_frames
+        while not self.stop_event.wait(self.interval):
+            frame = current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            phase = phases[-1:]  # A slice, so a span closing meanwhile cannot raise
+            codes = []
+            while frame is not None:
+                codes.append(frame.f_code)
+                frame = frame.f_back
+            codes.reverse()
+            self.stacks[(phase[0] if phase else UNTAGGED_PHASE, tuple(codes))] += 1
+            self.samples += 1
+
+    def collapsed(self):
+        """
+        :return: Lines "phase;file.py:function;... count", root first, heaviest stacks first.
+        """
+        folded = collections.Counter()
+        for (phase, codes), samples in self.stacks.items():
+            folded[";".join([phase] + [frame_label(code) for code in codes])] += samples
+        return [f"{stack} {samples}" for stack, samples in folded.most_common()]
+
+    def phase_totals(self):
+        totals = collections.Counter()
+        for (phase, _), samples in self.stacks.items():
+            totals[phase] += samples
+        return totals
+
+    def pstats_dict(self):
+        """
+        :return: The samples in the marshal format pstats.Stats() loads. Times are samples
+                 times the interval; call counts are the number of samples a function was
+                 on the stack in, as the sampler cannot see calls.
+        """
+        stats = {}
+        for (_, codes), samples in self.stacks.items():
+            seconds = samples * self.interval
+            seen = set()
+            for depth, code in enumerate(codes):
+                key = frame_key(code)
+                entry = stats.setdefault(key, [0, 0, 0.0, 0.0, {}])
+                if key not in seen:  # Recursion counts once towards the inclusive time
+                    seen.add(key)
+                    entry[0] += samples
+                    entry[1] += samples
+                    entry[3] += seconds
+                if depth == len(codes) - 1:
+                    entry[2] += seconds
+                if depth:
+                    caller = frame_key(codes[depth - 1])
+                    cc, nc, tt, ct = entry[4].get(caller, (0, 0, 0.0, 0.0))
+                    own = seconds if depth == len(codes) - 1 else 0.0
+                    entry[4][caller] = (cc + samples, nc + samples, tt + own, ct + seconds)
+        return {key: tuple(entry) for key, entry in stats.items()}
+
+
+def profile_call(prefix, function, *args, mode="cprofile", interval=DEFAULT_SAMPLE_INTERVAL):
+    """
+    Calls function(*args) under the profiler and writes PREFIX.pstats and PREFIX.collapsed,
+    also when the function raises or exits.
+    :param prefix: Output path without extension.
+    :param mode: "cprofile" (exact call counts and times) or "sample" (low overhead).
+    :param interval: Seconds between stack samples.
+    :return: What function returned.
+    """
+    if mode not in PROFILE_MODES:
+        raise ValueError(f"Unknown profile mode '{mode}'; expected one of {', '.join(PROFILE_MODES)}.")
+    profiler = None
+    if mode == "cprofile":
+        import cProfile
+        profiler = cProfile.Profile()
+    sampler = StackSampler(interval=interval)
+    logging.info(f"Profiling ({mode}, sampling every {interval * 1000:.1f} ms) to {prefix}.pstats and {prefix}.collapsed.")
+    started = time.perf_counter()
+    sampler.start()
+    if profiler:
+        profiler.enable()
+    try:
+        return function(*args)
+    finally:
+        if profiler:
+            profiler.disable()
+        sampler.stop()
+        elapsed = time.perf_counter() - started
+        write_profile(prefix, sampler, profiler)
+        totals = sampler.phase_totals()
+        summary = ", ".join(f"{phase} {samples / sampler.samples:.0%}" for phase, samples in totals.most_common()) \
+            if sampler.samples else "no samples"
+        logging.info(f"Profile written after {elapsed:.1f}s: {sampler.samples} sample(s); by phase: {summary}.")
+
+
+def write_profile(prefix, sampler, profiler=None):
+    """
+    Writes PREFIX.pstats (from cProfile if it ran, else from the samples) and PREFIX.collapsed.
+    """
+    directory = os.path.dirname(prefix)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    if profiler is not None:
+        profiler.dump_stats(f"{prefix}.pstats")
+    else:
+        with open(f"{prefix}.pstats", "wb") as output:
+            marshal.dump(sampler.pstats_dict(), output)
+    with open(f"{prefix}.collapsed", "w") as output:
+        output.writelines(line + "\n" for line in sampler.collapsed())
@@ -0,0 +1,137 @@
+import curses
+import logging
+import time
+from perf import span
+
+DEFAULT_TICK_RATE = 4      # Simulation ticks per second
+DEFAULT_FRAME_RATE = 30    # Maximum rendered frames per second
+MAX_CATCH_UP_TICKS = 5     # Ticks run back to back before the backlog is dropped
+
+
+def positive_rate(text):
+    """
+    argparse type for --tick-rate and --fps: a number of times per second above zero.
+    """
+    import argparse
+    try:
+        rate = float(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"'{text}' is not a number.")
+    if not rate > 0:  # Also rejects nan
+        raise argparse.ArgumentTypeError(f"{text} must be above zero.")
+    return rate
+
+
+class FramePacer:
+    def __init__(self, tick_rate=DEFAULT_TICK_RATE, frame_rate=DEFAULT_FRAME_RATE,
+                 max_catch_up=MAX_CATCH_UP_TICKS, clock=time.perf_counter):
+        """
+        Schedules fixed-rate simulation ticks and capped-rate frames.
+        :param tick_rate: Simulation ticks per second.
+        :param frame_rate: Maximum frames per second.
+        :param max_catch_up: Most ticks run in one go when the loop falls behind.
+        :param clock: Monotonic clock returning seconds.
+        """
+        if not (tick_rate > 0 and frame_rate > 0):
+            raise ValueError(f"Tick rate and frame rate must be above zero (got {tick_rate} and {frame_rate}).")
+        self.tick_interval = 1.0 / tick_rate
+        self.frame_interval = 1.0 / frame_rate
+        self.max_catch_up = max_catch_up
+        self.clock = clock
+        now = clock()
+        self.next_tick = now  # The first tick runs immediately
+        self.next_frame = now
+        self.dropped_ticks = 0
+
+    def due_ticks(self):
+        """
+        :return: Number of simulation ticks to run now (at most max_catch_up).
+        """
+        now = self.clock()
+        if now < self.next_tick:
+            return 0
+        behind = int((now - self.next_tick) / self.tick_interval) + 1
+        ticks = min(behind, self.max_catch_up)
+        if behind > ticks:
+            # Too far behind: drop the rest of the backlog instead of spiralling
+            self.dropped_ticks += behind - ticks
+            self.next_tick = now + self.tick_interval
+        else:
+            self.next_tick += ticks * self.tick_interval
+        return ticks
+
+    def pause(self, seconds):
+        """
+        Shifts the tick schedule forward, e.g. by the time spent waiting in a prompt.
+        """
+        self.next_tick += seconds
+
+    def frame_due(self):
+        return self.clock() >= self.next_frame
+
+    def frame_drawn(self):
+        now = self.clock()
+        self.next_frame += self.frame_interval
+        if self.next_frame < now:
+            # Frames are never caught up, only the simulation is
+            self.next_frame = now + self.frame_interval
+
+    def wait_milliseconds(self, frame_pending):
+        """
+        Time the input wait may block before the next tick (or pending frame) is due.
+        Always at least 1 ms, so an idle game sleeps in getch() instead of spinning.
+        """
+        deadline = self.next_tick
+        if frame_pending:
+            deadline = min(deadline, self.next_frame)
+        return max(1, int((deadline - self.clock()) * 1000))
+
+
+def run_realtime(session, tick_rate=DEFAULT_TICK_RATE, frame_rate=DEFAULT_FRAME_RATE):
+    """
+    Runs a GameSession with monsters and flames advancing on a fixed-rate clock
+    instead of once per key press. Input is polled with a timeout, frames are
+    drawn at most frame_rate times per second and only when something changed.
+    Prompts (grenades, look mode) block as usual and pause the clock.
+    :param session: A GameSession.
+    :return: None when the player quits or dies.
+    """
+    stdscr = session.stdscr
+    pacer = FramePacer(tick_rate, frame_rate)
+    frame_pending = True
+    logging.info(f"Real-time mode: {tick_rate} ticks/s, up to {frame_rate} frames/s.")
+
+    while True:
+        for _ in range(pacer.due_ticks()):
+            session.begin_turn()
+            alive = session.update_world(refresh=False)
+            session.end_turn()
+            frame_pending = True
+            if not alive:
+                session.render()
+                stdscr.timeout(-1)
+                session.renderer.display_game_over(stdscr)
+                curses.napms(3000)
+                return
+
+        if frame_pending and pacer.frame_due():
+            session.render()
+            stdscr.refresh()
+            pacer.frame_drawn()
+            frame_pending = False
+
+        stdscr.timeout(pacer.wait_milliseconds(frame_pending))
+        key = stdscr.getch()
+        if key == -1:
+            continue
+
+        stdscr.timeout(-1)  # Prompts opened by this key wait for input
+        started = pacer.clock()
+        # Keys come between ticks: the span counts towards the next tick's HUD frame
+        with span("input"):
+            keep_playing = session.handle_key(key)
+        if not keep_playing:
+            return
+        # Time spent in prompts and weapon animations is not simulated after the fact
+        pacer.pause(pacer.clock() - started)
+        frame_pending = True
@@ -0,0 +1,272 @@
+import argparse
+import json
+import logging
+import queue
+import struct
+import sys
+import threading
+import time
+import zlib
+from framebuffer import AnsiEncoder, ANSI_CLEAR, ANSI_RESET, BLANK
+
+# Session recording: the screen cells that changed in each frame, with timestamps.
+# Header (uncompressed): magic, format version, screen width and height.
+# Body (a zlib stream): one record per frame, a frame header followed by runs of
+# changed cells that share an attribute.
+RECORDING_MAGIC = b"ZRR1"
+RECORDING_VERSION = 1
+HEADER = struct.Struct("<4sHHH")
+FRAME = struct.Struct("<IH")   # milliseconds since the start, number of runs
+RUN = struct.Struct("<HHIH")   # first cell index, cell count, curses attr, text length in bytes
+
+DEFAULT_QUEUE_FRAMES = 256     # Frames waiting for the writer thread before frames are skipped
+FLUSH_INTERVAL = 5.0           # Seconds between sync flushes, so a crashed session stays readable
+READ_CHUNK = 64 * 1024
+
+
+class RecordingError(Exception):
+    pass
+
+
+def changed_runs(previous_chars, previous_attrs, chars, attrs, width):
+    """
+    :return: List of (index, text, attr) runs of consecutive changed cells with the same attr.
+    """
+    runs = []
+    for start in range(0, len(chars), width):
+        end = start + width
+        if chars[start:end] == previous_chars[start:end] and attrs[start:end] == previous_attrs[start:end]:
+            continue
+        run_start = None
+        run_attr = None
+        for index in range(start, end):
+            changed = chars[index] != previous_chars[index] or attrs[index] != previous_attrs[index]
+            if run_start is not None and (not changed or attrs[index] != run_attr):
+                runs.append((run_start, "".join(chars[run_start:index]), run_attr))
+                run_start = None
+            if changed and run_start is None:
+                run_start, run_attr = index, attrs[index]
+        if run_start is not None:
+            runs.append((run_start, "".join(chars[run_start:end]), run_attr))
+    return runs
+
+
+class SessionRecorder:
+    def __init__(self, path, width, height, queue_frames=DEFAULT_QUEUE_FRAMES, clock=time.perf_counter):
+        """
+        Records frames from a MirrorScreen. The game thread only copies the cell buffer
+        into a queue; a writer thread works out the changed cells and compresses them.
+        If the writer falls behind, frames are skipped rather than blocking the game:
+        the next frame written still contains every cell changed since the last one, and
+        close() writes the newest skipped frame if no frame came after it.
+        :param path: Output file path.
+        :param width: Screen width.
+        :param height: Screen height.
+        """
+        self.path = path
+        self.width = width
+        self.height = height
+        self.clock = clock
+        self.started = clock()
+        self.queue = queue.Queue(maxsize=queue_frames)
+        self.frames_written = 0
+        self.frames_skipped = 0
+        self.skipped_frame = None  # Newest skipped frame, until a later one is queued
+        self.bytes_written = 0
+        self.file = open(path, "wb")
+        self.file.write(HEADER.pack(RECORDING_MAGIC, RECORDING_VERSION, width, height))
+        self.compressor = zlib.compressobj(6)
+        self.thread = threading.Thread(target=self._write_frames, name="session-recorder", daemon=True)
+        self.thread.start()
+        logging.info(f"Recording session frames to '{path}'.")
+
+    def on_frame(self, framebuffer):
+        """
+        Frame listener for MirrorScreen, called on the game thread.
+        """
+        milliseconds = int((self.clock() - self.started) * 1000)
+        frame = milliseconds, framebuffer.chars[:], framebuffer.attrs[:]
+        try:
+            self.queue.put_nowait(frame)
+            self.skipped_frame = None
+        except queue.Full:
+            self.frames_skipped += 1
+            self.skipped_frame = frame
+
+    def _write_frames(self):
+        previous_chars = [BLANK] * (self.width * self.height)
+        previous_attrs = [0] * (self.width * self.height)
+        last_flush = self.clock()
+        while True:
+            frame = self.queue.get()
+            if frame is None:
+                break
+            milliseconds, chars, attrs = frame
+            runs = changed_runs(previous_chars, previous_attrs, chars, attrs, self.width)
+            previous_chars, previous_attrs = chars, attrs
+            if not runs:
+                continue
+
+            parts = [FRAME.pack(milliseconds, len(runs))]
+            for index, text, attr in runs:
+                data = text.encode("utf-8")
+                parts.append(RUN.pack(index, len(text), attr & 0xffffffff, len(data)))
+                parts.append(data)
+            self._write(self.compressor.compress(b"".join(parts)))
+            self.frames_written += 1
+
+            if self.clock() - last_flush >= FLUSH_INTERVAL:
+                self._write(self.compressor.flush(zlib.Z_SYNC_FLUSH))
+                self.file.flush()
+                last_flush = self.clock()
+
+    def _write(self, data):
+        if data:
+            self.file.write(data)
+            self.bytes_written += len(data)
+
+    def close(self):
+        if self.file.closed:
+            return
+        if self.skipped_frame is not None:
+            # The recording would otherwise end on the last frame queued, not the final screen
+            self.queue.put(self.skipped_frame)
+            self.frames_skipped -= 1
+            self.skipped_frame = None
+        self.queue.put(None)
+        self.thread.join()
+        self._write(self.compressor.flush())
+        self.file.close()
+        logging.info(f"Session recording '{self.path}' closed: {self.frames_written} frame(s), "
+                     f"{self.frames_skipped} skipped, {self.bytes_written + HEADER.size} byte(s).")
+
+
+def read_recording(path):
+    """
+    Reads a recording written by SessionRecorder.
+    :return: (width, height, frames) where frames is a generator of
+             (milliseconds, [(index, text, attr), ...]).
+    """
+    recording_file = open(path, "rb")
+    header = recording_file.read(HEADER.size)
+    if len(header) < HEADER.size:
+        recording_file.close()
+        raise RecordingError(f"'{path}' is too short to be a session recording.")
+    magic, version, width, height = HEADER.unpack(header)
+    if magic != RECORDING_MAGIC or version != RECORDING_VERSION:
+        recording_file.close()
+        raise RecordingError(f"'{path}' is not a version {RECORDING_VERSION} session recording.")
+
+    def frames():
+        decompressor = zlib.decompressobj()
+        buffer = b""
+        offset = 0
+        with recording_file:
+            while True:
+                chunk = recording_file.read(READ_CHUNK)
+                if chunk:
+                    buffer = buffer[offset:] + decompressor.decompress(chunk)
+                    offset = 0
+                elif not buffer[offset:]:
+                    return
+                # Decode every complete frame in the buffer
+                while True:
+                    if len(buffer) - offset < FRAME.size:
+                        break
+                    milliseconds, run_count = FRAME.unpack_from(buffer, offset)
+                    position = offset + FRAME.size
+                    runs = []
+                    for _ in range(run_count):
+                        if len(buffer) - position < RUN.size:
+                            break
+                        index, length, attr, size = RUN.unpack_from(buffer, position)
+                        position += RUN.size
+                        if len(buffer) - position < size:
+                            break
+                        runs.append((index, buffer[position:position + size].decode("utf-8"), attr))
+                        position += size
+                    if len(runs) < run_count:
+                        break  # Frame continues in the next chunk
+                    offset = position
+                    yield milliseconds, runs
+                if not chunk:
+                    return  # Truncated final frame
+
+    return width, height, frames()
+
+
+def export_asciicast(path, output_path, title=None, idle_limit=None):
+    """
+    Converts a recording to an asciicast v2 file (playable with asciinema).
+    :param idle_limit: Optional cap in seconds on pauses between frames.
+    :return: Number of frames exported.
+    """
+    width, height, frames = read_recording(path)
+    encoder = AnsiEncoder(width)
+    header = {"version": 2, "width": width, "height": height, "timestamp": int(time.time())}
+    if title:
+        header["title"] = title
+
+    count = 0
+    elapsed = 0.0
+    last_ms = None
+    with open(output_path, "w", encoding="utf-8") as cast:
+        cast.write(json.dumps(header) + "\n")
+        for milliseconds, runs in frames:
+            gap = 0.0 if last_ms is None else (milliseconds - last_ms) / 1000
+            if idle_limit is not None:
+                gap = min(gap, idle_limit)
+            elapsed += gap
+            last_ms = milliseconds
+
+            parts = [ANSI_CLEAR] if count == 0 else []
+            for index, text, attr in runs:
+                parts.append(f"\x1b[{index // width + 1};{index % width + 1}H")
+                parts.append(encoder.sgr(attr))
+                parts.append(text)
+            parts.append(ANSI_RESET)
+            cast.write(json.dumps([round(elapsed, 3), "o", "".join(parts)]) + "\n")
+            count += 1
+    return count
+
+
+def describe_recording(path):
+    width, height, frames = read_recording(path)
+    count = 0
+    cells = 0
+    last_ms = 0
+    for milliseconds, runs in frames:
+        count += 1
+        cells += sum(len(text) for _, text, _ in runs)
+        last_ms = milliseconds
+    return {"width": width, "height": height, "frames": count, "changed_cells": cells, "seconds": last_ms / 1000}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspect or export Zombierun session recordings.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    info = subparsers.add_parser("info", help="Print frame count, duration and changed cells.")
+    info.add_argument("recording")
+    export = subparsers.add_parser("export", help="Convert to an asciicast v2 file.")
+    export.add_argument("recording")
+    export.add_argument("-o", "--output", help="Output .cast path (default: recording name with .cast).")
+    export.add_argument("--title", help="Title stored in the asciicast header.")
+    export.add_argument("--idle-limit", type=float, default=None, help="Cap pauses between frames (seconds).")
+    args = parser.parse_args(argv)
+
+    try:
+        if args.command == "info":
+            for key, value in describe_recording(args.recording).items():
+                print(f"{key}: {value}")
+        else:
+            output = args.output or args.recording.rsplit(".", 1)[0] + ".cast"
+            count = export_asciicast(args.recording, output, args.title, args.idle_limit)
+            print(f"Exported {count} frame(s) to {output}")
+    except (OSError, RecordingError) as e:
+        print(str(e))
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,19 +1,17 @@
 import curses
 import logging
 import random
-from constants import TERRAIN_SYMBOLS, COLOR_TABLE, WEAPON_TABLE, get_terrain_color
-
-logging.basicConfig(
-    filename='game.log',
-    level=logging.DEBUG,
-    format='%(asctime)s:%(levelname)s:%(message)s'
-)
+from constants import TERRAIN_SYMBOLS, TERRAIN_TYPES, COLOR_TABLE, get_terrain_color
+from entities import POSITION, GLYPH
+from messages import MessageLog
 
 class Sidebar:
     def __init__(self, grid_width, grid_height, sidebar_width=60):
         self.grid_width = grid_width
         self.grid_height = grid_height
         self.sidebar_width = sidebar_width
+        self.message_tail = None  # MessageLog.tail() the message lines were formatted from
+        self.message_lines = []
 
     def render(self, stdscr, player, kill_stats, monster_types, messages):
         # Sidebar positioning
@@ -46,14 +44,16 @@ class Sidebar:
         except curses.error:
             logging.warning("Failed to render sidebar header.")
 
-        def print_line(line_y, content, color):
+        def format_line(content):
+            return f"{tube_vertical} {content[:content_width].ljust(content_width)} {tube_vertical}"
+
+        def print_line(line_y, content, color, line=None):
             """
             Prints a single line of text inside the sidebar.
+            :param line: The already formatted line, if there is one.
             """
-            padded_content = content[:content_width].ljust(content_width)
-            line = f"{tube_vertical} {padded_content} {tube_vertical}"
             try:
-                stdscr.addstr(line_y, x_offset, line, color)
+                stdscr.addstr(line_y, x_offset, line or format_line(content), color)
             except curses.error:
                 logging.warning(f"Failed to render line: {content}")
 
@@ -87,9 +87,13 @@ class Sidebar:
         message_start = self.grid_height - 6  # Reserve the bottom 5 lines for messages
         print_line(message_start, "Messages:", text_color)
         message_index = message_start + 1
-        max_messages = 4
-        for i, message in enumerate(messages[-max_messages:]):  # Show the last few messages
-            print_line(message_index, message, text_color)
+        tail = messages.tail()  # The newest few messages
+        if tail is not self.message_tail:
+            # The visible messages changed: only then are their lines formatted again
+            self.message_tail = tail
+            self.message_lines = [format_line(message) for message in tail]
+        for message, line in zip(tail, self.message_lines):
+            print_line(message_index, message, text_color, line)
             message_index += 1
 
         # Draw Footer
@@ -107,152 +111,149 @@ class Renderer:
         self.grid_width = grid_width
         self.grid_height = grid_height
         self.sidebar = Sidebar(grid_width, grid_height, sidebar_width=60)
-        self.messages = []
+        self.messages = MessageLog()
         self.max_messages = 5
+        # Flame flicker uses its own generator so drawing never shifts the game's random sequence
+        self.flicker_rng = random.Random()
+        self.terrain_attrs = {}  # Grid symbol -> curses attribute
 
     def display_message(self, message):
-        if message:
-            self.messages.append(message)
-            if len(self.messages) > self.max_messages:
-                self.messages.pop(0)
+        """
+        :return: True if the message was shown on a new line, False if it was empty or
+                 repeated the newest line (which then only gets its counter bumped).
+        """
+        return bool(message) and self.messages.add(message)
+
+    def cell_lookups(self, current_room):
+        """
+        :return: (glyphs, flames): a dict from (x, y) to the (symbol, color pair, layer) of
+                 the entity drawn there and the set of burning cells, as used by render_cell.
+                 Built from the position and glyph columns of every entity in the room.
+        """
+        glyphs = {}
+        for archetype in current_room.entities.query(POSITION, GLYPH):
+            columns = archetype.columns
+            for x, y, symbol, color, layer in zip(columns["x"], columns["y"], columns["symbol"], columns["color"], columns["layer"]):
+                shown = glyphs.get((x, y))
+                if shown is None or layer >= shown[2]:
+                    glyphs[(x, y)] = (symbol, color, layer)
+        return glyphs, current_room.fire.positions()
+
+    def terrain_attr(self, cell):
+        """
+        :return: The curses attribute a grid symbol is drawn with (cached per symbol).
+        """
+        attr = self.terrain_attrs.get(cell)
+        if attr is None:
+            color_name = get_terrain_color(TERRAIN_TYPES.get(cell, "grass"))
+            attr = curses.color_pair(COLOR_TABLE.get(color_name, 6))
+            self.terrain_attrs[cell] = attr
+        return attr
 
     def render_game_area(self, stdscr, player, current_room):
         if current_room:
-            monster_positions = {(m.x, m.y): m for m in current_room.monsters}
-            item_positions = {(it.x, it.y): it for it in current_room.items.get_items()}
-            flame_positions = {tuple(f["position"]): f for f in current_room.lingering_flames}
-
+            lookups = self.cell_lookups(current_room)
             for y in range(self.grid_height):
                 for x in range(self.grid_width):
-                    cell = current_room.grid[y][x]
-                    if cell:
-                        terrain_type = next((t for t, s in TERRAIN_SYMBOLS.items() if s == cell), "grass")
-                        color_name = get_terrain_color(terrain_type)
-                        color = curses.color_pair(COLOR_TABLE.get(color_name, 6))
-                        try:
-                            stdscr.addstr(y, x, cell, color)
-                        except curses.error:
-                            logging.error(f"Failed to render terrain at ({x}, {y}).")
-
-                    # Player
-                    if (x, y) == (player.x, player.y):
-                        player_color = curses.color_pair(COLOR_TABLE.get("player", 1))
-                        try:
-                            stdscr.addstr(y, x, "@", player_color)
-                        except curses.error:
-                            logging.error(f"Failed to render player at ({x}, {y}).")
-                        continue
-
-                    # Monster
-                    elif (x, y) in monster_positions:
-                        monster = monster_positions[(x, y)]
-                        monster_color = curses.color_pair(COLOR_TABLE.get(monster.color, 2))
-                        try:
-                            stdscr.addstr(y, x, monster.symbol, monster_color)
-                        except curses.error:
-                            logging.error(f"Failed to render monster {monster.name} at ({x}, {y}).")
-                        continue
-
-                    # Item
-                    elif (x, y) in item_positions:
-                        item = item_positions[(x, y)]
-                        if item.item_type == "weapon":
-                            item_color_name = WEAPON_TABLE.get(item.name, {}).get("color", "fire_orange")
-                            item_color = curses.color_pair(COLOR_TABLE.get(item_color_name, 4))
-                        elif item.item_type == "grenade":
-                            item_color = curses.color_pair(COLOR_TABLE.get("magenta", 12))
-                        else:
-                            item_color = curses.color_pair(COLOR_TABLE.get("yellow_message", 15))
-                        try:
-                            stdscr.addstr(y, x, item.symbol, item_color)
-                        except curses.error:
-                            logging.error(f"Failed to render item {item.name} at ({x}, {y}).")
-                        continue
-
-                    # Flame
-                    elif (x, y) in flame_positions:
-                        flame = flame_positions[(x, y)]
-                        flame_color_name = random.choice(["fire_red", "fire_orange"])
-                        flame_color = curses.color_pair(COLOR_TABLE.get(flame_color_name, 3))
-                        try:
-                            stdscr.addstr(y, x, "^", flame_color)
-                        except curses.error:
-                            logging.error(f"Failed to render flame at ({x}, {y}).")
-                        continue
+                    self.render_cell(stdscr, x, y, player, current_room, lookups)
 
             self.render_borders(stdscr, current_room)
 
+    def render_cell(self, stdscr, x, y, player, current_room, lookups):
+        """
+        Draws one cell of the game area: the terrain, with the player, an entity (monster,
+        item or projectile) or a flame on top. Room borders are drawn separately (see border_cell).
+        :param lookups: Position lookups from cell_lookups().
+        """
+        glyphs, flame_positions = lookups
+        cell = current_room.grid[y][x]
+        if cell:
+            attr = self.terrain_attrs.get(cell)
+            if attr is None:
+                attr = self.terrain_attr(cell)
+            try:
+                stdscr.addstr(y, x, cell, attr)
+            except curses.error:
+                logging.error(f"Failed to render terrain at ({x}, {y}).")
+
+        position = (x, y)
+        # Player
+        if x == player.x and y == player.y:
+            player_color = curses.color_pair(COLOR_TABLE.get("player", 1))
+            try:
+                stdscr.addstr(y, x, "@", player_color)
+            except curses.error:
+                logging.error(f"Failed to render player at ({x}, {y}).")
+
+        # Monster, item or projectile
+        elif position in glyphs:
+            symbol, color, _ = glyphs[position]
+            try:
+                stdscr.addstr(y, x, symbol, curses.color_pair(color))
+            except curses.error:
+                logging.error(f"Failed to render '{symbol}' at ({x}, {y}).")
+
+        # Flame
+        elif position in flame_positions:
+            flame_color_name = self.flicker_rng.choice(["fire_red", "fire_orange"])
+            flame_color = curses.color_pair(COLOR_TABLE.get(flame_color_name, 3))
+            try:
+                stdscr.addstr(y, x, "^", flame_color)
+            except curses.error:
+                logging.error(f"Failed to render flame at ({x}, {y}).")
+
+    def border_cell(self, current_room, x, y):
+        """
+        :return: (symbol, color name) drawn over (x, y) by render_borders, or None inside the room.
+                 Edges towards a neighbouring room show arrows, outer edges show walls.
+        """
+        last_x, last_y = self.grid_width - 1, self.grid_height - 1
+        if x == 0:
+            return ("<", "border_green") if current_room.x > 0 else (TERRAIN_SYMBOLS.get("wall", "#"), "border_red")
+        if x == last_x:
+            return (">", "border_green") if current_room.x < self.grid_width - 1 else (TERRAIN_SYMBOLS.get("wall", "#"), "border_red")
+        if y == 0:
+            return ("^", "border_green") if current_room.y > 0 else (TERRAIN_SYMBOLS.get("wall", "#"), "border_red")
+        if y == last_y:
+            return ("v", "border_green") if current_room.y < self.grid_height - 1 else (TERRAIN_SYMBOLS.get("wall", "#"), "border_red")
+        return None
+
+    def render_border_cell(self, stdscr, current_room, x, y):
+        border = self.border_cell(current_room, x, y)
+        if border:
+            symbol, color_name = border
+            try:
+                stdscr.addstr(y, x, symbol, curses.color_pair(COLOR_TABLE.get(color_name, 7)))
+            except curses.error:
+                logging.warning(f"Failed to render border symbol at ({x}, {y}).")
+
     def render_borders(self, stdscr, current_room):
-        room_x, room_y = current_room.x, current_room.y
-        floor_width, floor_height = self.grid_width, self.grid_height
         screen_height, screen_width = stdscr.getmaxyx()
-        connection_symbol_top = "^"
-        connection_symbol_bottom = "v"
-        connection_symbol_left = "<"
-        connection_symbol_right = ">"
-        wall_symbol = TERRAIN_SYMBOLS.get("wall", "#")
-
-        for x in range(self.grid_width):
-            if x >= screen_width:
-                continue
-            y = 0
-            if room_y > 0:
-                try:
-                    stdscr.addstr(y, x, connection_symbol_top, curses.color_pair(COLOR_TABLE.get("border_green", 8)))
-                except curses.error:
-                    logging.warning(f"Failed to render top connection symbol.")
-            else:
-                try:
-                    stdscr.addstr(y, x, wall_symbol, curses.color_pair(COLOR_TABLE.get("border_red", 7)))
-                except curses.error:
-                    logging.warning("Failed to render top wall symbol.")
-
-            bottom_y = self.grid_height - 1
-            if bottom_y < screen_height:
-                if room_y < floor_height - 1:
-                    try:
-                        stdscr.addstr(bottom_y, x, connection_symbol_bottom, curses.color_pair(COLOR_TABLE.get("border_green", 8)))
-                    except curses.error:
-                        logging.warning("Failed to render bottom connection symbol.")
-                else:
-                    try:
-                        stdscr.addstr(bottom_y, x, wall_symbol, curses.color_pair(COLOR_TABLE.get("border_red", 7)))
-                    except curses.error:
-                        logging.warning("Failed to render bottom wall symbol.")
-
-        for y in range(self.grid_height):
-            if y >= screen_height:
-                continue
-            if room_x > 0:
-                try:
-                    stdscr.addstr(y, 0, connection_symbol_left, curses.color_pair(COLOR_TABLE.get("border_green", 8)))
-                except curses.error:
-                    logging.warning("Failed to render left connection symbol.")
-            else:
-                try:
-                    stdscr.addstr(y, 0, wall_symbol, curses.color_pair(COLOR_TABLE.get("border_red", 7)))
-                except curses.error:
-                    logging.warning("Failed to render left wall symbol.")
-
-            right_x = self.grid_width - 1
-            if right_x < screen_width:
-                if room_x < floor_width - 1:
-                    try:
-                        stdscr.addstr(y, right_x, connection_symbol_right, curses.color_pair(COLOR_TABLE.get("border_green", 8)))
-                    except curses.error:
-                        logging.warning("Failed to render right connection symbol.")
-                else:
-                    try:
-                        stdscr.addstr(y, right_x, wall_symbol, curses.color_pair(COLOR_TABLE.get("border_red", 7)))
-                    except curses.error:
-                        logging.warning("Failed to render right wall symbol.")
+        last_x, last_y = self.grid_width - 1, self.grid_height - 1
+
+        # Top and bottom rows, then the side columns (which take the corners)
+        for x in range(min(self.grid_width, screen_width)):
+            self.render_border_cell(stdscr, current_room, x, 0)
+            if last_y < screen_height:
+                self.render_border_cell(stdscr, current_room, x, last_y)
+        for y in range(min(self.grid_height, screen_height)):
+            self.render_border_cell(stdscr, current_room, 0, y)
+            if last_x < screen_width:
+                self.render_border_cell(stdscr, current_room, last_x, y)
+
+    def restore_cell(self, stdscr, x, y, player, current_room, lookups):
+        """
+        Redraws a single game-area cell exactly as render_game_area left it, border included.
+        """
+        self.render_cell(stdscr, x, y, player, current_room, lookups)
+        self.render_border_cell(stdscr, current_room, x, y)
 
     def render_messages(self, stdscr):
         sidebar_x = self.grid_width + 2
         left_col_width = 30
         right_col_x = sidebar_x + left_col_width + 1
 
-        displayed_messages = self.messages[-self.max_messages:]
+        displayed_messages = self.messages.lines(self.max_messages)
         for idx, message in enumerate(displayed_messages):
             line_y = idx
             if line_y < self.grid_height - 2:
@@ -0,0 +1,134 @@
+import argparse
+import logging
+import sys
+import time
+from logging_setup import setup_logging
+from headless import HeadlessScreen, enable_headless_curses
+from journal import JournalError, read_journal, state_digest
+from game import GameSession
+
+
+class ReplayResult:
+    def __init__(self):
+        self.turns = 0
+        self.checkpoints = 0
+        self.mismatches = []  # (turn, expected digest, actual digest)
+        self.desyncs = []     # turns whose recorded keys were not consumed exactly
+        self.elapsed = 0.0
+
+    @property
+    def ok(self):
+        return not self.mismatches and not self.desyncs
+
+    @property
+    def turns_per_second(self):
+        return self.turns / self.elapsed if self.elapsed > 0 else 0.0
+
+
+def replay_journal(journal, render=False, verify=True):
+    """
+    Re-executes a recorded session headlessly at full speed.
+    :param journal: Journal returned by read_journal().
+    :param render: Also run the renderer against the headless screen.
+    :param verify: Compare state digests at recorded checkpoints.
+    :return: ReplayResult
+    """
+    enable_headless_curses()
+    screen = HeadlessScreen()
+    session = GameSession(screen, journal.grid_width, journal.grid_height, seed=journal.seed)
+    result = ReplayResult()
+
+    start = time.perf_counter()
+    for recorded in journal.turns:
+        session.begin_turn(recorded.seed)
+        result.turns += 1
+
+        if verify and recorded.checkpoint is not None:
+            result.checkpoints += 1
+            digest = state_digest(session)
+            if digest != recorded.checkpoint:
+                result.mismatches.append((recorded.turn, recorded.checkpoint, digest))
+                logging.error(f"Replay diverged at turn {recorded.turn}: expected {recorded.checkpoint:08x}, got {digest:08x}.")
+
+        screen.keys.clear()
+        screen.push_keys(recorded.keys)
+
+        if render:
+            session.render()
+        if not session.update_world():
+            session.renderer.display_game_over(screen)
+            break
+
+        # Turn-based journals hold one key per turn (plus any prompt keys read while
+        # handling it); real-time journals hold every key pressed before the next tick.
+        keep_going = True
+        while keep_going and screen.keys:
+            keep_going = session.handle_key(screen.getch())
+        session.end_turn()
+        if not keep_going:
+            if screen.keys:
+                result.desyncs.append(recorded.turn)
+            break
+    result.elapsed = time.perf_counter() - start
+    return result
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Replay a Zombierun session journal headlessly.")
+    parser.add_argument("journal", help="Journal file written with game.py --journal.")
+    parser.add_argument("--render", action="store_true", help="Run the renderer against a headless screen too.")
+    parser.add_argument("--no-verify", action="store_true", help="Skip checkpoint digest comparison.")
+    parser.add_argument("--repeat", type=int, default=1, help="Replay the session several times (load generation).")
+    parser.add_argument("--log-level", default="WARNING",
+                        choices=["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"])
+    parser.add_argument("--log-file", default="replay.log")
+    parser.add_argument("--profile", metavar="PREFIX", default=None,
+                        help="Profile the replays; writes PREFIX.pstats and PREFIX.collapsed (flame graph input).")
+    parser.add_argument("--profile-mode", choices=["cprofile", "sample"], default="cprofile",
+                        help="cprofile: exact call counts and times; sample: low-overhead stack sampling (default: cprofile).")
+    parser.add_argument("--sample-interval", metavar="MS", type=float, default=5.0,
+                        help="Milliseconds between stack samples when profiling (default: 5).")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    setup_logging(level=getattr(logging, args.log_level), filename=args.log_file)
+    try:
+        journal = read_journal(args.journal)
+    except (OSError, JournalError) as e:
+        print(f"Cannot replay: {e}")
+        return 1
+    if not journal.complete:
+        print("Warning: journal has no end record; the session may have crashed.")
+
+    if args.profile:
+        from profiler import profile_call
+        all_ok = profile_call(args.profile, replay_runs, journal, args,
+                              mode=args.profile_mode, interval=args.sample_interval / 1000)
+        print(f"Wrote profile to {args.profile}.pstats and {args.profile}.collapsed")
+    else:
+        all_ok = replay_runs(journal, args)
+    return 0 if all_ok else 1
+
+
+def replay_runs(journal, args):
+    """
+    Replays the journal args.repeat times, printing a line per run.
+    :return: True if every run matched the journal.
+    """
+    all_ok = True
+    for run in range(args.repeat):
+        result = replay_journal(journal, render=args.render, verify=not args.no_verify)
+        all_ok = all_ok and result.ok
+        print(f"Run {run + 1}: {result.turns} turn(s) in {result.elapsed:.3f}s "
+              f"({result.turns_per_second:.0f} turns/s), "
+              f"{result.checkpoints} checkpoint(s), "
+              f"{len(result.mismatches)} mismatch(es), {len(result.desyncs)} input desync(s).")
+        for turn, expected, actual in result.mismatches[:10]:
+            print(f"  turn {turn}: expected {expected:08x}, got {actual:08x}")
+    return all_ok
+
+
+if __name__ == "__main__":
+    sys.exit(main())
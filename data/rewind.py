@@ -0,0 +1,164 @@
+import logging
+import random
+import sys
+import time
+from collections import deque, namedtuple
+from entities import MONSTER, ITEM, entity_rows
+
+DEFAULT_REWIND_TURNS = 200  # Snapshots kept by the debug rewind buffer
+
+# One turn of state: the player, the room they are in and the floor staircases.
+# Every field is immutable, and a field (or grid row) equal to the one in the
+# previous snapshot is the previous snapshot's object, so a turn only costs
+# memory for what changed in it.
+Snapshot = namedtuple("Snapshot", "turn fire_mode player grenades kill_stats room_key grid monsters items fire staircases")
+
+PLAYER_FIELDS = ("x", "y", "floor", "health", "max_health", "armor", "max_armor", "damage_taken", "cause_of_death", "weapon", "weapon_ammo")
+
+
+def shared(value, previous):
+    """
+    :return: previous if it equals value, so unchanged state is stored once.
+    """
+    return previous if value == previous else value
+
+
+class RewindBuffer:
+    def __init__(self, turns=DEFAULT_REWIND_TURNS):
+        """
+        Keeps the last few turns of game state so a debug session can step back.
+        Snapshots share every unchanged part with the snapshot before them.
+        :param turns: Maximum number of snapshots kept; the oldest are dropped.
+        """
+        if turns < 1:
+            raise ValueError(f"Rewind must keep at least 1 turn (got {turns}).")
+        self.snapshots = deque(maxlen=turns)
+        self.skip_capture = False  # Set after a rewind: the restored state is already the newest snapshot
+        self.captures = 0
+        self.capture_seconds = 0.0
+
+    def capture(self, session):
+        """
+        Records the state at the end of a turn.
+        """
+        if self.skip_capture:
+            self.skip_capture = False
+            return
+        started = time.perf_counter()
+        player = session.player
+        room = session.current_room
+        previous = self.snapshots[-1] if self.snapshots else None
+        room_key = (room.floor, room.x, room.y)
+
+        if previous is not None and previous.room_key == room_key:
+            previous_rows = previous.grid
+            grid = tuple(shared("".join(row), previous_row) for row, previous_row in zip(room.grid, previous_rows))
+            grid = shared(grid, previous_rows)
+        else:
+            grid = tuple("".join(row) for row in room.grid)
+
+        snapshot = Snapshot(
+            turn=session.turn,
+            fire_mode=session.fire_mode_active,
+            player=tuple(getattr(player, field) for field in PLAYER_FIELDS),
+            grenades=tuple(player.grenades.items()),
+            kill_stats=tuple((group, tuple(counts.items())) for group, counts in player.kill_stats.items()),
+            room_key=room_key,
+            grid=grid,
+            monsters=entity_rows(room.entities, (MONSTER,), ("type_id", "x", "y", "health")),
+            items=entity_rows(room.entities, (ITEM,), ("type_id", "x", "y")),
+            fire=room.fire.state(),
+            staircases=tuple(session.room_manager.floor_staircases.items()),
+        )
+        if previous is not None:
+            snapshot = snapshot._replace(
+                player=shared(snapshot.player, previous.player),
+                grenades=shared(snapshot.grenades, previous.grenades),
+                kill_stats=shared(snapshot.kill_stats, previous.kill_stats),
+                monsters=shared(snapshot.monsters, previous.monsters),
+                items=shared(snapshot.items, previous.items),
+                fire=shared(snapshot.fire, previous.fire),
+                staircases=shared(snapshot.staircases, previous.staircases),
+            )
+        self.snapshots.append(snapshot)
+        self.captures += 1
+        self.capture_seconds += time.perf_counter() - started
+
+    def rewind(self, session, steps=1):
+        """
+        Restores the state from `steps` turns before the last captured one. The turn
+        generator is rewound too, so playing the same keys again gives the same turns.
+        :return: The turn number restored, or None if not enough turns are kept.
+        """
+        if steps < 1 or len(self.snapshots) <= steps:
+            return None
+        for _ in range(steps):
+            self.snapshots.pop()
+        snapshot = self.snapshots[-1]
+        self.restore(session, snapshot)
+        self.skip_capture = True
+        logging.info(f"Rewound {steps} turn(s) to turn {snapshot.turn}.")
+        return snapshot.turn
+
+    def restore(self, session, snapshot):
+        player = session.player
+        room_manager = session.room_manager
+        room = room_manager.rooms.get(snapshot.room_key)
+        if room is None:
+            room = room_manager.get_room(*snapshot.room_key)
+        if room is not session.current_room:
+            # Take the player marker off the room being left
+            session.current_room.restore_terrain(player.x, player.y)
+
+        for field, value in zip(PLAYER_FIELDS, snapshot.player):
+            setattr(player, field, value)
+        player.grenades = dict(snapshot.grenades)
+        player.kill_stats = {group: dict(counts) for group, counts in snapshot.kill_stats}
+
+        for row, text in zip(room.grid, snapshot.grid):
+            row[:] = text
+        room.terrain.rebuild()
+        room.clear_monsters()
+        for type_id, x, y, health in snapshot.monsters:
+            room.spawn_monster(type_id, x, y, health)
+        room.items.clear()
+        for type_id, x, y in snapshot.items:
+            room.items.add(type_id, x, y)
+        room.fire.restore(snapshot.fire)
+        room_manager.floor_staircases = dict(snapshot.staircases)
+
+        session.turn = snapshot.turn
+        session.fire_mode_active = snapshot.fire_mode
+        # Replay the per-turn seed generator up to the restored turn
+        session.turn_rng = random.Random(session.seed)
+        for _ in range(snapshot.turn):
+            session.turn_rng.getrandbits(32)
+        if room is not session.current_room:
+            session.current_room = room
+            session.monster_manager.update_room(room)
+
+    def memory_bytes(self):
+        """
+        Approximate memory held by the kept snapshots, counting shared objects once.
+        """
+        seen = set()
+        total = 0
+        pending = list(self.snapshots)
+        while pending:
+            obj = pending.pop()
+            if id(obj) in seen:
+                continue
+            seen.add(id(obj))
+            total += sys.getsizeof(obj)
+            if isinstance(obj, tuple):
+                pending.extend(obj)
+        return total
+
+    def stats(self):
+        """
+        :return: Snapshots kept, mean capture cost in microseconds and bytes per kept snapshot.
+        """
+        kept = len(self.snapshots)
+        mean_us = self.capture_seconds / self.captures * 1e6 if self.captures else 0.0
+        per_turn = self.memory_bytes() / kept if kept else 0.0
+        return {"kept": kept, "capture_us": mean_us, "bytes_per_turn": per_turn}
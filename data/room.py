@@ -1,101 +1,80 @@
 import random
-import os
 import logging
-from constants import TERRAIN_SYMBOLS, ITEM_TABLE, MONSTER_TABLE
-
-# Configure logging
-logging.basicConfig(
-    filename='game.log',
-    level=logging.INFO,
-    format='%(asctime)s:%(levelname)s:%(message)s'
-)
-
-class Item:
-    def __init__(self, name, symbol, item_type, color, x, y):
-        """
-        Represents an item on the ground (weapons, ammo, healing items, grenades, etc.).
-        :param name: Name of the item.
-        :param symbol: Symbol representing the item on the grid.
-        :param item_type: e.g., 'healing', 'ammo', 'grenade', 'armor', 'weapon'...
-        :param color: Color name from COLOR_TABLE.
-        :param x: X-coordinate of the item.
-        :param y: Y-coordinate of the item.
-        """
-        self.name = name
-        self.symbol = symbol
-        self.item_type = item_type
-        self.color = color
-        self.x = x
-        self.y = y
+from constants import TERRAIN_SYMBOLS
+from entities import EntityStore, EntityHandle, column_property, ITEM, MONSTER, TYPE, POSITION, GLYPH, ITEM_LAYER
+from tables import ITEM_TYPES, ITEM_SYMBOL, ITEM_KIND, ITEM_COLOR_PAIR
+from fire import FireField, FLAME_SYMBOL
+from terrain import TerrainMap, TERRAIN_DAMAGE
+from templates import TemplatePool, build_template, VARIANTS, FLAME_DURATION
+from monster import Monster, MONSTER_COMPONENTS, monster_values
+from perf import span
+from loot import floor_tier, roll_room
+
+ITEM_COMPONENTS = (ITEM, TYPE, POSITION, GLYPH)
+
+class Item(EntityHandle):
+    """
+    An item on the ground (weapons, ammo, healing items, grenades, etc.), held in the
+    room's entity store. Name, symbol, kind and color come from the compiled ITEM_TYPES
+    record for type_id; the position lives in the store. Create items with RoomItems.add().
+    """
+    __slots__ = ("type_id",)
+
+    x = column_property("x")
+    y = column_property("y")
+
+    def __init__(self, type_id):
+        self.type_id = type_id
+
+    @property
+    def name(self):
+        return ITEM_TYPES[self.type_id].name
+
+    @property
+    def symbol(self):
+        return ITEM_SYMBOL[self.type_id]
+
+    @property
+    def item_type(self):
+        """
+        e.g., 'healing', 'ammo', 'grenade', 'armor', 'weapon'...
+        """
+        return ITEM_KIND[self.type_id]
+
+    @property
+    def color(self):
+        return ITEM_TYPES[self.type_id].color
 
     def __repr__(self):
         return f"Item(name={self.name}, symbol={self.symbol}, type={self.item_type}, position=({self.x}, {self.y}))"
 
 
 class RoomItems:
-    def __init__(self, room):
-        """
-        Initializes RoomItems for a given room by placing items randomly based on ITEM_TABLE drop rates.
-        """
-        self.items = []
-        self.generate_items(room)
-
-    def generate_items(self, room):
-        grid_width = room.grid_width
-        grid_height = room.grid_height
-        num_items = 5  # Adjust as needed
-
-        for _ in range(num_items):
-            # Select an item or weapon based on drop rates
-            item_choice = random.choices(
-                ITEM_TABLE,
-                weights=[item["drop_rate"] for item in ITEM_TABLE],
-                k=1
-            )[0]
-
-            # Try placing the item at a random position
-            attempts = 0
-            while attempts < 100:
-                x = random.randint(1, grid_width - 2)
-                y = random.randint(1, grid_height - 2)
-
-                if self.is_position_empty(x, y, room):
-                    # Create and place the item/weapon
-                    item = Item(
-                        name=item_choice["name"],
-                        symbol=item_choice["symbol"],
-                        item_type=item_choice["type"],
-                        color=item_choice["color"],
-                        x=x,
-                        y=y
-                    )
-                    self.items.append(item)
-                    room.grid[y][x] = item.symbol
-                    logging.info(f"Placed '{item.name}' ({item.item_type}) at ({x}, {y}) in room ({room.x}, {room.y}) on floor {room.floor}.")
-                    break
-
-                attempts += 1
-            else:
-                logging.warning(f"Failed to place '{item_choice['name']}' in room at ({room.x}, {room.y}) after 100 attempts.")
-
-    def is_position_empty(self, x, y, room):
+    def __init__(self, entities):
         """
-        Checks if a position is empty: grass terrain, no monsters, no items.
+        The items lying in a room, kept in the room's entity store. Rooms place them when
+        they are stamped from a template.
         """
-        if room.grid[y][x] != TERRAIN_SYMBOLS["grass"]:
-            return False
-        if any(monster.x == x and monster.y == y for monster in room.monsters):
-            return False
-        if any(item.x == x and item.y == y for item in self.items):
-            return False
-        return True
+        self.entities = entities
 
     def get_items(self):
-        return self.items
+        return self.entities.handles(ITEM)
+
+    def add(self, type_id, x, y):
+        item = Item(type_id)
+        self.entities.spawn(ITEM_COMPONENTS, {"type_id": type_id, "x": x, "y": y, "symbol": ITEM_SYMBOL[type_id],
+                                              "color": ITEM_COLOR_PAIR[type_id], "layer": ITEM_LAYER}, item)
+        return item
+
+    def remove(self, item):
+        self.entities.despawn([item.entity])
+
+    def clear(self):
+        self.entities.despawn_all(ITEM)
 
 
 class Room:
-    def __init__(self, grid_width, grid_height, floor_number=0, x=0, y=0, has_staircase=False):
+    def __init__(self, grid_width, grid_height, floor_number=0, x=0, y=0, has_staircase=False, template=None):
         """
         Initializes a Room instance with monsters, items, lingering flames, and optional staircase.
         :param grid_width: Width of the room grid.
@@ -103,6 +82,7 @@ class Room:
         :param floor_number: The floor number this room is on.
         :param x, y: Coordinates of the room in the floor layout.
         :param has_staircase: Whether the room contains a staircase.
+        :param template: RoomTemplate to stamp; one is generated if not given.
         """
         self.grid_width = grid_width
         self.grid_height = grid_height
@@ -110,126 +90,187 @@ class Room:
         self.x = x
         self.y = y
         self.has_staircase = has_staircase
-        self.grid = self._create_empty_grid()
-        self.monsters = []
-        self.items = RoomItems(self)
-        self.lingering_flames = []
-
-        self.generate_terrain()
-        if self.has_staircase:
-            self.place_staircase()
-        self.generate_monsters()
-
-    def _create_empty_grid(self):
-        grid = [[TERRAIN_SYMBOLS["grass"] for _ in range(self.grid_width)] for _ in range(self.grid_height)]
-        return grid
-
-    def generate_terrain(self):
-        num_walls = random.randint(5, 15)
-        num_trees = random.randint(5, 20)
-        num_fires = random.randint(0, 5)
-
-        # Place walls
-        for _ in range(num_walls):
-            x = random.randint(1, self.grid_width - 2)
-            y = random.randint(1, self.grid_height - 2)
-            if self.grid[y][x] == TERRAIN_SYMBOLS["grass"]:
-                self.grid[y][x] = TERRAIN_SYMBOLS["wall"]
-
-        # Place trees
-        for _ in range(num_trees):
-            x = random.randint(1, self.grid_width - 2)
-            y = random.randint(1, self.grid_height - 2)
-            if self.grid[y][x] == TERRAIN_SYMBOLS["grass"]:
-                self.grid[y][x] = TERRAIN_SYMBOLS["tree"]
-
-        # Place lingering flames (passable, damage externally handled)
-        for _ in range(num_fires):
-            x = random.randint(1, self.grid_width - 2)
-            y = random.randint(1, self.grid_height - 2)
-            if self.grid[y][x] == TERRAIN_SYMBOLS["grass"]:
-                self.add_lingering_flame(x, y, duration=5)
-
-    def place_staircase(self):
-        attempts = 0
-        while attempts < 100:
-            x = random.randint(1, self.grid_width - 2)
-            y = random.randint(1, self.grid_height - 2)
-            if self.grid[y][x] == TERRAIN_SYMBOLS["grass"]:
-                self.grid[y][x] = "S"
-                break
-            attempts += 1
-        else:
-            logging.warning(f"Failed to place staircase in room at ({self.x}, {self.y}) on floor {self.floor} after 100 attempts.")
-
-    def generate_monsters(self):
-        spawn_chance = 0.3
-        for monster_name, monster_info in MONSTER_TABLE.items():
-            if random.random() < spawn_chance:
-                x, y = self.get_random_empty_position()
-                if x is not None and y is not None:
-                    from monster import create_monster
-                    monster = create_monster(x, y, monster_name)
-                    self.monsters.append(monster)
-                    self.grid[y][x] = monster.symbol
-                    logging.info(f"Spawned {monster.name} at ({x}, {y}) in room ({self.x}, {self.y}) on floor {self.floor}.")
-
-    def get_random_empty_position(self):
-        attempts = 100
-        for _ in range(attempts):
-            x = random.randint(1, self.grid_width - 2)
-            y = random.randint(1, self.grid_height - 2)
-            if (
-                self.grid[y][x] == TERRAIN_SYMBOLS["grass"] and
-                not any(monster.x == x and monster.y == y for monster in self.monsters) and
-                not any(item.x == x and item.y == y for item in self.items.get_items())
-            ):
-                return x, y
-        logging.warning("Failed to find an empty position after multiple attempts.")
-        return None, None
+        self.staircase_position = None
+        self.entities = EntityStore()  # Monsters, items and projectiles
+        self.items = RoomItems(self.entities)
+        self.fire = FireField(grid_width, grid_height)
+        if template is None:
+            template = build_template(random, grid_width, grid_height)
+        self.stamp(template)
+
+    def stamp(self, template):
+        """
+        Copies the template's terrain, flipped one of four ways, then rolls the loot and
+        monsters from the floor's tier (see loot.py) and puts them, and the staircase, on
+        distinct open cells of the template.
+        """
+        width = self.grid_width
+        flip_x, flip_y = VARIANTS[random.randrange(len(VARIANTS))]
+        rows = template.rows[::-1] if flip_y else template.rows
+        if flip_x:
+            rows = [row[::-1] for row in rows]
+        self.grid = [list(row) for row in rows]
+        self.terrain = TerrainMap(self.grid, width, self.grid_height, rows)  # Write cells through self.terrain.set()
+
+        def place(index):
+            x, y = index % width, index // width
+            return (width - 1 - x if flip_x else x), (self.grid_height - 1 - y if flip_y else y)
+
+        for x, y in template.flames:
+            x, y = place(y * width + x)
+            self.add_lingering_flame(x, y, duration=FLAME_DURATION)
+
+        # Roll what the room holds, then draw that many distinct slots at once
+        item_type_ids, monster_type_ids = roll_room(floor_tier(self.floor), random)
+        slot_count = len(item_type_ids) + self.has_staircase + len(monster_type_ids)
+        if slot_count > len(template.open_cells):
+            logging.warning(f"Room at ({self.x}, {self.y}) on floor {self.floor} has {len(template.open_cells)} open cells for {slot_count} slots.")
+            monster_type_ids = monster_type_ids[:max(0, len(template.open_cells) - len(item_type_ids) - self.has_staircase)]
+            slot_count = min(slot_count, len(template.open_cells))
+        slots = [place(index) for index in random.sample(template.open_cells, slot_count)]
+
+        for type_id, (x, y) in zip(item_type_ids, slots):
+            item = self.items.add(type_id, x, y)
+            self.terrain.set(x, y, item.symbol)
+        slots = slots[len(item_type_ids):]
+        if self.has_staircase and slots:
+            self.staircase_position = slots.pop(0)
+            x, y = self.staircase_position
+            self.terrain.set(x, y, "S")
+        for type_id, (x, y) in zip(monster_type_ids, slots):
+            monster = self.spawn_monster(type_id, x, y)
+            self.terrain.set(x, y, monster.symbol)
+            logging.info(f"Spawned {monster.name} at ({x}, {y}) in room ({self.x}, {self.y}) on floor {self.floor}.")
+
+    @property
+    def monsters(self):
+        """
+        The monsters as a list of Monster handles, in the order they act. Built on each
+        access; change the room's monsters with spawn_monster() and remove_monsters().
+        """
+        return self.entities.handles(MONSTER)
+
+    def spawn_monster(self, type_id, x, y, health=None):
+        """
+        Adds a monster to the room (the grid is left to the caller).
+        :param health: Starting health, defaults to the type's health.
+        :return: The Monster handle.
+        """
+        monster = Monster(type_id)
+        self.entities.spawn(MONSTER_COMPONENTS, monster_values(type_id, x, y, health), monster)
+        return monster
+
+    def remove_monsters(self, monsters):
+        """
+        Removes the monsters (handles) from the room in one pass; the grid is left to the caller.
+        """
+        self.entities.despawn([monster.entity for monster in monsters])
+
+    def clear_monsters(self):
+        self.entities.despawn_all(MONSTER)
+
+    def monster_positions(self):
+        """
+        :return: Dict from (x, y) to the Monster there.
+        """
+        positions = {}
+        for archetype in self.entities.query(MONSTER, POSITION):
+            positions.update(zip(zip(archetype.columns["x"], archetype.columns["y"]), archetype.handles))
+        return positions
+
+    def monsters_in_area(self, x0, y0, x1, y1):
+        """
+        :return: List of the monsters from (x0, y0) to (x1, y1) inclusive, in the order they act.
+        """
+        found = []
+        for archetype in self.entities.query(MONSTER, POSITION):
+            handles = archetype.handles
+            for row, (x, y) in enumerate(zip(archetype.columns["x"], archetype.columns["y"])):
+                if x0 <= x <= x1 and y0 <= y <= y1:
+                    found.append(handles[row])
+        return found
+
+    def monster_at(self, x, y):
+        """
+        :return: The first monster at (x, y), or None.
+        """
+        for archetype in self.entities.query(MONSTER, POSITION):
+            xs, ys = archetype.columns["x"], archetype.columns["y"]
+            row = -1
+            while True:  # Jump between the rows in column x with array searches
+                try:
+                    row = xs.index(x, row + 1)
+                except ValueError:
+                    break
+                if ys[row] == y:
+                    return archetype.handles[row]
+        return None
 
     def remove_item(self, item):
-        if item in self.items.items:
-            self.items.items.remove(item)
+        if self.entities.locations.get(item.entity) is item.archetype:
+            x, y = item.x, item.y
+            self.items.remove(item)
             try:
-                self.grid[item.y][item.x] = TERRAIN_SYMBOLS["grass"]
-                logging.info(f"Removed item '{item.name}' from ({item.x}, {item.y}) in room ({self.x}, {self.y}) on floor {self.floor}.")
+                self.restore_terrain(x, y)
+                logging.info(f"Removed item '{item.name}' from ({x}, {y}) in room ({self.x}, {self.y}) on floor {self.floor}.")
             except IndexError:
-                logging.error(f"Attempted to remove item '{item.name}' at invalid position ({item.x}, {item.y}).")
+                logging.error(f"Attempted to remove item '{item.name}' at invalid position ({x}, {y}).")
 
     def add_lingering_flame(self, x, y, duration=5):
-        if 0 <= x < self.grid_width and 0 <= y < self.grid_height:
-            # Do not modify the grid cell. Just record flame presence.
-            self.lingering_flames.append({"position": (x, y), "remaining_turns": duration})
+        # Flames live in the fire field; the grid cell keeps its terrain until it burns out
+        self.fire.ignite(x, y, duration)
+
+    def add_lingering_flame_area(self, x0, y0, x1, y1, duration=5):
+        """
+        Sets a rectangle of cells alight, clipped to the room.
+        """
+        self.fire.ignite_area(x0, y0, x1, y1, duration)
 
     def update_lingering_flames(self):
-        remaining_flames = []
-        for flame in self.lingering_flames:
-            x, y = flame["position"]
-            flame["remaining_turns"] -= 1
-            if flame["remaining_turns"] > 0:
-                remaining_flames.append(flame)
-            else:
-                logging.info(f"Lingering flame at ({x}, {y}) has extinguished.")
-        self.lingering_flames = remaining_flames
+        """
+        Advances the fire: flames burn down, spread to grass and trees next to them and scorch what burned.
+        """
+        extinguished = self.fire.tick(self.terrain)
+        if extinguished:
+            logging.info(f"{extinguished} lingering flame(s) extinguished in room ({self.x}, {self.y}) on floor {self.floor}.")
+
+    @property
+    def lingering_flames(self):
+        """
+        The flames as a list of {'position': (x, y), 'remaining_turns': n} dicts. Built on
+        each access; use self.fire in code that runs every turn.
+        """
+        return self.fire.flames()
+
+    @lingering_flames.setter
+    def lingering_flames(self, flames):
+        self.fire.clear()
+        for flame in flames:
+            self.fire.ignite(*flame["position"], flame["remaining_turns"])
 
 
     def check_for_staircase(self, player):
-        return self.has_staircase and self.grid[player.y][player.x] == "S"
+        return self.has_staircase and (player.x, player.y) == self.staircase_position
+
+    def restore_terrain(self, x, y):
+        """
+        Redraws the ground at (x, y) after an entity leaves it, keeping the staircase and scorched ground.
+        """
+        if (x, y) == self.staircase_position:
+            self.terrain.set(x, y, "S")
+        elif self.fire.is_scorched(x, y):
+            self.terrain.set(x, y, TERRAIN_SYMBOLS["scorched"])
+        else:
+            self.terrain.set(x, y, TERRAIN_SYMBOLS["grass"])
 
     def get_flame_damage_at(self, x, y):
         """
-        Returns total damage from all flames at (x, y).
-        Each flame deals 5 damage per turn.
+        Returns the damage a flame at (x, y) deals per turn (0 if the cell is not burning).
         """
-        damage = 0
-        for flame in self.lingering_flames:
-            if flame["position"] == (x, y):
-                damage += 5
-        return damage
+        return TERRAIN_DAMAGE[FLAME_SYMBOL] if self.fire.is_burning(x, y) else 0
 
     def __repr__(self):
-        return f"Room(monsters={self.monsters}, items={self.items}, lingering_flames={len(self.lingering_flames)}, has_staircase={self.has_staircase})"
+        return f"Room(monsters={self.monsters}, items={self.items}, lingering_flames={self.fire.count()}, has_staircase={self.has_staircase})"
 
 
 class RoomManager:
@@ -248,10 +289,9 @@ class RoomManager:
         self.floor_height = floor_height
         self.rooms = {}
         self.save_dir = save_dir
-        if not os.path.exists(self.save_dir):
-            os.makedirs(self.save_dir)
-            logging.info(f"Created save directory at '{self.save_dir}'.")
         self.floor_staircases = {}  # floor -> (x, y) of staircase room
+        # Terrain for new rooms is prepared ahead; the pool seed comes from the game's generator
+        self.template_pool = TemplatePool(random.getrandbits(32), grid_width, grid_height)
 
     def get_room(self, floor, x, y):
         key = (floor, x, y)
@@ -259,18 +299,25 @@ class RoomManager:
             self.create_room(floor, x, y)
         return self.rooms[key]
 
-    def create_room(self, floor, x, y):
-        # If no staircase assigned for this floor yet, assign one random room on that floor
+    def assign_staircase(self, floor):
+        """
+        Returns the room coordinates holding the staircase on a floor, choosing a
+        random room the first time the floor is needed.
+        """
         if floor not in self.floor_staircases:
             staircase_x = random.randint(0, self.floor_width - 1)
             staircase_y = random.randint(0, self.floor_height - 1)
             self.floor_staircases[floor] = (staircase_x, staircase_y)
             logging.debug(f"Assigned staircase to room ({staircase_x}, {staircase_y}) on floor {floor}.")
+        return self.floor_staircases[floor]
 
-        staircase_x, staircase_y = self.floor_staircases[floor]
+    def create_room(self, floor, x, y):
+        # If no staircase assigned for this floor yet, assign one random room on that floor
+        staircase_x, staircase_y = self.assign_staircase(floor)
         has_staircase = (x, y) == (staircase_x, staircase_y)
 
-        room = Room(self.grid_width, self.grid_height, floor, x, y, has_staircase)
+        with span("generation"):
+            room = Room(self.grid_width, self.grid_height, floor, x, y, has_staircase, self.template_pool.take())
         self.rooms[(floor, x, y)] = room
         logging.debug(f"Created new room at ({x}, {y}) on floor {floor} with has_staircase={has_staircase}.")
         return room
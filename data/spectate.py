@@ -0,0 +1,228 @@
+import argparse
+import asyncio
+import logging
+import os
+import socket
+import sys
+import threading
+from framebuffer import AnsiEncoder, ANSI_RESTORE
+
+DEFAULT_KEYFRAME_INTERVAL = 150  # Frames between full redraws for late joiners and dropped clients
+DEFAULT_QUEUE_FRAMES = 64        # Frames buffered per spectator before it is dropped to the next keyframe
+MIN_KEYFRAME_GAP = 10            # Frames between keyframes requested by joining or lagging spectators
+DEFAULT_HOST = "127.0.0.1"
+
+
+def parse_address(address):
+    """
+    Spectator addresses are a port number or host:port for TCP, anything else is a Unix socket path.
+    :return: ("tcp", (host, port)) or ("unix", path)
+    """
+    host, _, port = address.rpartition(":")
+    if port.isdigit() and "/" not in address:
+        return "tcp", (host or DEFAULT_HOST, int(port))
+    return "unix", address
+
+
+class Spectator:
+    def __init__(self, writer, queue_frames):
+        self.writer = writer
+        self.queue = asyncio.Queue(maxsize=queue_frames)
+        self.waiting_for_keyframe = True  # Deltas are useless until the spectator has a full frame
+        self.dropped = 0
+        self.task = None
+
+    def offer(self, data, is_keyframe):
+        """
+        Queues a frame without ever waiting. A spectator that falls behind loses its
+        backlog and skips deltas until the next keyframe.
+        :return: False if the spectator now needs a keyframe.
+        """
+        if self.waiting_for_keyframe and not is_keyframe:
+            return False
+        if self.queue.full():
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.dropped += 1
+            self.waiting_for_keyframe = True
+            return False
+        self.waiting_for_keyframe = False
+        self.queue.put_nowait(data)
+        return True
+
+
+class SpectatorServer:
+    def __init__(self, address, keyframe_interval=DEFAULT_KEYFRAME_INTERVAL, queue_frames=DEFAULT_QUEUE_FRAMES):
+        """
+        Streams the game's frames to spectators over a local socket. The asyncio server runs
+        in a background thread; the game thread only hands over a copy of each frame.
+        Each frame is encoded once (a delta against the previous one, or a keyframe) and the
+        same bytes are queued for every spectator.
+        :param address: Port, host:port or Unix socket path (see parse_address).
+        :param keyframe_interval: Frames between keyframes.
+        :param queue_frames: Per-spectator queue length.
+        """
+        self.address = address
+        self.keyframe_interval = keyframe_interval
+        self.queue_frames = queue_frames
+        self.spectators = set()
+        self.loop = None
+        self.server = None
+        self.thread = None
+        self.encoder = None
+        self.previous = None           # (chars, attrs) of the last encoded frame
+        self.frames_since_keyframe = 0
+        self.keyframe_requested = True
+        self.frames_encoded = 0
+        self.bytes_encoded = 0
+        self.ready = threading.Event()
+
+    def start(self):
+        self.thread = threading.Thread(target=self._run, name="spectator-server", daemon=True)
+        self.thread.start()
+        self.ready.wait(5)
+        return self
+
+    def _run(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        kind, target = parse_address(self.address)
+        try:
+            if kind == "tcp":
+                self.server = self.loop.run_until_complete(asyncio.start_server(self._handle_client, *target))
+            else:
+                if os.path.exists(target):
+                    os.unlink(target)
+                self.server = self.loop.run_until_complete(asyncio.start_unix_server(self._handle_client, target))
+        except OSError as e:
+            logging.error(f"Spectator server could not listen on '{self.address}': {e}")
+            self.ready.set()
+            return
+        logging.info(f"Spectator server listening on '{self.address}'.")
+        self.ready.set()
+        self.loop.run_forever()
+
+    async def _handle_client(self, reader, writer):
+        spectator = Spectator(writer, self.queue_frames)
+        spectator.task = asyncio.current_task()
+        if not self.spectators:
+            self.previous = None  # Frames were not tracked while nobody watched
+        self.spectators.add(spectator)
+        self.keyframe_requested = True
+        peer = writer.get_extra_info("peername") or "unix socket"
+        logging.info(f"Spectator connected ({peer}); {len(self.spectators)} watching.")
+        try:
+            while True:
+                data = await spectator.queue.get()
+                writer.write(data)
+                await writer.drain()
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            self.spectators.discard(spectator)
+            writer.close()
+            logging.info(f"Spectator disconnected ({peer}) after {spectator.dropped} drop(s); {len(self.spectators)} watching.")
+
+    def on_frame(self, framebuffer):
+        """
+        Frame listener for MirrorScreen, called on the game thread. Costs two list copies
+        while someone is watching and nothing otherwise.
+        """
+        if not self.spectators or self.loop is None:
+            return
+        self.loop.call_soon_threadsafe(self._publish, framebuffer.chars[:], framebuffer.attrs[:], framebuffer.width)
+
+    def _publish(self, chars, attrs, width):
+        if self.encoder is None or self.encoder.width != width:
+            self.encoder = AnsiEncoder(width)
+            self.keyframe_requested = True
+
+        is_keyframe = (self.previous is None
+                       or self.frames_since_keyframe >= self.keyframe_interval
+                       or (self.keyframe_requested and self.frames_since_keyframe >= MIN_KEYFRAME_GAP))
+        if is_keyframe:
+            text = self.encoder.keyframe(chars, attrs)
+            self.frames_since_keyframe = 0
+            self.keyframe_requested = False
+        else:
+            text = self.encoder.delta(self.previous[0], self.previous[1], chars, attrs)
+            self.frames_since_keyframe += 1
+        self.previous = (chars, attrs)
+        if not text:
+            return
+
+        data = text.encode("utf-8")
+        self.frames_encoded += 1
+        self.bytes_encoded += len(data)
+        for spectator in list(self.spectators):
+            if not spectator.offer(data, is_keyframe):
+                self.keyframe_requested = True
+
+    async def _shutdown(self):
+        if self.server is not None:
+            self.server.close()
+        tasks = []
+        for spectator in list(self.spectators):
+            # Let queued frames go out before hanging up
+            if not spectator.waiting_for_keyframe:
+                while not spectator.queue.empty():
+                    spectator.writer.write(spectator.queue.get_nowait())
+            spectator.task.cancel()
+            tasks.append(spectator.task)
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stop(self):
+        if self.loop is None or not self.loop.is_running():
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self._shutdown(), self.loop).result(timeout=2)
+        except Exception as e:
+            logging.warning(f"Spectator server did not shut down cleanly: {e}")
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(timeout=2)
+        kind, target = parse_address(self.address)
+        if kind == "unix" and os.path.exists(target):
+            os.unlink(target)
+        logging.info(f"Spectator server stopped: {self.frames_encoded} frame(s), {self.bytes_encoded} byte(s) encoded.")
+
+
+def watch(address, output=None):
+    """
+    A minimal spectator: copies the stream from the server to the terminal.
+    """
+    output = output or sys.stdout.buffer
+    kind, target = parse_address(address)
+    if kind == "tcp":
+        connection = socket.create_connection(target)
+    else:
+        connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        connection.connect(target)
+    try:
+        while True:
+            data = connection.recv(65536)
+            if not data:
+                break
+            output.write(data)
+            output.flush()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        connection.close()
+        output.write(ANSI_RESTORE.encode("utf-8"))
+        output.flush()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Watch a Zombierun session started with --spectate.")
+    parser.add_argument("address", help="Port, host:port or Unix socket path the game is streaming to.")
+    args = parser.parse_args(argv)
+    try:
+        watch(args.address)
+    except OSError as e:
+        print(f"Could not connect to '{args.address}': {e}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
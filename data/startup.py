@@ -0,0 +1,55 @@
+import time
+
+_process_start = time.perf_counter()
+
+import logging
+import os
+import sys
+
+STARTUP_LOG_FILE = "startup.log"
+
+
+def probe(seed=1337, log_file=STARTUP_LOG_FILE):
+    """
+    Goes through the game's start-up path against a headless screen, stopping after the first frame.
+    :return: Dict of milliseconds spent in each phase since this module started executing.
+    """
+    phases = {}
+    last = _process_start
+
+    def mark(name):
+        nonlocal last
+        now = time.perf_counter()
+        phases[name] = (now - last) * 1000
+        last = now
+
+    from headless import HeadlessScreen, enable_headless_curses
+    enable_headless_curses()
+    from logging_setup import setup_logging, shutdown_logging
+    import game
+    mark("import")
+
+    setup_logging(level=logging.INFO, filename=log_file)
+    game.validate_color_table()
+    mark("logging")
+
+    screen = HeadlessScreen()
+    session = game.GameSession(screen, seed=seed)
+    mark("session")
+
+    session.begin_turn()
+    session.render()
+    screen.refresh()
+    mark("first_frame")
+
+    phases["total"] = (last - _process_start) * 1000
+    shutdown_logging()
+    return phases
+
+
+if __name__ == "__main__":
+    # Run by benchmark.py --startup in a fresh interpreter; prints the phase timings as JSON
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+    phases = probe()
+    import json
+    json.dump(phases, sys.stdout)
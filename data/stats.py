@@ -0,0 +1,350 @@
+import argparse
+import curses
+import logging
+import os
+import queue
+import sqlite3
+import sys
+import threading
+import time
+import urllib.parse
+from constants import COLOR_TABLE, WEAPON_TABLE, wait_for_key
+
+DEFAULT_STATS_DB = "stats.db"
+BATCH_SIZE = 500        # Runs written per transaction at most
+BATCH_WAIT = 0.2        # Seconds the writer waits for more runs before committing a batch
+BEST_RUNS = 5
+
+# runs holds one row per finished run and kills its per-weapon counts. The totals
+# tables are updated in the same transaction as each batch, so the summary reads a
+# handful of rows instead of aggregating every run; the per-run breakdowns come from
+# covering indexes.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    recorded_at REAL NOT NULL,
+    source TEXT NOT NULL,
+    seed INTEGER,
+    turns INTEGER NOT NULL,
+    floors_reached INTEGER NOT NULL,
+    damage_taken INTEGER NOT NULL,
+    died INTEGER NOT NULL,
+    cause_of_death TEXT,
+    total_kills INTEGER NOT NULL,
+    turn_p50_ms REAL,
+    turn_p95_ms REAL,
+    turn_p99_ms REAL
+);
+CREATE TABLE IF NOT EXISTS kills (
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    weapon TEXT NOT NULL,
+    category TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (run_id, weapon)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS totals (
+    source TEXT PRIMARY KEY,
+    runs INTEGER NOT NULL,
+    deaths INTEGER NOT NULL,
+    turns INTEGER NOT NULL,
+    damage_taken INTEGER NOT NULL,
+    kills INTEGER NOT NULL,
+    timed_runs INTEGER NOT NULL,
+    turn_p50_ms REAL NOT NULL,
+    turn_p95_ms REAL NOT NULL,
+    worst_turn_p99_ms REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS weapon_totals (
+    source TEXT NOT NULL,
+    weapon TEXT NOT NULL,
+    category TEXT NOT NULL,
+    kills INTEGER NOT NULL,
+    PRIMARY KEY (source, weapon)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS runs_by_floor ON runs (source, floors_reached, turns);
+CREATE INDEX IF NOT EXISTS runs_by_cause ON runs (source, died, cause_of_death);
+CREATE INDEX IF NOT EXISTS runs_by_seed ON runs (seed);
+"""
+
+INSERT_RUN = """
+INSERT INTO runs (recorded_at, source, seed, turns, floors_reached, damage_taken, died, cause_of_death,
+                  total_kills, turn_p50_ms, turn_p95_ms, turn_p99_ms)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+UPDATE_TOTALS = """
+INSERT INTO totals VALUES (?, 1, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (source) DO UPDATE SET
+    runs = runs + 1,
+    deaths = deaths + excluded.deaths,
+    turns = turns + excluded.turns,
+    damage_taken = damage_taken + excluded.damage_taken,
+    kills = kills + excluded.kills,
+    timed_runs = timed_runs + excluded.timed_runs,
+    turn_p50_ms = turn_p50_ms + excluded.turn_p50_ms,
+    turn_p95_ms = turn_p95_ms + excluded.turn_p95_ms,
+    worst_turn_p99_ms = MAX(worst_turn_p99_ms, excluded.worst_turn_p99_ms)
+"""
+UPDATE_WEAPON_TOTALS = """
+INSERT INTO weapon_totals VALUES (?, ?, ?, ?)
+ON CONFLICT (source, weapon) DO UPDATE SET kills = kills + excluded.kills
+"""
+
+
+def open_database(path):
+    connection = sqlite3.connect(path)
+    connection.execute("PRAGMA journal_mode=WAL")  # The summary view can read while a batch is written
+    connection.execute("PRAGMA synchronous=NORMAL")
+    connection.executescript(SCHEMA)
+    return connection
+
+
+def open_readonly(path):
+    """
+    Opens the database for the summary queries without creating it or its schema.
+    :raises FileNotFoundError: If there is no database at path.
+    """
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"No statistics database at '{path}'.")
+    return sqlite3.connect(f"file:{urllib.parse.quote(os.path.abspath(path))}?mode=ro", uri=True)
+
+
+def turn_percentiles(turn_times):
+    """
+    :param turn_times: Turn durations in seconds.
+    :return: {"p50", "p95", "p99"} in milliseconds, or None if no turns were timed.
+    """
+    ordered = sorted(turn_times)
+    if not ordered:
+        return None
+    last = len(ordered) - 1
+    return {name: ordered[int(quantile * last)] * 1000 for name, quantile in (("p50", 0.5), ("p95", 0.95), ("p99", 0.99))}
+
+
+def run_record(session, source="game"):
+    """
+    Collects the statistics of a finished GameSession.
+    """
+    player = session.player
+    return {
+        "source": source,
+        "seed": session.seed,
+        "turns": session.turn,
+        "floors_reached": session.floors_reached,
+        "damage_taken": player.damage_taken,
+        "died": player.health <= 0,
+        "cause_of_death": player.cause_of_death if player.health <= 0 else None,
+        "kills": {**player.kill_stats["weapons"], **player.kill_stats["grenades"]},
+        "turn_ms": turn_percentiles(session.turn_times),
+    }
+
+
+class StatsStore:
+    def __init__(self, path=DEFAULT_STATS_DB, batch_size=BATCH_SIZE, batch_wait=BATCH_WAIT):
+        """
+        Writes run records to the SQLite statistics database from a background thread.
+        record() only queues; the writer commits queued runs in batches of up to
+        batch_size, one transaction each.
+        :param path: Database file, created on first use.
+        """
+        self.path = path
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+        self.queue = queue.Queue()
+        self.written = 0
+        self.failed = 0
+        self.thread = threading.Thread(target=self._write_runs, name="stats-writer", daemon=True)
+        self.thread.start()
+
+    def record(self, run):
+        """
+        Queues a run record (see run_record) without waiting for the database.
+        """
+        self.queue.put(run)
+
+    def _write_runs(self):
+        try:
+            connection = open_database(self.path)
+        except sqlite3.Error as e:
+            logging.error(f"Could not open the statistics database '{self.path}': {e}")
+            connection = None
+
+        finished = False
+        while not finished:
+            batch = []
+            run = self.queue.get()
+            deadline = time.monotonic() + self.batch_wait
+            while True:
+                if run is None:
+                    finished = True
+                    break
+                batch.append(run)
+                if len(batch) >= self.batch_size:
+                    break
+                try:
+                    run = self.queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+            if not batch:
+                continue
+            if connection is None:
+                self.failed += len(batch)
+                continue
+            try:
+                with connection:
+                    for run in batch:
+                        self._insert(connection, run)
+                self.written += len(batch)
+            except sqlite3.Error as e:
+                self.failed += len(batch)
+                logging.error(f"Failed to write {len(batch)} run(s) to '{self.path}': {e}")
+
+        if connection is not None:
+            connection.close()
+
+    def _insert(self, connection, run):
+        source = run["source"]
+        turn_ms = run.get("turn_ms") or {}
+        kills = run["kills"]
+        total_kills = sum(kills.values())
+        cursor = connection.execute(INSERT_RUN, (
+            time.time(), source, run["seed"], run["turns"], run["floors_reached"], run["damage_taken"],
+            int(run["died"]), run["cause_of_death"], total_kills,
+            turn_ms.get("p50"), turn_ms.get("p95"), turn_ms.get("p99"),
+        ))
+        run_id = cursor.lastrowid
+        weapon_rows = [(name, "weapon" if name in WEAPON_TABLE else "grenade", count) for name, count in kills.items()]
+        connection.executemany("INSERT INTO kills VALUES (?, ?, ?, ?)", [(run_id, *row) for row in weapon_rows])
+        connection.executemany(UPDATE_WEAPON_TOTALS, [(source, *row) for row in weapon_rows])
+        connection.execute(UPDATE_TOTALS, (
+            source, int(run["died"]), run["turns"], run["damage_taken"], total_kills,
+            1 if turn_ms else 0, turn_ms.get("p50", 0.0), turn_ms.get("p95", 0.0), turn_ms.get("p99", 0.0),
+        ))
+
+    def close(self):
+        """
+        Writes everything still queued and stops the writer thread.
+        """
+        if not self.thread.is_alive():
+            return
+        self.queue.put(None)
+        self.thread.join()
+        logging.info(f"Statistics store '{self.path}': {self.written} run(s) written, {self.failed} failed.")
+
+
+def load_summary(path=DEFAULT_STATS_DB, source="game"):
+    """
+    Answers the summary queries for one source ("game", "horde" or "balance").
+    :return: Dict of totals, floor histogram, causes of death, kills per weapon and best runs,
+             or None if no runs are recorded.
+    :raises FileNotFoundError: If there is no database at path.
+    """
+    connection = open_readonly(path)
+    try:
+        totals = connection.execute(
+            "SELECT runs, deaths, turns, damage_taken, kills, timed_runs, turn_p50_ms, turn_p95_ms, worst_turn_p99_ms "
+            "FROM totals WHERE source = ?", (source,)).fetchone()
+        if totals is None:
+            return None
+        runs, deaths, turns, damage_taken, kills, timed_runs, p50_sum, p95_sum, worst_p99 = totals
+        floors = connection.execute(
+            "SELECT floors_reached, COUNT(*) FROM runs WHERE source = ? GROUP BY floors_reached", (source,)).fetchall()
+        causes = connection.execute(
+            "SELECT cause_of_death, COUNT(*) AS deaths FROM runs WHERE source = ? AND died = 1 "
+            "GROUP BY cause_of_death ORDER BY deaths DESC", (source,)).fetchall()
+        weapons = connection.execute(
+            "SELECT weapon, category, kills FROM weapon_totals WHERE source = ? ORDER BY kills DESC", (source,)).fetchall()
+        best = connection.execute(
+            "SELECT seed, floors_reached, turns FROM runs WHERE source = ? "
+            "ORDER BY floors_reached DESC, turns DESC LIMIT ?", (source, BEST_RUNS)).fetchall()
+    finally:
+        connection.close()
+
+    return {
+        "source": source,
+        "runs": runs,
+        "deaths": deaths,
+        "mean_turns": turns / runs,
+        "mean_damage_taken": damage_taken / runs,
+        "mean_kills": kills / runs,
+        "mean_turn_p50_ms": p50_sum / timed_runs if timed_runs else None,
+        "mean_turn_p95_ms": p95_sum / timed_runs if timed_runs else None,
+        "worst_turn_p99_ms": worst_p99 if timed_runs else None,
+        "floors_reached": dict(floors),
+        "causes_of_death": [(cause or "unknown", count) for cause, count in causes],
+        "kills": [(weapon, category, count) for weapon, category, count in weapons],
+        "best_runs": [{"seed": seed, "floors_reached": floor, "turns": turns} for seed, floor, turns in best],
+    }
+
+
+def format_summary(summary):
+    """
+    :return: Summary lines shared by the CLI and the in-game view.
+    """
+    if summary is None:
+        return ["No runs recorded yet."]
+    runs = summary["runs"]
+    lines = [
+        f"Runs: {runs} ({summary['source']})   Deaths: {summary['deaths']} ({summary['deaths'] / runs * 100:.1f}%)",
+        f"Mean turns: {summary['mean_turns']:.1f}   Mean damage taken: {summary['mean_damage_taken']:.1f}   "
+        f"Mean kills: {summary['mean_kills']:.1f}",
+    ]
+    if summary["mean_turn_p50_ms"] is not None:
+        lines.append(f"Turn time: mean p50 {summary['mean_turn_p50_ms']:.2f} ms, mean p95 {summary['mean_turn_p95_ms']:.2f} ms, "
+                     f"worst p99 {summary['worst_turn_p99_ms']:.2f} ms")
+    lines.append("Floors reached: " + "  ".join(f"{floor}: {count}" for floor, count in sorted(summary["floors_reached"].items())))
+    if summary["causes_of_death"]:
+        lines.append("Causes of death: " + ", ".join(f"{cause} {count}" for cause, count in summary["causes_of_death"]))
+    if summary["kills"]:
+        lines.append("Kills: " + ", ".join(f"{weapon} {count}" for weapon, _, count in summary["kills"]))
+    lines.append("Best runs: " + "; ".join(
+        f"seed {run['seed']} floor {run['floors_reached']} in {run['turns']} turns" for run in summary["best_runs"]))
+    return lines
+
+
+def show_summary(stdscr, path, source="game"):
+    """
+    In-game statistics view: draws the summary over the screen and waits for a key.
+    :param path: Statistics database, or None if statistics are switched off.
+    """
+    try:
+        lines = format_summary(load_summary(path, source)) if path else ["Run statistics are switched off."]
+    except FileNotFoundError as e:
+        lines = [str(e), "No runs recorded yet."]
+    except sqlite3.Error as e:
+        logging.error(f"Could not read the statistics database '{path}': {e}")
+        lines = [f"Could not read statistics: {e}"]
+
+    screen_height, screen_width = stdscr.getmaxyx()
+    text_color = curses.color_pair(COLOR_TABLE.get("yellow_message", 15))
+    title_color = curses.A_BOLD | curses.color_pair(COLOR_TABLE.get("border_green", 8))
+    stdscr.clear()
+    rows = [("RUN STATISTICS", title_color)] + [(line, text_color) for line in lines] + [("", 0), ("Press any key to return.", title_color)]
+    for y, (line, color) in enumerate(rows[:screen_height]):
+        try:
+            stdscr.addstr(y, 1, line[:screen_width - 2], color)
+        except curses.error:
+            logging.warning(f"Failed to render statistics line: {line}")
+    stdscr.refresh()
+    wait_for_key(stdscr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Summarise the runs recorded in the Zombierun statistics database.")
+    parser.add_argument("--db", default=DEFAULT_STATS_DB, help=f"Statistics database (default: {DEFAULT_STATS_DB}).")
+    parser.add_argument("--source", default="game", choices=["game", "horde", "balance"],
+                        help="Interactive games, horde-mode games or balance.py bot runs (default: game).")
+    args = parser.parse_args(argv)
+    try:
+        for line in format_summary(load_summary(args.db, args.source)):
+            print(line)
+    except FileNotFoundError as e:
+        print(e)
+        return 1
+    except sqlite3.Error as e:
+        print(f"Could not read '{args.db}': {e}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,88 @@
+from collections import namedtuple
+from constants import MONSTER_TABLE, ITEM_TABLE, WEAPON_TABLE, COLOR_TABLE
+
+# Entity tables compiled into immutable records indexed by an integer type ID.
+# Entities store only their type ID; shared data is read from the records or,
+# in hot loops, from the flat per-attribute tuples below.
+
+MonsterType = namedtuple("MonsterType", "id name type health attack_power speed symbol color color_pair")
+ItemType = namedtuple("ItemType", "id name symbol type drop_rate color color_pair")
+WeaponType = namedtuple("WeaponType", "id name ammo symbol type color description")
+
+DEFAULT_MONSTER_COLOR_PAIR = COLOR_TABLE["monster"]
+
+
+def item_color_pair(item, weapon_table=WEAPON_TABLE):
+    """
+    The color pair an item is drawn with on the map: weapons use their weapon color,
+    grenades are magenta and everything else uses the message yellow.
+    """
+    if item["type"] == "weapon":
+        return COLOR_TABLE.get(weapon_table.get(item["name"], {}).get("color", "fire_orange"), COLOR_TABLE["fire_orange"])
+    if item["type"] == "grenade":
+        return COLOR_TABLE["magenta"]
+    return COLOR_TABLE["yellow_message"]
+
+
+def compile_monster_table(monster_table=MONSTER_TABLE):
+    return tuple(
+        MonsterType(
+            id=type_id,
+            name=name,
+            type=info["type"],
+            health=info["health"],
+            attack_power=info["attack_power"],
+            speed=info.get("speed", 1),
+            symbol=info["symbol"],
+            color=info["color"],
+            color_pair=COLOR_TABLE.get(info["color"], DEFAULT_MONSTER_COLOR_PAIR),
+        )
+        for type_id, (name, info) in enumerate(monster_table.items())
+    )
+
+
+def compile_item_table(item_table=ITEM_TABLE, weapon_table=WEAPON_TABLE):
+    return tuple(
+        ItemType(
+            id=type_id,
+            name=item["name"],
+            symbol=item["symbol"],
+            type=item["type"],
+            drop_rate=item["drop_rate"],
+            color=item["color"],
+            color_pair=item_color_pair(item, weapon_table),
+        )
+        for type_id, item in enumerate(item_table)
+    )
+
+
+def compile_weapon_table(weapon_table=WEAPON_TABLE):
+    return tuple(
+        WeaponType(
+            id=type_id,
+            name=name,
+            ammo=info["ammo"],
+            symbol=info["symbol"],
+            type=info["type"],
+            color=info["color"],
+            description=info["description"],
+        )
+        for type_id, (name, info) in enumerate(weapon_table.items())
+    )
+
+
+MONSTER_TYPES = compile_monster_table()
+MONSTER_IDS = {monster_type.name: monster_type.id for monster_type in MONSTER_TYPES}
+MONSTER_SYMBOL = tuple(monster_type.symbol for monster_type in MONSTER_TYPES)
+MONSTER_COLOR_PAIR = tuple(monster_type.color_pair for monster_type in MONSTER_TYPES)
+MONSTER_ATTACK = tuple(monster_type.attack_power for monster_type in MONSTER_TYPES)
+MONSTER_SPEED = tuple(monster_type.speed for monster_type in MONSTER_TYPES)
+
+ITEM_TYPES = compile_item_table()
+ITEM_IDS = {item_type.name: item_type.id for item_type in ITEM_TYPES}
+ITEM_SYMBOL = tuple(item_type.symbol for item_type in ITEM_TYPES)
+ITEM_KIND = tuple(item_type.type for item_type in ITEM_TYPES)
+ITEM_COLOR_PAIR = tuple(item_type.color_pair for item_type in ITEM_TYPES)
+
+WEAPON_TYPES = compile_weapon_table()
+WEAPON_IDS = {weapon_type.name: weapon_type.id for weapon_type in WEAPON_TYPES}
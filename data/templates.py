@@ -0,0 +1,172 @@
+import logging
+import random
+import threading
+from array import array
+from collections import namedtuple
+from bitgrid import geometry
+from constants import TERRAIN_SYMBOLS
+from terrain import TERRAIN_FLAGS, BLOCKS_PLAYER, terrain_mask
+
+DEFAULT_POOL_SIZE = 16   # Templates kept ready ahead of the rooms that will use them
+LOW_WATER = 8            # A background refill starts when fewer templates than this are ready
+MAX_ATTEMPTS = 50        # Layouts tried per template before the quality floor is waived
+FLAME_DURATION = 5
+
+# Room terrain generated ahead of time. rows holds the terrain as strings, flames the
+# (x, y) positions that start burning and open_cells the y * width + x index of every
+# interior grass cell away from the room centre: the slots items, the staircase and
+# monsters are stamped into.
+RoomTemplate = namedtuple("RoomTemplate", "rows flames open_cells")
+
+# Ways a template can be flipped when it is stamped: (mirror left-right, mirror top-bottom).
+# Rooms are wider than they are tall, so a quarter turn does not fit; flipping both ways
+# is the half turn.
+VARIANTS = ((False, False), (True, False), (False, True), (True, True))
+
+_background_refill = {"enabled": True}
+
+
+def set_background_refill(enabled):
+    """
+    Switches the refill threads off, e.g. for batch simulations where nothing is
+    waiting on input and templates are cheaper to generate as they are needed.
+    """
+    _background_refill["enabled"] = enabled
+
+
+def generate_layout(rng, width, height):
+    """
+    Scatters walls, trees and fires over an empty room, with the same counts as rooms always had.
+    :return: (grid, flames) with the grid as a list of row lists.
+    """
+    grass = TERRAIN_SYMBOLS["grass"]
+    grid = [[grass] * width for _ in range(height)]
+    num_walls = rng.randint(5, 15)
+    num_trees = rng.randint(5, 20)
+    num_fires = rng.randint(0, 5)
+    for symbol, count in ((TERRAIN_SYMBOLS["wall"], num_walls), (TERRAIN_SYMBOLS["tree"], num_trees)):
+        for _ in range(count):
+            x = rng.randint(1, width - 2)
+            y = rng.randint(1, height - 2)
+            if grid[y][x] == grass:
+                grid[y][x] = symbol
+    flames = []
+    for _ in range(num_fires):
+        x = rng.randint(1, width - 2)
+        y = rng.randint(1, height - 2)
+        if grid[y][x] == grass:
+            flames.append((x, y))
+    return grid, flames
+
+
+def meets_quality_floor(grid, width, height):
+    """
+    A layout is playable when the room centre (where a new game starts) is open and
+    every open cell can be reached from the room edges, so no item, staircase or
+    monster is sealed in by walls and trees.
+    """
+    if TERRAIN_FLAGS[grid[height // 2][width // 2]] & BLOCKS_PLAYER:
+        return False
+    cells = geometry(width, height)
+    open_cells = cells.full & ~terrain_mask(grid, BLOCKS_PLAYER)
+    return cells.fill(cells.edges, open_cells) == open_cells
+
+
+def build_template(rng, width, height):
+    """
+    Generates layouts until one meets the quality floor.
+    """
+    for attempt in range(MAX_ATTEMPTS):
+        grid, flames = generate_layout(rng, width, height)
+        if meets_quality_floor(grid, width, height):
+            break
+    else:
+        logging.warning(f"No room layout met the quality floor after {MAX_ATTEMPTS} attempts; using the last one.")
+    grass = TERRAIN_SYMBOLS["grass"]
+    centre = (height // 2) * width + width // 2
+    rows = tuple("".join(row) for row in grid)
+    open_cells = array("H", (
+        y * width + x
+        for y in range(1, height - 1)
+        for x, symbol in enumerate(rows[y][1:width - 1], 1)
+        if symbol == grass and y * width + x != centre
+    ))
+    return RoomTemplate(rows, tuple(flames), open_cells)
+
+
+class TemplatePool:
+    def __init__(self, seed, width, height, size=DEFAULT_POOL_SIZE, low_water=LOW_WATER):
+        """
+        Room templates handed out in a fixed order. Template k is generated from its own
+        generator seeded from (seed, k), so the sequence is the same whether a template
+        was made by the background refill or on demand, and replays see the same rooms.
+        :param seed: Pool seed, drawn from the game's random generator.
+        :param width: Room width.
+        :param height: Room height.
+        :param size: Number of templates a refill prepares ahead.
+        :param low_water: Ready templates below which a refill is started.
+        """
+        self.seed = seed
+        self.width = width
+        self.height = height
+        self.size = size
+        self.low_water = low_water
+        self.ready = {}       # Template number -> RoomTemplate
+        self.next_index = 0   # Number of the next template handed out
+        self.lock = threading.Lock()
+        self.thread = None
+        self.hits = 0
+        self.misses = 0
+
+    def make(self, index):
+        return build_template(random.Random(self.seed * 1_000_003 + index), self.width, self.height)
+
+    def take(self):
+        """
+        :return: The next template, generated now if the refill has not reached it yet.
+        """
+        with self.lock:
+            index = self.next_index
+            self.next_index += 1
+            template = self.ready.pop(index, None)
+            ready_count = len(self.ready)
+        if template is None:
+            self.misses += 1
+            template = self.make(index)
+        else:
+            self.hits += 1
+        if ready_count < self.low_water and _background_refill["enabled"]:
+            self.start_refill()
+        return template
+
+    def start_refill(self):
+        if self.thread is not None and self.thread.is_alive():
+            return
+        self.thread = threading.Thread(target=self._refill, name="room-templates", daemon=True)
+        self.thread.start()
+
+    def _refill(self):
+        # Runs until the pool is full again, then exits
+        while True:
+            with self.lock:
+                wanted = [index for index in range(self.next_index, self.next_index + self.size) if index not in self.ready]
+            if not wanted:
+                return
+            index = wanted[0]
+            template = self.make(index)
+            with self.lock:
+                if index >= self.next_index:  # Otherwise it was taken (and generated) meanwhile
+                    self.ready[index] = template
+
+    def fill(self):
+        """
+        Prepares a full pool on the calling thread.
+        """
+        for index in range(self.next_index, self.next_index + self.size):
+            if index not in self.ready:
+                template = self.make(index)
+                with self.lock:
+                    self.ready.setdefault(index, template)
+
+    def stats(self):
+        return {"ready": len(self.ready), "hits": self.hits, "misses": self.misses}
@@ -0,0 +1,142 @@
+from bitgrid import grid_cells
+from constants import TERRAIN_PROPERTIES, DEFAULT_TERRAIN_PROPERTIES
+
+# TERRAIN_PROPERTIES compiled into one byte of flags per symbol. Each room keeps a
+# TerrainMap: the flags of every cell in a bytearray, kept in step with the grid, so a
+# check on one cell is a single indexed lookup (room.terrain.flags[y * width + x] &
+# BLOCKS_PLAYER), and bitboards of the cells with a flag (see bitgrid.py) for the
+# systems that work on every cell at once.
+
+BLOCKS_PLAYER = 1 << 0
+BLOCKS_MONSTERS = 1 << 1
+BLOCKS_BULLETS = 1 << 2
+BLOCKS_GRENADES = 1 << 3
+BLOCKS_SIGHT = 1 << 4
+BARE_GROUND = 1 << 5   # Nothing stands on it: rockets fly over it and hordes spawn on it
+FLAMMABLE = 1 << 6
+DAMAGING = 1 << 7
+
+PROPERTY_FLAGS = {
+    "blocks_player": BLOCKS_PLAYER,
+    "blocks_monsters": BLOCKS_MONSTERS,
+    "blocks_bullets": BLOCKS_BULLETS,
+    "blocks_grenades": BLOCKS_GRENADES,
+    "blocks_sight": BLOCKS_SIGHT,
+    "bare_ground": BARE_GROUND,
+    "flammable": FLAMMABLE,
+}
+
+_flag_tables = {}  # Flags -> bytes.translate table marking the symbols with any of them
+_bit_tables = {}   # Flags -> bytes.translate table marking the flag bytes with any of them
+
+
+def property_flags(properties):
+    """
+    :return: (flags, damage) for one entry of TERRAIN_PROPERTIES.
+    """
+    unknown = set(properties) - set(PROPERTY_FLAGS) - {"damage"}
+    if unknown:
+        raise ValueError(f"Unknown terrain properties: {', '.join(sorted(unknown))}.")
+    flags = 0
+    for name, flag in PROPERTY_FLAGS.items():
+        if properties.get(name):
+            flags |= flag
+    damage = properties.get("damage", 0)
+    if damage:
+        flags |= DAMAGING
+    return flags, damage
+
+
+def compile_terrain(terrain_properties=TERRAIN_PROPERTIES, default=DEFAULT_TERRAIN_PROPERTIES):
+    """
+    :return: (flags, damage): dicts from every single-byte symbol to its flags and to the
+             damage it deals per turn. Symbols not in the table get the default properties.
+    """
+    default_flags, default_damage = property_flags(default)
+    flags = {chr(code): default_flags for code in range(256)}
+    damage = {chr(code): default_damage for code in range(256)}
+    for symbol, properties in terrain_properties.items():
+        flags[symbol], damage[symbol] = property_flags(properties)
+    return flags, damage
+
+
+TERRAIN_FLAGS, TERRAIN_DAMAGE = compile_terrain()
+SYMBOL_FLAGS = bytes(TERRAIN_FLAGS[chr(code)] for code in range(256))  # Translates grid bytes to flag bytes
+
+
+def bit_table(flag):
+    """
+    :return: bytes.translate table turning flag bytes into "1" (any of the flags set) or "0".
+    """
+    table = _bit_tables.get(flag)
+    if table is None:
+        marked = ord("1"), ord("0")
+        table = _bit_tables[flag] = bytes(marked[not value & flag] for value in range(256))
+    return table
+
+
+def flag_mask(cells, flag):
+    """
+    :param cells: Bytes from bitgrid.grid_cells().
+    :param flag: One flag, or several OR-ed together.
+    :return: Mask of the cells whose symbol has any of the flags.
+    """
+    table = _flag_tables.get(flag)
+    if table is None:
+        table = _flag_tables[flag] = SYMBOL_FLAGS.translate(bit_table(flag))
+    return int(cells.translate(table), 2)
+
+
+def terrain_mask(grid, flag):
+    """
+    :return: Mask of the grid cells whose symbol has any of the flags. For a grid that
+             has no TerrainMap yet (e.g. a template being generated).
+    """
+    return flag_mask(grid_cells(grid), flag)
+
+
+class TerrainMap:
+    def __init__(self, grid, width, height, rows=None):
+        """
+        The flags of every cell of a room grid. Write cells through set(), and call
+        rebuild() after changing the grid any other way, so the flags and masks stay current.
+        :param grid: The room grid (rows of symbols); set() writes to it.
+        :param rows: The grid's rows as strings, if at hand (e.g. from a template), which
+                     saves joining the grid's lists.
+        """
+        self.grid = grid
+        self.width = width
+        self.height = height
+        self.flags = bytearray(width * height)  # Flags of cell (x, y) at y * width + x
+        self.masks = {}  # Flags -> bitboard of the cells with any of them, built on first use
+        self.rebuild(rows)
+
+    def rebuild(self, rows=None):
+        cells = "".join(rows if rows is not None else map("".join, self.grid)).encode("ascii", "replace")
+        self.flags[:] = cells.translate(SYMBOL_FLAGS)
+        self.masks.clear()
+
+    def set(self, x, y, symbol):
+        """
+        Writes symbol to the grid at (x, y) and updates the cell's flags; cached masks
+        are only dropped if a flag they cover changed.
+        """
+        self.grid[y][x] = symbol
+        index = y * self.width + x
+        flags = TERRAIN_FLAGS[symbol]
+        changed = self.flags[index] ^ flags
+        if changed:
+            self.flags[index] = flags
+            if self.masks:
+                for cached in [cached for cached in self.masks if cached & changed]:
+                    del self.masks[cached]
+
+    def mask(self, flag):
+        """
+        :param flag: One flag, or several OR-ed together.
+        :return: Bitboard (bit y * width + x) of the cells with any of the flags.
+        """
+        mask = self.masks.get(flag)
+        if mask is None:
+            mask = self.masks[flag] = int(self.flags.translate(bit_table(flag))[::-1], 2)
+        return mask
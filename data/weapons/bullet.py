@@ -1,7 +1,11 @@
 import curses
-import time
 import logging
-from constants import COLOR_TABLE, TERRAIN_SYMBOLS  # Import constants
+from constants import COLOR_TABLE, animation_pause  # Import constants
+from terrain import TERRAIN_FLAGS, BLOCKS_BULLETS
+from entities import PROJECTILE, POSITION, GLYPH, LIFETIME, PROJECTILE_LAYER
+
+PROJECTILE_COMPONENTS = (PROJECTILE, POSITION, GLYPH, LIFETIME)
+
 
 def render_bullet(stdscr, player_x, player_y, direction, room):
     """
@@ -32,30 +36,62 @@ def render_bullet(stdscr, player_x, player_y, direction, room):
     bullet_symbol = bullet_symbols.get(direction, ">")  # Default symbol if direction not mapped
 
     # Define bullet color using COLOR_TABLE
-    BULLET_COLOR = curses.color_pair(COLOR_TABLE.get("cyan", 13))  # Use 'cyan' for bullets
+    bullet_pair = COLOR_TABLE.get("cyan", 13)  # Use 'cyan' for bullets
+    BULLET_COLOR = curses.color_pair(bullet_pair)
 
-    # Initialize bullet position
-    bullet_x, bullet_y = player_x, player_y
+    max_distance = max(room.grid_width, room.grid_height)  # Maximum possible distance
 
-    kills = 0  # Initialize kill count
+    # The bullet is an entity in the room while it flies, so a redraw mid-flight shows it
+    entities = room.entities
+    bullet = entities.spawn(PROJECTILE_COMPONENTS, {"x": player_x, "y": player_y, "symbol": bullet_symbol,
+                                                    "color": bullet_pair, "layer": PROJECTILE_LAYER, "lifetime": max_distance})
+    try:
+        kills, bullet_x, bullet_y, terrain_symbol = fly_bullet(stdscr, room, bullet, dx, dy, bullet_symbol, BULLET_COLOR)
+    finally:
+        entities.despawn([bullet])
 
-    # Animation parameters
-    sleep_time = 0.02  # 20 milliseconds between frames
-    max_distance = max(room.grid_width, room.grid_height)  # Maximum possible distance
+    # Clear the last bullet position if it wasn't an impact
+    if (0 <= bullet_x < room.grid_width and 0 <= bullet_y < room.grid_height) and not TERRAIN_FLAGS.get(terrain_symbol, 0) & BLOCKS_BULLETS:
+        try:
+            stdscr.addstr(bullet_y, bullet_x, room.grid[bullet_y][bullet_x], curses.color_pair(COLOR_TABLE.get(get_terrain_color(room.grid[bullet_y][bullet_x]), 6)))
+            stdscr.refresh()
+        except curses.error:
+            logging.error(f"Failed to clear bullet at ({bullet_x}, {bullet_y}).")
+
+    return kills  # Return the number of kills
 
-    for distance in range(1, max_distance):
+
+def fly_bullet(stdscr, room, bullet, dx, dy, bullet_symbol, bullet_color):
+    """
+    Moves the bullet entity one cell per frame, drawing it, until it hits terrain or a
+    monster, leaves the room or its lifetime runs out.
+    :return: (kills, last x, last y, last terrain symbol checked).
+    """
+    # The bullet's row only moves if another projectile is removed, which cannot happen mid-flight
+    archetype = room.entities.locations[bullet]
+    row = archetype.rows[bullet]
+    xs, ys, lifetimes = archetype.columns["x"], archetype.columns["y"], archetype.columns["lifetime"]
+    bullet_x, bullet_y = xs[row], ys[row]
+    kills = 0
+    debug_enabled = logging.root.isEnabledFor(logging.DEBUG)
+    frame_delay = 20  # 20 milliseconds between frames
+    terrain_symbol = None  # Last terrain checked; stays None if the bullet leaves the room at once
+
+    while lifetimes[row] > 1:
+        lifetimes[row] -= 1
         # Calculate next position
         next_x = bullet_x + dx
         next_y = bullet_y + dy
 
         # Check boundaries
         if not (0 <= next_x < room.grid_width and 0 <= next_y < room.grid_height):
-            logging.debug(f"Bullet exited room boundaries at ({next_x}, {next_y}).")
+            if debug_enabled:
+                logging.debug(f"Bullet exited room boundaries at ({next_x}, {next_y}).")
             break  # Bullet exits the room
 
         # Check terrain collision
         terrain_symbol = room.grid[next_y][next_x]
-        if terrain_symbol in [TERRAIN_SYMBOLS["wall"], TERRAIN_SYMBOLS["tree"]]:
+        if room.terrain.flags[next_y * room.grid_width + next_x] & BLOCKS_BULLETS:
             # Render impact symbol
             try:
                 impact_color = curses.color_pair(COLOR_TABLE.get("border_red", 7))
@@ -67,15 +103,11 @@ def render_bullet(stdscr, player_x, player_y, direction, room):
             break  # Bullet stops upon hitting terrain
 
         # Check for collision with monsters
-        hit_monster = None
-        for monster in room.monsters:
-            if (next_x, next_y) == (monster.x, monster.y):
-                hit_monster = monster
-                break
+        hit_monster = room.monster_at(next_x, next_y)
 
         if hit_monster:
             # Apply damage to the monster
-            monster.take_damage(monster.health)  # Assume take_damage reduces health and checks if dead
+            hit_monster.take_damage(hit_monster.health)  # Assume take_damage reduces health and checks if dead
             kills += 1
             # Render impact symbol
             try:
@@ -88,8 +120,9 @@ def render_bullet(stdscr, player_x, player_y, direction, room):
             break  # Bullet stops after hitting a monster
 
         # Render bullet
+        xs[row], ys[row] = next_x, next_y
         try:
-            stdscr.addstr(next_y, next_x, bullet_symbol, BULLET_COLOR)
+            stdscr.addstr(next_y, next_x, bullet_symbol, bullet_color)
             stdscr.refresh()
         except curses.error:
             logging.error(f"Failed to render bullet at ({next_x}, {next_y}).")
@@ -107,17 +140,9 @@ def render_bullet(stdscr, player_x, player_y, direction, room):
         bullet_x, bullet_y = next_x, next_y
 
         # Pause for animation
-        time.sleep(sleep_time)
+        animation_pause(frame_delay)
 
-    # Clear the last bullet position if it wasn't an impact
-    if (0 <= bullet_x < room.grid_width and 0 <= bullet_y < room.grid_height) and terrain_symbol not in [TERRAIN_SYMBOLS["wall"], TERRAIN_SYMBOLS["tree"]]:
-        try:
-            stdscr.addstr(bullet_y, bullet_x, room.grid[bullet_y][bullet_x], curses.color_pair(COLOR_TABLE.get(get_terrain_color(room.grid[bullet_y][bullet_x]), 6)))
-            stdscr.refresh()
-        except curses.error:
-            logging.error(f"Failed to clear bullet at ({bullet_x}, {bullet_y}).")
-
-    return kills  # Return the number of kills
+    return kills, bullet_x, bullet_y, terrain_symbol
 
 
 def get_terrain_color(symbol):
@@ -133,5 +158,6 @@ def get_terrain_color(symbol):
         "^": "fire_red",
         "#": "border_red",
         "~": "dirt",
+        ",": "dirt",
     }
     return terrain_to_color.get(symbol, "grass")  # Default to 'grass' if not found
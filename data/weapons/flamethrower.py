@@ -1,10 +1,9 @@
 # weapons/flamethrower.py
 
-import time
 import curses
 import random
 import logging  # Ensure logging is imported
-from constants import COLOR_TABLE, WEAPON_TABLE
+from constants import COLOR_TABLE, WEAPON_TABLE, animation_pause
 
 def fire_flamethrower(stdscr, player_x, player_y, direction, room):
     """
@@ -22,6 +21,8 @@ def fire_flamethrower(stdscr, player_x, player_y, direction, room):
     max_length = WEAPON_TABLE["Flamethrower"]["ammo"]  # Using ammo as max_length for example
     kills = 0
     lingering_probability = 0.3  # Probability of a flame remaining as a lingering flame
+    monster_positions = room.monster_positions()
+    killed = set()
 
     for i in range(1, max_length + 1):  # i = 1 to max_length
         for j in range(-i, i + 1):  # Horizontal spread increases with i
@@ -47,13 +48,16 @@ def fire_flamethrower(stdscr, player_x, player_y, direction, room):
                     # Handle rendering error, possibly log it
                     pass
                 stdscr.refresh()
-                time.sleep(0.02)
+                animation_pause(20)
 
                 # Check if a monster is hit
-                monster_hit = next((m for m in room.monsters if m.x == x and m.y == y), None)
+                monster_hit = monster_positions.pop((x, y), None)
                 if monster_hit:
-                    room.monsters.remove(monster_hit)
+                    killed.add(monster_hit)
+                    room.restore_terrain(x, y)
                     kills += 1
                     logging.info(f"Flamethrower hit and killed {monster_hit.name} at ({x}, {y}).")
 
+    if killed:
+        room.remove_monsters(killed)
     return kills
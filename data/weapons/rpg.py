@@ -1,7 +1,8 @@
 # weapons/rpg.py
 
 import logging
-from constants import TERRAIN_SYMBOLS, COLOR_TABLE
+from constants import COLOR_TABLE
+from terrain import BARE_GROUND
 
 def fire_rpg(player_x, player_y, direction, room):
     """
@@ -29,13 +30,13 @@ def fire_rpg(player_x, player_y, direction, room):
     # Simulate rocket movement
     while 0 <= x < room.grid_width and 0 <= y < room.grid_height:
         # Check for monster at current position
-        monster_hit = next((m for m in room.monsters if m.x == x and m.y == y), None)
+        monster_hit = room.monster_at(x, y)
         if monster_hit:
             kills += explode_rpg(x, y, room)
             return kills
 
-        # Check for collision with terrain (non-grass)
-        if room.grid[y][x] != TERRAIN_SYMBOLS["grass"]:
+        # Check for collision with terrain (anything but grass or scorched ground)
+        if not room.terrain.flags[y * room.grid_width + x] & BARE_GROUND:
             kills += explode_rpg(x, y, room)
             return kills
 
@@ -59,22 +60,20 @@ def explode_rpg(center_x, center_y, room):
     """
     explosion_radius = 7  # 15x15 area -> radius of 7 from the center
     explosion_symbol = "*"  # Symbol representing explosion
-    kills = 0
 
-    for dy in range(-explosion_radius, explosion_radius + 1):
-        for dx in range(-explosion_radius, explosion_radius + 1):
-            x = center_x + dx
-            y = center_y + dy
-            if 0 <= x < room.grid_width and 0 <= y < room.grid_height:
-                # Add lingering fire effect
-                room.add_lingering_flame(x, y, duration=4)
+    # Add lingering fire effect over the whole blast
+    room.add_lingering_flame_area(center_x - explosion_radius, center_y - explosion_radius,
+                                  center_x + explosion_radius, center_y + explosion_radius, duration=4)
 
-                # Check if a monster is hit
-                monster_hit = next((m for m in room.monsters if m.x == x and m.y == y), None)
-                if monster_hit:
-                    room.monsters.remove(monster_hit)
-                    kills += 1
-                    logging.info(f"RPG explosion hit and killed {monster_hit.name} at ({x}, {y}).")
+    # One pass over the monsters rather than a search of them for every cell of the blast
+    killed = room.monsters_in_area(center_x - explosion_radius, center_y - explosion_radius,
+                                   center_x + explosion_radius, center_y + explosion_radius)
+    for monster in killed:
+        room.restore_terrain(monster.x, monster.y)
+        logging.info(f"RPG explosion hit and killed {monster.name} at ({monster.x}, {monster.y}).")
+    kills = len(killed)
+    if kills:
+        room.remove_monsters(killed)
 
     logging.info(f"RPG exploded at ({center_x}, {center_y}), killing {kills} monster(s).")
     return kills